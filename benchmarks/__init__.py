@@ -0,0 +1 @@
+"""Performance suite: ``python -m benchmarks run`` and ``python -m benchmarks compare``."""
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from . import (  # noqa: F401  (registers benchmarks)
+    bench_assets,
+    bench_observation,
+    bench_render,
+    bench_replay,
+    bench_search,
+    bench_simulation,
+    bench_snapshot,
+)
+from .registry import BASELINE_FILE, BENCHMARKS, HISTORY_FILE, compare, load_history, run
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Simulation and rendering benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run benchmarks and append the results to the history")
+    run_parser.add_argument("patterns", nargs="*", help="only run benchmarks whose name contains one of these")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing repeat")
+    commands.add_parser("list", help="list benchmark names")
+    commands.add_parser("baseline", help="store the latest run as the baseline")
+    compare_parser = commands.add_parser("compare", help="flag regressions of the latest run against the baseline")
+    compare_parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name, bench in sorted(BENCHMARKS.items()):
+            print(f"{name:<32}{bench.ops} {bench.unit}/call")
+        return 0
+    if args.command == "run":
+        run(args.patterns, args.repeat, args.min_time)
+        return 0
+
+    history = load_history()
+    if not history:
+        print(f"no runs recorded in {HISTORY_FILE}; use 'run' first")
+        return 1
+    latest = history[-1]
+    if args.command == "baseline":
+        BASELINE_FILE.write_text(json.dumps(latest, indent=2))
+        print(f"baseline set to the run of {latest['timestamp']} ({latest['commit']})")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; use 'baseline' first")
+        return 1
+    baseline = json.loads(args.baseline.read_text())
+    regressions = 0
+    for name, before, after, regressed in compare(latest["results"], baseline["results"], args.threshold):
+        regressions += regressed
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:<32}{before * 1e6:12.2f} us{after * 1e6:12.2f} us{after / before - 1:+9.1%}  {flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""Asset startup: building the sprite atlas from sources (cold) versus mapping the cached one (warm)."""
+from __future__ import annotations
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from .bench_render import headless_screen
+from .registry import benchmark
+
+
+def startup(cold: bool):
+    headless_screen()
+    from src.bomberman.assets import ASSET_KEYS, AssetManager
+
+    cache = Path(tempfile.mkdtemp(prefix="bomberman-atlas-"))
+    assets = AssetManager(cache_dir=cache)
+    assets.load()
+
+    def run() -> None:
+        if cold:
+            shutil.rmtree(cache, ignore_errors=True)
+        assets.load()
+        # touch every sprite so lazy slicing and conversion are included
+        for tile_type in ASSET_KEYS["tiles"]:
+            assets.tile_image(tile_type)
+        for powerup_type in ASSET_KEYS["powerups"]:
+            assets.powerup_image(powerup_type)
+        assets.bomb_image()
+        assets.player_image(1)
+        assets.player_image(2)
+    return run
+
+
+@benchmark("assets.cold_start")
+def cold_start():
+    return startup(cold=True)
+
+
+@benchmark("assets.warm_start")
+def warm_start():
+    return startup(cold=False)
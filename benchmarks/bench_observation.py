@@ -0,0 +1,45 @@
+"""Observation planes for learning code, one state at a time and in batches."""
+from __future__ import annotations
+
+from src.bomberman.config import FIXED_TIMESTEP
+from src.bomberman.entities import InputBuffer, InputState
+from src.bomberman.game_state import GameState
+
+from .registry import SkipBenchmark, benchmark
+
+BATCH = 64
+
+
+def encoder(batch_size: int):
+    try:
+        from src.bomberman.observation import ObservationEncoder
+    except ImportError as error:
+        raise SkipBenchmark(error)
+    return ObservationEncoder(batch_size=batch_size)
+
+
+def mid_match_states(count: int) -> list:
+    states = []
+    buffer = InputBuffer()
+    for seed in range(count):
+        state = GameState(seed=seed)
+        for tick in range(40 + seed % 20):
+            buffer.set_state(1, InputState(move=(1.0, 0.0), place_bomb=tick % 30 == 0))
+            buffer.set_state(2, InputState(move=(-1.0, 0.0), place_bomb=tick % 30 == 0))
+            state.update(FIXED_TIMESTEP, buffer)
+        states.append(state)
+    return states
+
+
+@benchmark("observation.encode", unit="observations")
+def encode_one():
+    planes = encoder(1)
+    state = mid_match_states(1)[0]
+    return lambda: planes.encode(state)
+
+
+@benchmark("observation.batch", ops=BATCH, unit="observations")
+def encode_batch():
+    planes = encoder(BATCH)
+    states = mid_match_states(BATCH)
+    return lambda: planes.encode_batch(states)
@@ -0,0 +1,48 @@
+"""Frame cost of the full-redraw reference and the incremental renderer, headless."""
+from __future__ import annotations
+
+import os
+
+from src.bomberman.config import FIXED_TIMESTEP
+from src.bomberman.entities import InputBuffer
+from src.bomberman.game_state import GameState
+
+from .registry import SkipBenchmark, benchmark
+
+
+def headless_screen():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    try:
+        import pygame
+    except ImportError as error:
+        raise SkipBenchmark(error)
+    from src.bomberman.assets import AssetManager
+    from src.bomberman.config import ARENA_HEIGHT, ARENA_WIDTH, SCALE_FACTOR, TILE_SIZE
+
+    pygame.init()
+    screen = pygame.display.set_mode((ARENA_WIDTH * TILE_SIZE * SCALE_FACTOR,
+                                      ARENA_HEIGHT * TILE_SIZE * SCALE_FACTOR))
+    assets = AssetManager()
+    assets.load()
+    return pygame, screen, assets
+
+
+@benchmark("render.draw_arena", unit="frames")
+def draw_arena_frame():
+    _, screen, assets = headless_screen()
+    from src.bomberman.renderer import draw_arena
+
+    state = GameState()
+    return lambda: draw_arena(screen, assets, state)
+
+
+@benchmark("render.incremental", unit="frames")
+def incremental_frame():
+    pygame, screen, assets = headless_screen()
+    from src.bomberman.renderer import Renderer
+
+    state = GameState()
+    renderer = Renderer(screen, assets, pygame.font.Font(None, 18))
+    result = state.update(FIXED_TIMESTEP, InputBuffer())
+    renderer.draw(state, result)
+    return lambda: renderer.draw(state, result)
@@ -0,0 +1,77 @@
+"""Scrubbing a long session: seeking a keyframed archive against re-simulating from tick 0."""
+from __future__ import annotations
+
+import random
+import tempfile
+from pathlib import Path
+
+from src.bomberman.archive import ReplayArchive, write_archive
+from src.bomberman.config import FIXED_TIMESTEP
+from src.bomberman.entities import (
+    ACTION_BOMB,
+    ACTION_DOWN,
+    ACTION_INPUTS,
+    ACTION_LEFT,
+    ACTION_RIGHT,
+    ACTION_UP,
+    InputBuffer,
+)
+from src.bomberman.game_state import GameState
+from src.bomberman.replay import Replay, ReplayRecorder, simulate
+
+from .registry import benchmark
+
+TICKS = 6000
+
+
+def session() -> Replay:
+    """Random play, with a new round whenever one ends, recorded tick by tick."""
+    rng = random.Random(0)
+    state = GameState(seed=0)
+    recorder = ReplayRecorder(state)
+    buffer = InputBuffer()
+    for _ in range(TICKS):
+        if state.round_over:
+            state.reset_round()
+            recorder.record_reset()
+        for player_id in state.players:
+            action = rng.choice((ACTION_LEFT, ACTION_RIGHT, ACTION_UP, ACTION_DOWN))
+            buffer.set_state(player_id, ACTION_INPUTS[action | (ACTION_BOMB if rng.random() < 0.02 else 0)])
+        recorder.record_tick(buffer)
+        state.update(FIXED_TIMESTEP, buffer)
+    return recorder.finish()
+
+
+@benchmark("replay.seek", unit="seeks")
+def seek_archive():
+    directory = tempfile.TemporaryDirectory()
+    path = Path(directory.name) / "session.bma"
+    write_archive(session(), path)
+    archive = ReplayArchive(path)
+    ticks = random.Random(1).choices(range(TICKS), k=64)
+    position = 0
+
+    def seek():
+        nonlocal position
+        position = (position + 1) % len(ticks)
+        return archive.state_at(ticks[position])
+    # the temporary directory lives as long as the timed callable
+    seek.directory = directory
+    return seek
+
+
+@benchmark("replay.resimulate", unit="seeks")
+def resimulate():
+    replay = session()
+    ticks = random.Random(1).choices(range(TICKS), k=64)
+    position = 0
+
+    def seek():
+        nonlocal position
+        position = (position + 1) % len(ticks)
+        tick = ticks[position]
+        partial = Replay(replay.width, replay.height, replay.players, replay.seed,
+                         inputs=replay.inputs[:tick * replay.players],
+                         resets=[reset for reset in replay.resets if reset < tick])
+        return simulate(partial)
+    return seek
@@ -0,0 +1,24 @@
+"""Bot search cost: rollouts of the tree-search controller's forward model."""
+from __future__ import annotations
+
+from src.bomberman.game_state import GameState
+from src.bomberman.search import Node, SearchController
+
+from .registry import benchmark
+
+ROLLOUTS = 50
+
+
+@benchmark("search.rollouts", ops=ROLLOUTS, unit="rollouts")
+def search_rollouts():
+    """A fresh tree grown from the opening position, so every call does the same work."""
+    state = GameState(seed=1)
+    controller = SearchController(budget_ms=None, iterations=ROLLOUTS)
+    controller.reset(state, 1, 0)
+    start = state.snapshot()
+
+    def run() -> None:
+        controller.rng.seed(0)
+        controller.root = Node()
+        controller.search(start, 1, 0)
+    return run
@@ -0,0 +1,167 @@
+"""GameState hot paths: whole ticks in scripted scenarios and the explosion internals."""
+from __future__ import annotations
+
+from src.bomberman.arena import Arena
+from src.bomberman.config import FIXED_TIMESTEP, TileType
+from src.bomberman.controllers import WandererController
+from src.bomberman.entities import Bomb, InputBuffer
+from src.bomberman.game_state import GameState
+
+from .registry import benchmark
+
+TICKS = 600
+
+
+def scripted(state: GameState, bomb_chance: float, boost: bool = False):
+    """A callable that replays the same stretch of bot play from a snapshot on every call."""
+    controllers = {player_id: WandererController(bomb_chance) for player_id in state.players}
+    buffer = InputBuffer()
+
+    def power_up() -> None:
+        for player in state.players.values():
+            player.bomb_capacity = 8
+            player.flame_length = 8
+
+    if boost:
+        power_up()
+    start = state.snapshot()
+
+    def run() -> None:
+        state.restore(start)
+        for player_id, controller in controllers.items():
+            controller.reset(state, player_id, player_id)
+        for _ in range(TICKS):
+            if state.round_over:
+                state.reset_round()
+                if boost:
+                    power_up()
+            for player_id, controller in controllers.items():
+                if state.players[player_id].alive:
+                    controller.act(state, player_id, buffer)
+            state.update(FIXED_TIMESTEP, buffer)
+    return run
+
+
+def open_arena(width: int, height: int) -> GameState:
+    state = GameState(width, height, seed=1)
+    for x, y, tile in list(state.arena.iter_tiles()):
+        if tile.tile_type == TileType.DESTRUCTIBLE:
+            state.arena.destroy_tile(x, y)
+    for player in state.players.values():
+        player.alive = False
+    return state
+
+
+@benchmark("update.idle", ops=TICKS, unit="ticks")
+def update_idle():
+    state = GameState()
+    buffer = InputBuffer()
+
+    def run() -> None:
+        for _ in range(TICKS):
+            state.update(FIXED_TIMESTEP, buffer)
+    return run
+
+
+@benchmark("update.bomb_spam", ops=TICKS, unit="ticks")
+def update_bomb_spam():
+    return scripted(GameState(21, 15, 4, seed=1), bomb_chance=1.0)
+
+
+@benchmark("update.full_powerups", ops=TICKS, unit="ticks")
+def update_full_powerups():
+    return scripted(GameState(seed=1), bomb_chance=0.5, boost=True)
+
+
+CHAIN_WIDTH = 61
+
+
+@benchmark("explosion.chain", ops=(CHAIN_WIDTH - 1) // 2, unit="bombs")
+def explosion_chain():
+    """Sets off a row of bombs two tiles apart; each one triggers the next."""
+    state = open_arena(CHAIN_WIDTH, 11)
+    for x in range(1, CHAIN_WIDTH - 1, 2):
+        state.add_bomb(Bomb(1, (x, 5), 2.5, 2))
+    start = state.snapshot()
+
+    def run() -> None:
+        state.restore(start)
+        state.bombs[0].timer = 0
+        state._update_bombs(0)
+    return run
+
+
+@benchmark("update.ticking_bombs", ops=TICKS, unit="ticks")
+def update_ticking_bombs():
+    """Hundreds of long fuses on a big arena: ticks where no timer is due should cost nothing extra."""
+    state = open_arena(61, 61)
+    state.players[1].alive = state.players[2].alive = True
+    for y in range(3, 58, 2):
+        for x in range(3, 58, 4):
+            state.add_bomb(Bomb(1, (x, y), 60.0, 1))
+    buffer = InputBuffer()
+    start = state.snapshot()
+
+    def run() -> None:
+        state.restore(start)
+        for _ in range(TICKS):
+            state.update(FIXED_TIMESTEP, buffer)
+    return run
+
+
+@benchmark("explosion.blast_reach")
+def blast_reach():
+    state = open_arena(21, 21)
+    bomb = Bomb(1, (9, 9), 2.5, 8)
+    return lambda: state._blast_reach(bomb)
+
+
+@benchmark("explosion.explode_bomb")
+def explode_bomb():
+    """One bomb among crates, including the restore that re-arms it."""
+    state = GameState(seed=1)
+    state.players[1].position = (1.0, 3.0)
+    state._try_place_bomb(state.players[1])
+    start = state.snapshot()
+
+    def run() -> None:
+        state.restore(start)
+        state._explode_bomb(state.bombs[0])
+    return run
+
+
+@benchmark("arena.reset", ops=20, unit="tiles")
+def arena_reset():
+    arena = Arena()
+    crates = [(x, y) for x, y, tile in arena.iter_tiles() if tile.tile_type == TileType.DESTRUCTIBLE][:20]
+
+    def run() -> None:
+        for x, y in crates:
+            arena.destroy_tile(x, y)
+        arena.reset()
+    return run
+
+
+@benchmark("arena.round_reset", ops=1, unit="rounds")
+def arena_round_reset():
+    """A round's end on a large arena: every crate broken, then back to the layout."""
+    arena = Arena(61, 61)
+    crates = [(x, y) for x, y, tile in arena.iter_tiles() if tile.tile_type == TileType.DESTRUCTIBLE]
+
+    def run() -> None:
+        for x, y in crates:
+            arena.destroy_tile(x, y)
+        arena.reset()
+    return run
+
+
+@benchmark("arena.create", memory=True)
+def arena_create():
+    """A fresh 61x61 arena; also reports the bytes one arena holds on to."""
+    Arena(61, 61)  # warm the per-layout caches, which every arena of this size shares
+    return lambda: Arena(61, 61)
+
+
+@benchmark("state.spawn_players")
+def spawn_players():
+    return GameState().spawn_players
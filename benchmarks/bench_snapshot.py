@@ -0,0 +1,43 @@
+"""GameState.snapshot/restore compared with copy.deepcopy."""
+from __future__ import annotations
+
+import copy
+
+from src.bomberman.config import FIXED_TIMESTEP
+from src.bomberman.entities import InputBuffer, InputState
+from src.bomberman.game_state import GameState
+
+from .registry import benchmark
+
+
+def mid_match_state() -> GameState:
+    state = GameState(seed=1)
+    buffer = InputBuffer()
+    for _ in range(30):
+        buffer.set_state(1, InputState(move=(1.0, 0.0), place_bomb=True))
+        buffer.set_state(2, InputState(move=(-1.0, 0.0), place_bomb=True))
+        state.update(FIXED_TIMESTEP, buffer)
+    return state
+
+
+@benchmark("snapshot.deepcopy")
+def deepcopy_state():
+    state = mid_match_state()
+    return lambda: copy.deepcopy(state)
+
+
+@benchmark("snapshot.take")
+def take_snapshot():
+    return mid_match_state().snapshot
+
+
+@benchmark("snapshot.restore")
+def restore_snapshot():
+    state = mid_match_state()
+    snap = state.snapshot()
+    return lambda: state.restore(snap)
+
+
+@benchmark("snapshot.to_bytes")
+def snapshot_to_bytes():
+    return mid_match_state().snapshot().to_bytes
@@ -0,0 +1,143 @@
+"""Benchmark registry, runner, JSON history and baseline comparison."""
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+RESULTS_DIR = Path(".benchmarks")
+HISTORY_FILE = RESULTS_DIR / "history.jsonl"
+BASELINE_FILE = RESULTS_DIR / "baseline.json"
+
+
+class SkipBenchmark(Exception):
+    """Raised by a setup function when the benchmark cannot run here (e.g. no pygame)."""
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    ops: int = 1
+    unit: str = "call"
+    memory: bool = False
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, ops: int = 1, unit: str = "call", memory: bool = False):
+    """Registers a setup function that returns the zero-argument callable to time.
+
+    ``ops`` is how many ``unit`` one call performs (e.g. 600 ticks), so
+    results can be reported as a throughput as well as a per-call time.
+    With ``memory`` the bytes still allocated by whatever one call returns
+    are recorded too.
+    """
+    def register(setup: Callable[[], Callable[[], object]]) -> Callable[[], Callable[[], object]]:
+        BENCHMARKS[name] = Benchmark(name, setup, ops, unit, memory)
+        return setup
+    return register
+
+
+def measure(bench: Benchmark, repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    func = bench.setup()
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    times = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    best = min(times)
+    result = {
+        "seconds": best,
+        "median": statistics.median(times),
+        "ops_per_sec": bench.ops / best,
+        "unit": bench.unit,
+        "calls": number,
+    }
+    if bench.memory:
+        result["bytes"] = retained_bytes(func)
+    return result
+
+
+def retained_bytes(func: Callable[[], object]) -> int:
+    """Memory allocated by one call that is still held by its return value."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = func()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def select(patterns: Iterable[str]) -> List[Benchmark]:
+    patterns = list(patterns)
+    return [bench for name, bench in sorted(BENCHMARKS.items())
+            if not patterns or any(pattern in name for pattern in patterns)]
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(patterns: Iterable[str] = (), repeat: int = 5, min_time: float = 0.2,
+        history: Optional[Path] = HISTORY_FILE) -> Dict[str, object]:
+    """Runs the selected benchmarks, prints a table and appends the run to the history file."""
+    results: Dict[str, Dict[str, float]] = {}
+    for bench in select(patterns):
+        try:
+            result = measure(bench, repeat, min_time)
+        except SkipBenchmark as reason:
+            print(f"{bench.name:<32} skipped: {reason}")
+            continue
+        results[bench.name] = result
+        memory = f"{result['bytes']:12,} B" if "bytes" in result else ""
+        print(f"{bench.name:<32}{result['seconds'] * 1e6:12.2f} us"
+              f"{result['ops_per_sec']:14,.0f} {bench.unit}/s{memory}")
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if history is not None:
+        history.parent.mkdir(parents=True, exist_ok=True)
+        with history.open("a") as handle:
+            handle.write(json.dumps(record) + "\n")
+    return record
+
+
+def load_history(history: Path = HISTORY_FILE) -> List[Dict[str, object]]:
+    if not history.exists():
+        return []
+    return [json.loads(line) for line in history.read_text().splitlines() if line.strip()]
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float = 0.10) -> List[Tuple[str, float, float, bool]]:
+    """Per shared benchmark: (name, baseline seconds, current seconds, regressed?)."""
+    rows = []
+    for name in sorted(current.keys() & baseline.keys()):
+        before = baseline[name]["seconds"]
+        after = current[name]["seconds"]
+        rows.append((name, before, after, after > before * (1 + threshold)))
+    return rows
@@ -0,0 +1,40 @@
+"""Bomberman engine.
+
+The simulation core (``config``, ``entities``, ``arena``, ``timers``,
+``occupancy``, ``navigation``, ``snapshot``, ``zobrist``, ``game_state``,
+``controllers``, ``replay``, ``archive``, ``tournament``) never imports
+pygame, so headless workers can use it without SDL. The presentation
+modules (``assets``, ``atlas``, ``input``, ``renderer``, ``capture``) do
+import pygame. The names below are resolved on first access, so
+``import src.bomberman`` loads nothing up front.
+"""
+from __future__ import annotations
+
+import importlib
+
+_EXPORTS = {
+    "Arena": "arena",
+    "Bomb": "entities",
+    "Controller": "controllers",
+    "GameState": "game_state",
+    "InputBuffer": "entities",
+    "InputState": "entities",
+    "MatchResult": "game_state",
+    "Player": "entities",
+    "Snapshot": "snapshot",
+    # presentation; these pull in pygame
+    "AssetManager": "assets",
+    "KeyboardController": "input",
+    "Renderer": "renderer",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> object:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
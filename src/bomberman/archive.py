@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import zlib
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .config import FIXED_TIMESTEP
+from .entities import ACTION_INPUTS, InputBuffer, action_from_input
+from .game_state import GameState
+from .replay import DIGEST_SIZE, SEED_RANGE, Replay, state_digest
+from .snapshot import Snapshot
+
+# A session archive is a header, then records appended as the match runs, then a footer index:
+#   header   magic, version, width, height, players, seed, dt, keyframe interval, metadata length; metadata JSON
+#   record   tag, payload length, payload
+#     K      tick, zlib'd Snapshot bytes: the state update ``tick`` starts from
+#     I      first tick, reset count, reset ticks, then one action byte per player per tick
+#     F      ticks, keyframe count, input block count, digest, then (tick, offset) for each of both
+#   trailer  offset of the F record, end magic
+# A file without a trailer is still being written (or was cut short); readers scan its records instead.
+MAGIC = b"BMRA"
+END_MAGIC = b"BMRE"
+VERSION = 1
+ARCHIVE_SUFFIX = ".bma"
+HEADER = struct.Struct("<4sBHHBqdII")
+RECORD = struct.Struct("<cI")
+KEYFRAME = struct.Struct("<I")
+INPUTS = struct.Struct("<IH")
+FOOTER = struct.Struct(f"<III{DIGEST_SIZE}s")
+INDEX_ENTRY = struct.Struct("<IQ")
+TRAILER = struct.Struct("<Q4s")
+# ten seconds of fixed-step play: a seek decodes one keyframe and simulates at most this many ticks
+KEYFRAME_INTERVAL = 600
+
+
+class ArchiveWriter:
+    """Appends a live match to a session archive; a drop-in for ``ReplayRecorder``.
+
+    Inputs are buffered in memory and written, with a keyframe, every
+    ``keyframe_interval`` ticks, so the file on disk is always readable up to
+    the last whole block. ``flush`` writes what is buffered now, for readers
+    following a live match. ``finish`` appends the footer index.
+    """
+
+    def __init__(self, path: Union[str, Path], state: GameState, keyframe_interval: int = KEYFRAME_INTERVAL,
+                 dt: float = FIXED_TIMESTEP, metadata: Optional[Dict[str, Any]] = None) -> None:
+        if state.seed is None:
+            raise ValueError("recording needs a GameState created with an explicit seed")
+        if state.seed not in SEED_RANGE:
+            raise ValueError("recording needs a seed that fits in a signed 64-bit integer")
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        arena = state.arena
+        self.path = Path(path)
+        self.state = state
+        self.players = len(state.players)
+        self.keyframe_interval = keyframe_interval
+        self.ticks = 0
+        self.keyframes: List[Tuple[int, int]] = []
+        self.blocks: List[Tuple[int, int]] = []
+        self._inputs = bytearray()
+        self._resets: List[int] = []
+        self._block_start = 0
+        meta = json.dumps(metadata or {}, sort_keys=True).encode()
+        self._file = open(self.path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, arena.width, arena.height, self.players, state.seed, dt,
+                                     keyframe_interval, len(meta)) + meta)
+        self._offset = HEADER.size + len(meta)
+
+    def record_reset(self) -> None:
+        """Call right after ``GameState.reset_round`` so playback resets at the same tick."""
+        self._resets.append(self.ticks)
+
+    def record_tick(self, buffer: InputBuffer) -> None:
+        """Quantises ``buffer`` in place and logs it; call just before ``GameState.update``."""
+        if self.ticks % self.keyframe_interval == 0:
+            self.flush()
+            data = zlib.compress(self.state.snapshot().to_bytes(), 1)
+            self.keyframes.append((self.ticks, self._offset))
+            self._append(b"K", KEYFRAME.pack(self.ticks), data)
+        inputs = self._inputs
+        for player_id in range(1, self.players + 1):
+            action = action_from_input(buffer.get_state(player_id))
+            buffer.set_state(player_id, ACTION_INPUTS[action])
+            inputs.append(action)
+        self.ticks += 1
+
+    def flush(self) -> None:
+        """Writes the buffered inputs as a block and pushes everything to the OS."""
+        if self._inputs or self._resets:
+            self.blocks.append((self._block_start, self._offset))
+            resets = self._resets
+            self._append(b"I", INPUTS.pack(self._block_start, len(resets)), struct.pack(f"<{len(resets)}I", *resets),
+                         self._inputs)
+            self._inputs = bytearray()
+            self._resets = []
+        self._block_start = self.ticks
+        self._file.flush()
+
+    def _append(self, tag: bytes, *parts: bytes) -> None:
+        size = sum(len(part) for part in parts)
+        self._file.write(RECORD.pack(tag, size))
+        for part in parts:
+            self._file.write(part)
+        self._offset += RECORD.size + size
+
+    def finish(self) -> None:
+        """Writes the footer index and the final state's digest, and closes the file."""
+        self.flush()
+        footer = [FOOTER.pack(self.ticks, len(self.keyframes), len(self.blocks), state_digest(self.state))]
+        footer.extend(INDEX_ENTRY.pack(*entry) for entry in self.keyframes)
+        footer.extend(INDEX_ENTRY.pack(*entry) for entry in self.blocks)
+        at = self._offset
+        self._append(b"F", *footer)
+        self._file.write(TRAILER.pack(at, END_MAGIC))
+        self._file.close()
+
+
+@dataclass
+class ArchiveInfo:
+    """What ``read_info`` learns from an archive's header and trailer alone."""
+
+    path: Path
+    width: int
+    height: int
+    players: int
+    seed: int
+    dt: float
+    keyframe_interval: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    # None while the match is still being written (no footer yet)
+    ticks: Optional[int] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.ticks is not None
+
+
+def _read_header(handle: IO[bytes], path: Path) -> Tuple[ArchiveInfo, int]:
+    """Parses the header and metadata; returns them with the offset of the first record."""
+    head = handle.read(HEADER.size)
+    if len(head) < HEADER.size:
+        raise ValueError(f"{path} is not a bomberman session archive")
+    magic, version, width, height, players, seed, dt, interval, meta_size = HEADER.unpack(head)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a bomberman session archive (or an unsupported version)")
+    metadata = json.loads(handle.read(meta_size))
+    return ArchiveInfo(path, width, height, players, seed, dt, interval, metadata), HEADER.size + meta_size
+
+
+def read_info(path: Union[str, Path]) -> ArchiveInfo:
+    """Reads an archive's setup, metadata and length without touching its body."""
+    path = Path(path)
+    with open(path, "rb") as handle:
+        info, body = _read_header(handle, path)
+        size = handle.seek(0, 2)
+        if size >= body + RECORD.size + FOOTER.size + TRAILER.size:
+            handle.seek(size - TRAILER.size)
+            at, magic = TRAILER.unpack(handle.read(TRAILER.size))
+            if magic == END_MAGIC:
+                handle.seek(at + RECORD.size)
+                info.ticks = FOOTER.unpack(handle.read(FOOTER.size))[0]
+    return info
+
+
+def find_archives(directory: Union[str, Path], where: Optional[Callable[[ArchiveInfo], bool]] = None,
+                  **metadata: Any) -> Iterator[ArchiveInfo]:
+    """Archives under ``directory`` whose metadata has every given ``key=value`` and that pass ``where``.
+
+    Only each file's header and trailer are read, so this stays quick over
+    thousands of long sessions.
+    """
+    for path in sorted(Path(directory).rglob(f"*{ARCHIVE_SUFFIX}")):
+        try:
+            info = read_info(path)
+        except (OSError, ValueError):
+            continue
+        if all(info.metadata.get(key) == value for key, value in metadata.items()) and (
+                where is None or where(info)):
+            yield info
+
+
+class ReplayArchive:
+    """A session archive mapped into memory, seekable to any tick.
+
+    ``state_at`` restores the last keyframe at or before the tick and
+    simulates the rest, reading actions straight out of the mapping. An
+    archive that is still being written can be opened too; ``refresh``
+    picks up what was appended since.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._map: Optional[mmap.mmap] = None
+        self.info, self._body = _read_header(self._file, self.path)
+        self.digest = b""
+        self.refresh()
+
+    def __enter__(self) -> "ReplayArchive":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    @property
+    def players(self) -> int:
+        return self.info.players
+
+    @property
+    def finished(self) -> bool:
+        return self.info.finished
+
+    def refresh(self) -> None:
+        """Maps the file again and indexes it, from the footer if it has one."""
+        if self._map is not None:
+            self._map.close()
+        self._map = data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._keyframe_ticks: List[int] = []
+        self._keyframe_offsets: List[int] = []
+        self._block_ticks: List[int] = []
+        self._block_offsets: List[int] = []
+        self.ticks = 0
+        if len(data) >= self._body + TRAILER.size:
+            at, magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+            if magic == END_MAGIC:
+                self._read_footer(at)
+                return
+        self._scan()
+
+    def _read_footer(self, at: int) -> None:
+        data = self._map
+        offset = at + RECORD.size
+        self.ticks, keyframes, blocks, self.digest = FOOTER.unpack_from(data, offset)
+        offset += FOOTER.size
+        for ticks, offsets, count in ((self._keyframe_ticks, self._keyframe_offsets, keyframes),
+                                      (self._block_ticks, self._block_offsets, blocks)):
+            for _ in range(count):
+                tick, position = INDEX_ENTRY.unpack_from(data, offset)
+                ticks.append(tick)
+                offsets.append(position)
+                offset += INDEX_ENTRY.size
+        self.info.ticks = self.ticks
+
+    def _scan(self) -> None:
+        """Indexes an unfinished file record by record, stopping at a partly written one."""
+        data = self._map
+        offset = self._body
+        while offset + RECORD.size <= len(data):
+            tag, size = RECORD.unpack_from(data, offset)
+            if offset + RECORD.size + size > len(data):
+                break
+            payload = offset + RECORD.size
+            if tag == b"K":
+                self._keyframe_ticks.append(KEYFRAME.unpack_from(data, payload)[0])
+                self._keyframe_offsets.append(offset)
+            elif tag == b"I":
+                start, resets = INPUTS.unpack_from(data, payload)
+                self._block_ticks.append(start)
+                self._block_offsets.append(offset)
+                self.ticks = start + (size - INPUTS.size - 4 * resets) // self.players
+            offset = payload + size
+
+    def _block(self, index: int) -> Tuple[int, List[int], int, int]:
+        """First tick, reset ticks and the action bytes' span in the mapping of one input block."""
+        data = self._map
+        offset = self._block_offsets[index]
+        size = RECORD.unpack_from(data, offset)[1]
+        start, count = INPUTS.unpack_from(data, offset + RECORD.size)
+        resets = offset + RECORD.size + INPUTS.size
+        actions = resets + 4 * count
+        return start, list(struct.unpack_from(f"<{count}I", data, resets)), actions, offset + RECORD.size + size
+
+    def keyframe(self, tick: int) -> Tuple[int, Snapshot]:
+        """The last keyframe at or before ``tick``, as (its tick, its snapshot)."""
+        index = bisect_right(self._keyframe_ticks, tick) - 1
+        if index < 0:
+            raise ValueError("the archive has no keyframe yet")
+        offset = self._keyframe_offsets[index]
+        size = RECORD.unpack_from(self._map, offset)[1]
+        start = offset + RECORD.size + KEYFRAME.size
+        data = zlib.decompress(self._map[start:offset + RECORD.size + size])
+        return self._keyframe_ticks[index], Snapshot.from_bytes(data)
+
+    def state_at(self, tick: int, state: Optional[GameState] = None) -> GameState:
+        """The state update ``tick`` starts from: after ``tick`` updates and any reset recorded at ``tick``.
+
+        Pass ``state`` (built for this arena) to reuse it instead of building a new one.
+        """
+        if not 0 <= tick <= self.ticks:
+            raise IndexError(f"tick {tick} is outside the archive's 0..{self.ticks}")
+        start, snap = self.keyframe(tick)
+        info = self.info
+        if state is None:
+            state = GameState(info.width, info.height, info.players, seed=info.seed)
+        state.restore(snap)
+        players = info.players
+        resets = set()
+        spans = []
+        for index in range(max(0, bisect_right(self._block_ticks, start) - 1),
+                           bisect_right(self._block_ticks, tick)):
+            first, block_resets, actions, end = self._block(index)
+            # the keyframe already reflects a reset recorded at its own tick
+            resets.update(reset for reset in block_resets if start < reset <= tick)
+            spans.append((first, actions, (end - actions) // players))
+        buffer = InputBuffer()
+        data = self._map
+        for first, actions, count in spans:
+            for current in range(max(first, start), min(first + count, tick)):
+                if current in resets:
+                    state.reset_round()
+                base = actions + (current - first) * players
+                for player_id in range(1, players + 1):
+                    buffer.set_state(player_id, ACTION_INPUTS[data[base + player_id - 1]])
+                state.update(info.dt, buffer)
+        if tick in resets:
+            state.reset_round()
+        return state
+
+    def to_replay(self) -> Replay:
+        """The whole archive as a plain ``Replay`` (digest included once finished)."""
+        info = self.info
+        replay = Replay(info.width, info.height, info.players, info.seed, info.dt, digest=self.digest)
+        for block in range(len(self._block_ticks)):
+            _, resets, actions, end = self._block(block)
+            replay.resets.extend(resets)
+            replay.inputs += self._map[actions:end]
+        return replay
+
+
+def write_archive(replay: Replay, path: Union[str, Path], keyframe_interval: int = KEYFRAME_INTERVAL,
+                  metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Converts a ``Replay`` by playing it once and keyframing it on the way."""
+    state = replay.new_state()
+    writer = ArchiveWriter(path, state, keyframe_interval, replay.dt, metadata)
+    buffer = InputBuffer()
+    players = replay.players
+    resets = set(replay.resets)
+    for tick in range(replay.ticks):
+        if tick in resets:
+            state.reset_round()
+            writer.record_reset()
+        base = tick * players
+        for player_id in range(1, players + 1):
+            buffer.set_state(player_id, ACTION_INPUTS[replay.inputs[base + player_id - 1]])
+        writer.record_tick(buffer)
+        state.update(replay.dt, buffer)
+    writer.finish()
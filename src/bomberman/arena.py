@@ -1,87 +1,374 @@
 from __future__ import annotations
+from array import array
 from dataclasses import dataclass
-from typing import Iterator, List, Optional, Tuple
+from functools import lru_cache
+from typing import Iterator, List, Optional, Sequence, Tuple
 
-from .config import ARENA_HEIGHT, ARENA_WIDTH, PowerUpType, TileType
+from .config import (
+    ARENA_HEIGHT,
+    ARENA_WIDTH,
+    DEFAULT_PLAYER_COUNT,
+    MAX_ARENA_SIZE,
+    MAX_PLAYERS,
+    MIN_ARENA_SIZE,
+    PowerUpType,
+    TileType,
+)
+from .zobrist import CELL, zobrist_key
 
+# compact per-tile codes used by binary encodings (replays, batched buffers)
+TILE_CODES = {TileType.FLOOR: 0, TileType.SOLID: 1, TileType.DESTRUCTIBLE: 2}
+POWERUP_CODES = {None: 0, PowerUpType.BOMB: 1, PowerUpType.FLAME: 2}
+_POWERUP_TYPES = {code: powerup for powerup, code in POWERUP_CODES.items()}
+_FLOOR = TILE_CODES[TileType.FLOOR]
+_SOLID = TILE_CODES[TileType.SOLID]
+_CRATE = TILE_CODES[TileType.DESTRUCTIBLE]
+# blast rays, in the order explosions list their tiles: +x, -x, +y, -y
+BLAST_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+Reach = Tuple[int, int, int, int]
+# per-layout tables kept for this many (width, height, players) layouts; layouts come from clients too
+LAYOUT_CACHE_SIZE = 32
 
-@dataclass
+
+@dataclass(frozen=True)
 class Tile:
+    """Read-only view of one cell. ``Arena.get_tile`` hands out shared instances, one per cell code."""
+
     tile_type: TileType
     powerup: Optional[PowerUpType] = None
 
 
+# every cell code (tile type | power-up << 4) mapped to its view
+_TILE_VIEWS: List[Optional[Tile]] = [None] * 48
+for _tile_type, _code in TILE_CODES.items():
+    for _powerup, _powerup_code in POWERUP_CODES.items():
+        _TILE_VIEWS[_code | _powerup_code << 4] = Tile(_tile_type, _powerup)
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def spawn_points(width: int, height: int, count: int) -> Tuple[Tuple[int, int], ...]:
+    """Spreads ``count`` spawn tiles over the arena by farthest-point sampling.
+
+    Candidates are the odd/odd tiles, which are never pillars. The first spawn
+    is the top-left corner, so two players get the classic opposite corners.
+    """
+    xs = list(range(1, width - 1, 2))
+    ys = list(range(1, height - 1, 2))
+    # thin the lattice on huge arenas; the far edges always stay candidates
+    stride = max(1, int((len(xs) * len(ys) / 1024) ** 0.5))
+    xs = sorted(set(xs[::stride]) | {xs[-1]})
+    ys = sorted(set(ys[::stride]) | {ys[-1]})
+    candidates = [(x, y) for y in ys for x in xs]
+    if count > len(candidates):
+        raise ValueError(f"a {width}x{height} arena has room for at most {len(candidates)} players")
+
+    # ties go to the tile farthest from the centre, so corners fill before edges
+    cx, cy = (width - 1) / 2, (height - 1) / 2
+    spread = [(x - cx) ** 2 + (y - cy) ** 2 for x, y in candidates]
+    chosen = [candidates[0]]
+    distance = [(x - 1) ** 2 + (y - 1) ** 2 for x, y in candidates]
+    while len(chosen) < count:
+        best = max(range(len(candidates)), key=lambda i: (distance[i], spread[i]))
+        bx, by = candidates[best]
+        chosen.append((bx, by))
+        distance = [min(d, (x - bx) ** 2 + (y - by) ** 2) for d, (x, y) in zip(distance, candidates)]
+    return tuple(chosen)
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _layout_template(width: int, height: int, player_count: int) -> bytes:
+    """The starting layout as flat row-major tile codes."""
+    cells = bytearray([_CRATE]) * (width * height)
+    for y in range(height):
+        for x in range(width):
+            if x == 0 or y == 0 or x == width - 1 or y == height - 1:
+                cells[y * width + x] = _SOLID
+            elif x % 2 == 0 and y % 2 == 0:
+                cells[y * width + x] = _SOLID
+
+    # carve an L-shaped pocket around each spawn, opening toward the arena centre
+    for sx, sy in spawn_points(width, height, player_count):
+        nx = sx + 1 if sx < width / 2 else sx - 1
+        ny = sy + 1 if sy < height / 2 else sy - 1
+        for px, py in ((sx, sy), (nx, sy), (sx, ny)):
+            cells[py * width + px] = _FLOOR
+    return bytes(cells)
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _layout_powerups(size: int) -> bytes:
+    return bytes(size)
+
+
+def _ray(ahead: int, beyond: int) -> int:
+    """Tiles a flame can cover from a tile towards the ``ahead`` code, given the ray already computed there."""
+    if ahead == _SOLID:
+        return 0
+    if ahead == _CRATE:
+        return 1
+    return 1 + beyond
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _layout_rays(width: int, height: int, player_count: int) -> Tuple[bytes, ...]:
+    cells = _layout_template(width, height, player_count)
+    tables = []
+    for dx, dy in BLAST_DIRECTIONS:
+        rays = array("B", bytes(width * height))
+        # sweep against the ray so the tile ahead is always done first
+        xs = range(width - 1, -1, -1) if dx > 0 else range(width)
+        ys = range(height - 1, -1, -1) if dy > 0 else range(height)
+        for y in ys:
+            for x in xs:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    rays[y * width + x] = _ray(cells[ny * width + nx], rays[ny * width + nx])
+        tables.append(rays.tobytes())
+    return tuple(tables)
+
+
+def blast_covers(cx: int, cy: int, reach: Reach, tx: int, ty: int) -> bool:
+    """Whether a blast centred on (cx, cy) with ``reach`` hits (tx, ty); O(1)."""
+    if ty == cy:
+        return cx - reach[1] <= tx <= cx + reach[0]
+    return tx == cx and cy - reach[3] <= ty <= cy + reach[2]
+
+
+def blast_tiles(cx: int, cy: int, reach: Reach) -> List[Tuple[int, int]]:
+    """Expands a blast into tiles: the centre, then each ray outwards in ``BLAST_DIRECTIONS`` order."""
+    tiles = [(cx, cy)]
+    for (dx, dy), length in zip(BLAST_DIRECTIONS, reach):
+        tiles.extend((cx + dx * step, cy + dy * step) for step in range(1, length + 1))
+    return tiles
+
+
 class Arena:
-    """Represents the tile-based arena using the classic Bomberman layout."""
-
-    def __init__(self) -> None:
-        self.grid: List[List[Tile]] = self._generate_default_layout()
-
-    def _generate_default_layout(self) -> List[List[Tile]]:
-        grid: List[List[Tile]] = []
-        for y in range(ARENA_HEIGHT):
-            row: List[Tile] = []
-            for x in range(ARENA_WIDTH):
-                if x == 0 or y == 0 or x == ARENA_WIDTH - 1 or y == ARENA_HEIGHT - 1:
-                    row.append(Tile(TileType.SOLID))
-                elif x % 2 == 0 and y % 2 == 0:
-                    row.append(Tile(TileType.SOLID))
-                else:
-                    row.append(Tile(TileType.DESTRUCTIBLE))
-            grid.append(row)
-
-        # carve out starting positions for two players (top-left and bottom-right corners)
-        for (sx, sy) in [(1, 1), (1, 2), (2, 1), (ARENA_WIDTH - 2, ARENA_HEIGHT - 2),
-                         (ARENA_WIDTH - 2, ARENA_HEIGHT - 3), (ARENA_WIDTH - 3, ARENA_HEIGHT - 2)]:
-            grid[sy][sx] = Tile(TileType.FLOOR)
-
-        return grid
+    """Represents the tile-based arena using the classic Bomberman layout.
+
+    Cells live in two flat row-major byte layers: ``cells`` holds the tile
+    code (``TILE_CODES``) and ``powerup_layer`` the power-up code
+    (``POWERUP_CODES``). ``get_tile`` and ``iter_tiles`` return shared
+    read-only ``Tile`` views. Change tiles through ``set_tile``,
+    ``destroy_tile`` and the power-up methods, which keep the change log and
+    blast rays in step, along with ``zobrist``: the XOR of a key per cell that
+    differs from the layout, 0 for a fresh arena.
+    """
+
+    def __init__(self, width: int = ARENA_WIDTH, height: int = ARENA_HEIGHT,
+                 player_count: int = DEFAULT_PLAYER_COUNT) -> None:
+        if not (MIN_ARENA_SIZE <= width <= MAX_ARENA_SIZE and MIN_ARENA_SIZE <= height <= MAX_ARENA_SIZE):
+            raise ValueError(f"arena sides must be between {MIN_ARENA_SIZE} and {MAX_ARENA_SIZE} tiles")
+        if not 1 <= player_count <= MAX_PLAYERS:
+            raise ValueError(f"player count must be between 1 and {MAX_PLAYERS}")
+        self.width = width
+        self.height = height
+        self.player_count = player_count
+        self.spawns = spawn_points(width, height, player_count)
+        self._template = _layout_template(width, height, player_count)
+        self.cells = bytearray(self._template)
+        self.powerup_layer = bytearray(_layout_powerups(width * height))
+        # per direction, how far a flame could travel from each tile: up to and including the first
+        # crate, short of the first pillar; patched locally whenever a tile changes type
+        self.rays: List[array] = [array("B", table) for table in _layout_rays(width, height, player_count)]
+        # tiles touched since the last reset, in order; consumers keep their own cursor
+        self.changes: List[Tuple[int, int]] = []
+        self.generation = 0
+        self.zobrist = 0
+        self._cells_cache: Tuple[Tuple[int, int], Tuple[int, ...]] = ((-1, -1), ())
+
+    @property
+    def grid(self) -> List[List[Tile]]:
+        """Rows of tile views, built on each access; prefer ``get_tile`` or ``cells``."""
+        width = self.width
+        return [[self.get_tile(x, y) for x in range(width)] for y in range(self.height)]
 
     def reset(self) -> None:
-        self.grid = self._generate_default_layout()
+        # only tiles in the change log can differ from the template
+        template = self._template
+        cells = self.cells
+        width = self.width
+        layer = self.powerup_layer
+        # patching costs a short walk per tile; copying the layout is one memcpy per layer
+        if len(self.changes) * 64 >= len(cells):
+            cells[:] = template
+            layer[:] = _layout_powerups(len(cells))
+            for rays, table in zip(self.rays, _layout_rays(width, self.height, self.player_count)):
+                memoryview(rays)[:] = table
+        else:
+            for tx, ty in self.changes:
+                i = ty * width + tx
+                layer[i] = 0
+                if cells[i] != template[i]:
+                    cells[i] = template[i]
+                    self._update_rays(tx, ty)
+        self.changes.clear()
+        self.generation += 1
+        self.zobrist = 0
+
+    @property
+    def version(self) -> Tuple[int, int]:
+        """Changes whenever any tile does: the change log only grows between resets."""
+        return self.generation, len(self.changes)
+
+    def changed_cells(self) -> Tuple[int, ...]:
+        """Flat ``(index, code)`` pairs for every tile that differs from the template.
+
+        The change log only grows between resets, so the result is cached on
+        its length and recomputed only after the arena actually changed.
+        """
+        key = self.version
+        if self._cells_cache[0] == key:
+            return self._cells_cache[1]
+        cells: List[int] = []
+        for tx, ty in sorted(set(self.changes), key=lambda tile: (tile[1], tile[0])):
+            cells.append(ty * self.width + tx)
+            cells.append(self.cell_code(tx, ty))
+        result = tuple(cells)
+        self._cells_cache = (key, result)
+        return result
+
+    def restore_cells(self, cells: Tuple[int, ...]) -> None:
+        """Rewinds to the template and applies ``changed_cells`` output; O(changes)."""
+        self.reset()
+        self.apply_cells(cells)
+        self._cells_cache = (self.version, cells)
+
+    def sync_cells(self, cells: Tuple[int, ...]) -> None:
+        """Brings the arena to ``changed_cells`` output by rewriting only the tiles that differ from now.
+
+        Within a round tiles only ever leave the template, so a tile missing
+        from ``cells`` means a new round; that falls back to ``restore_cells``.
+        """
+        current = self.changed_cells()
+        if cells is current:
+            return
+        old = dict(zip(current[::2], current[1::2]))
+        patch: List[int] = []
+        for i in range(0, len(cells), 2):
+            index = cells[i]
+            code = cells[i + 1]
+            if old.pop(index, None) != code:
+                patch.append(index)
+                patch.append(code)
+        if old:
+            self.restore_cells(cells)
+            return
+        self.apply_cells(patch)
+        self._cells_cache = (self.version, cells)
+
+    def apply_cells(self, cells: Sequence[int]) -> None:
+        """Overwrites tiles from flat ``(index, code)`` pairs, logging each in ``changes``."""
+        width = self.width
+        for i in range(0, len(cells), 2):
+            index = cells[i]
+            code = cells[i + 1]
+            self._set_code(index % width, index // width, code & 15, code >> 4)
+
+    def cell_code(self, tx: int, ty: int) -> int:
+        """The tile and its power-up packed into one byte, as used by the binary encodings."""
+        i = ty * self.width + tx
+        return self.cells[i] | self.powerup_layer[i] << 4
 
     def in_bounds(self, tx: int, ty: int) -> bool:
-        return 0 <= tx < ARENA_WIDTH and 0 <= ty < ARENA_HEIGHT
+        return 0 <= tx < self.width and 0 <= ty < self.height
 
     def get_tile(self, tx: int, ty: int) -> Tile:
-        return self.grid[ty][tx]
+        i = ty * self.width + tx
+        return _TILE_VIEWS[self.cells[i] | self.powerup_layer[i] << 4]
 
     def set_tile(self, tx: int, ty: int, tile: Tile) -> None:
-        self.grid[ty][tx] = tile
+        self._set_code(tx, ty, TILE_CODES[tile.tile_type], POWERUP_CODES[tile.powerup])
+
+    def _set_code(self, tx: int, ty: int, code: int, powerup: int) -> None:
+        i = ty * self.width + tx
+        before = self.cells[i] | self.powerup_layer[i] << 4
+        retyped = self.cells[i] != code
+        self.cells[i] = code
+        self.powerup_layer[i] = powerup
+        self.changes.append((tx, ty))
+        self._rehash(i, before)
+        if retyped:
+            self._update_rays(tx, ty)
+
+    def _rehash(self, i: int, before: int) -> None:
+        """Swaps cell ``i``'s key for ``before`` out of ``zobrist`` and the one for its current code in."""
+        after = self.cells[i] | self.powerup_layer[i] << 4
+        if after != before:
+            self.zobrist ^= zobrist_key(CELL, i, before) ^ zobrist_key(CELL, i, after)
+
+    def _update_rays(self, tx: int, ty: int) -> None:
+        """Re-derives the rays that run into (tx, ty) after its type changed; stops at the first non-floor."""
+        width = self.width
+        cells = self.cells
+        here = ty * width + tx
+        code = cells[here]
+        # what a flame arriving here does: stops short, stops on it, or carries on
+        stop = 0 if code == _SOLID else 1 if code == _CRATE else None
+        right, left, down, up = self.rays
+        # walk back against each ray: (table, flat step, tiles available)
+        for rays, step, count in ((right, -1, tx), (left, 1, width - 1 - tx),
+                                  (down, -width, ty), (up, width, self.height - 1 - ty)):
+            # behind (tx, ty) the ray grows by one per floor tile; once a value is already right,
+            # everything further back is too
+            value = 1 + rays[here] if stop is None else stop
+            i = here
+            for _ in range(count):
+                i += step
+                if rays[i] == value:
+                    break
+                rays[i] = value
+                if cells[i] != _FLOOR:
+                    break
+                value += 1
+
+    def blast_reach(self, tx: int, ty: int, flame_length: int) -> Reach:
+        """How far a blast from (tx, ty) travels along each of ``BLAST_DIRECTIONS``, without walking it."""
+        i = ty * self.width + tx
+        right, left, down, up = self.rays
+        return (min(right[i], flame_length), min(left[i], flame_length),
+                min(down[i], flame_length), min(up[i], flame_length))
 
     def is_walkable(self, tx: int, ty: int) -> bool:
-        if not self.in_bounds(tx, ty):
-            return False
-        tile = self.get_tile(tx, ty)
-        return tile.tile_type == TileType.FLOOR
+        return self.in_bounds(tx, ty) and self.cells[ty * self.width + tx] == _FLOOR
 
     def is_passable(self, tx: int, ty: int) -> bool:
-        if not self.in_bounds(tx, ty):
-            return False
-        tile = self.get_tile(tx, ty)
-        return tile.tile_type == TileType.FLOOR
+        return self.in_bounds(tx, ty) and self.cells[ty * self.width + tx] == _FLOOR
 
     def destroy_tile(self, tx: int, ty: int) -> Optional[TileType]:
-        tile = self.get_tile(tx, ty)
-        if tile.tile_type == TileType.DESTRUCTIBLE:
-            self.set_tile(tx, ty, Tile(TileType.FLOOR, tile.powerup))
+        i = ty * self.width + tx
+        if self.cells[i] == _CRATE:
+            self._set_code(tx, ty, _FLOOR, self.powerup_layer[i])
             return TileType.DESTRUCTIBLE
         return None
 
     def collect_powerup(self, tx: int, ty: int) -> Optional[PowerUpType]:
-        tile = self.get_tile(tx, ty)
-        if tile.powerup:
-            power = tile.powerup
-            tile.powerup = None
-            return power
+        i = ty * self.width + tx
+        code = self.powerup_layer[i]
+        if code:
+            self.powerup_layer[i] = 0
+            self.changes.append((tx, ty))
+            self._rehash(i, self.cells[i] | code << 4)
+            return _POWERUP_TYPES[code]
         return None
 
     def place_powerup(self, tx: int, ty: int, powerup: PowerUpType) -> None:
-        tile = self.get_tile(tx, ty)
-        if tile.tile_type == TileType.FLOOR:
-            tile.powerup = powerup
+        i = ty * self.width + tx
+        if self.cells[i] == _FLOOR:
+            before = self.cells[i] | self.powerup_layer[i] << 4
+            self.powerup_layer[i] = POWERUP_CODES[powerup]
+            self.changes.append((tx, ty))
+            self._rehash(i, before)
+
+    def powerup_tiles(self) -> List[Tuple[Tuple[int, int], PowerUpType]]:
+        """Every power-up lying in the arena, in row-major order; O(changes), since only changed tiles hold one."""
+        width = self.width
+        layer = self.powerup_layer
+        tiles = sorted({ty * width + tx for tx, ty in self.changes})
+        return [((i % width, i // width), _POWERUP_TYPES[layer[i]]) for i in tiles if layer[i]]
 
     def iter_tiles(self) -> Iterator[Tuple[int, int, Tile]]:
-        for y in range(ARENA_HEIGHT):
-            for x in range(ARENA_WIDTH):
-                yield x, y, self.grid[y][x]
+        cells = self.cells
+        layer = self.powerup_layer
+        width = self.width
+        for i in range(len(cells)):
+            yield i % width, i // width, _TILE_VIEWS[cells[i] | layer[i] << 4]
@@ -1,66 +1,76 @@
 from __future__ import annotations
 
+import re
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 import pygame
 
-from .config import SCALE_FACTOR, TILE_SIZE, PowerUpType, TileType
+from .atlas import SpriteAtlas
+from .config import SCALE_FACTOR, PowerUpType, TileType
 
 ASSET_ROOT = Path(__file__).resolve().parents[2] / "assets"
 
-ASSET_PATHS = {
+# atlas keys are source paths under ASSET_ROOT without their suffix
+ASSET_KEYS = {
     "tiles": {
-        TileType.FLOOR: ASSET_ROOT / "tiles/floor.ppm",
-        TileType.SOLID: ASSET_ROOT / "tiles/solid.ppm",
-        TileType.DESTRUCTIBLE: ASSET_ROOT / "tiles/destructible.ppm",
+        TileType.FLOOR: "tiles/floor",
+        TileType.SOLID: "tiles/solid",
+        TileType.DESTRUCTIBLE: "tiles/destructible",
     },
-    "players": {
-        1: ASSET_ROOT / "sprites/player1.ppm",
-        2: ASSET_ROOT / "sprites/player2.ppm",
-    },
-    "bomb": ASSET_ROOT / "sprites/bomb.ppm",
+    "bomb": "sprites/bomb",
     "powerups": {
-        PowerUpType.BOMB: ASSET_ROOT / "powerups/bomb.ppm",
-        PowerUpType.FLAME: ASSET_ROOT / "powerups/flame.ppm",
+        PowerUpType.BOMB: "powerups/bomb",
+        PowerUpType.FLAME: "powerups/flame",
     },
 }
+# any sprites/playerN image is picked up as player N's skin
+PLAYER_KEY = re.compile(r"sprites/player(\d+)$")
+
+PLAYER_TINTS = [
+    (255, 255, 255), (255, 255, 255), (255, 140, 140), (140, 255, 140),
+    (140, 170, 255), (255, 230, 120), (230, 140, 255), (120, 240, 240),
+]
 
 
 class AssetManager:
-    def __init__(self) -> None:
-        self._tile_images: Dict[TileType, pygame.Surface] = {}
+    def __init__(self, root: Path = ASSET_ROOT, cache_dir: Optional[Path] = None) -> None:
+        self.root = root
+        self.cache_dir = cache_dir
+        self.atlas: Optional[SpriteAtlas] = None
+        self._player_keys: Dict[int, str] = {}
         self._player_images: Dict[int, pygame.Surface] = {}
-        self._powerup_images: Dict[PowerUpType, pygame.Surface] = {}
-        self._bomb_image: pygame.Surface | None = None
 
     def load(self) -> None:
-        for tile_type, path in ASSET_PATHS["tiles"].items():
-            self._tile_images[tile_type] = self._load_scaled(str(path))
-        for player_id, path in ASSET_PATHS["players"].items():
-            self._player_images[player_id] = self._load_scaled(str(path))
-        self._bomb_image = self._load_scaled(str(ASSET_PATHS["bomb"]))
-        for power_type, path in ASSET_PATHS["powerups"].items():
-            self._powerup_images[power_type] = self._load_scaled(str(path))
-
-    def _load_scaled(self, path: str) -> pygame.Surface:
-        surface = pygame.image.load(path)
-        if surface.get_alpha() is not None:
-            surface = surface.convert_alpha()
-        else:
-            surface = surface.convert()
-        size = TILE_SIZE * SCALE_FACTOR
-        return pygame.transform.scale(surface, (size, size))
+        """Opens the cached sprite atlas, rebuilding it if any source changed; images are sliced lazily."""
+        self.atlas = SpriteAtlas.open(self.root, self.cache_dir, SCALE_FACTOR)
+        self._player_keys = {}
+        for key in self.atlas.keys():
+            match = PLAYER_KEY.match(key)
+            if match:
+                self._player_keys[int(match.group(1))] = key
+        self._player_images.clear()
 
     def tile_image(self, tile_type: TileType) -> pygame.Surface:
-        return self._tile_images[tile_type]
+        return self.atlas.image(ASSET_KEYS["tiles"][tile_type])
 
     def player_image(self, player_id: int) -> pygame.Surface:
-        return self._player_images[player_id]
+        image = self._player_images.get(player_id)
+        if image is None:
+            key = self._player_keys.get(player_id)
+            if key is not None:
+                image = self.atlas.image(key)
+            else:
+                # party modes reuse the shipped sprites with a per-player tint
+                base_ids = sorted(self._player_keys)
+                base = self.atlas.image(self._player_keys[base_ids[(player_id - 1) % len(base_ids)]])
+                image = base.copy()
+                image.fill(PLAYER_TINTS[(player_id - 1) % len(PLAYER_TINTS)], special_flags=pygame.BLEND_RGB_MULT)
+            self._player_images[player_id] = image
+        return image
 
     def bomb_image(self) -> pygame.Surface:
-        assert self._bomb_image is not None
-        return self._bomb_image
+        return self.atlas.image(ASSET_KEYS["bomb"])
 
     def powerup_image(self, powerup_type: PowerUpType) -> pygame.Surface:
-        return self._powerup_images[powerup_type]
+        return self.atlas.image(ASSET_KEYS["powerups"][powerup_type])
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import pygame
+
+from .config import SCALE_FACTOR
+
+MAGIC = b"BMAT"
+VERSION = 1
+# magic, version, scale, atlas width, height, fingerprint, index length
+HEADER = struct.Struct("<4sBBHH20sI")
+SOURCE_SUFFIXES = (".ppm", ".png", ".bmp")
+Rect = Tuple[int, int, int, int]
+
+
+def default_cache_dir() -> Path:
+    override = os.environ.get("BOMBERMAN_CACHE_DIR")
+    if override:
+        return Path(override)
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "bomberman"
+
+
+def source_files(root: Path) -> Dict[str, Path]:
+    """Every image under ``root`` keyed by its relative path without suffix, e.g. ``tiles/floor``."""
+    return {
+        path.relative_to(root).with_suffix("").as_posix(): path
+        for path in sorted(root.rglob("*")) if path.suffix.lower() in SOURCE_SUFFIXES
+    }
+
+
+def fingerprint(sources: Dict[str, Path], scale: int) -> bytes:
+    """Changes whenever a source is added, removed, resized or touched; no image is decoded."""
+    digest = hashlib.sha1(f"{VERSION}:{scale}".encode())
+    for key, path in sources.items():
+        stat = path.stat()
+        digest.update(f"{key}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.digest()
+
+
+def _pack(sizes: Dict[str, Tuple[int, int]], max_width: int = 1024) -> Tuple[Dict[str, Rect], int, int]:
+    """Shelf packing: tallest first, left to right, a new shelf when the row is full."""
+    rects: Dict[str, Rect] = {}
+    x = y = shelf = width = 0
+    for key in sorted(sizes, key=lambda k: (-sizes[k][1], k)):
+        w, h = sizes[key]
+        if x and x + w > max_width:
+            x, y, shelf = 0, y + shelf, 0
+        rects[key] = (x, y, w, h)
+        x += w
+        shelf = max(shelf, h)
+        width = max(width, x)
+    return rects, max(width, 1), max(y + shelf, 1)
+
+
+def build_atlas(root: Path, path: Optional[Path], scale: int = SCALE_FACTOR) -> bytes:
+    """Decodes and scales every source once and packs them into one RGBA atlas file.
+
+    Returns the file contents; they are also written to ``path`` unless it is None.
+    """
+    sources = source_files(root)
+    images = {}
+    alpha = {}
+    for key, source in sources.items():
+        image = pygame.image.load(str(source))
+        alpha[key] = image.get_alpha() is not None or bool(image.get_flags() & pygame.SRCALPHA)
+        images[key] = pygame.transform.scale(image, (image.get_width() * scale, image.get_height() * scale))
+    rects, width, height = _pack({key: image.get_size() for key, image in images.items()})
+
+    atlas = pygame.Surface((width, height), pygame.SRCALPHA, 32)
+    for key, image in images.items():
+        # max against the zeroed atlas copies pixels exactly instead of alpha-blending them
+        atlas.blit(image, rects[key][:2], special_flags=pygame.BLEND_RGBA_MAX)
+    index = json.dumps({"rects": rects, "alpha": alpha}).encode()
+    header = HEADER.pack(MAGIC, VERSION, scale, width, height, fingerprint(sources, scale), len(index))
+    # pixel rows start on a 16-byte boundary
+    padding = b"\0" * (-(HEADER.size + len(index)) % 16)
+    data = header + index + padding + pygame.image.tobytes(atlas, "RGBA")
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_bytes(data)
+        temporary.replace(path)
+    return data
+
+
+class SpriteAtlas:
+    """Pre-scaled sprites packed in one cached file, memory-mapped and sliced on demand.
+
+    Opening an up-to-date cache only stats the sources and maps the file;
+    each sprite becomes a subsurface, converted to the display format, the
+    first time it is asked for. A stale or missing cache is rebuilt first.
+    """
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], rebuilt: bool) -> None:
+        _, _, self.scale, width, height, self.fingerprint, index_size = HEADER.unpack_from(buffer)
+        index = json.loads(bytes(buffer[HEADER.size:HEADER.size + index_size]))
+        self.rects: Dict[str, Rect] = {key: tuple(rect) for key, rect in index["rects"].items()}
+        self.alpha: Dict[str, bool] = index["alpha"]
+        offset = HEADER.size + index_size
+        offset += -offset % 16
+        self.rebuilt = rebuilt
+        self._buffer = buffer
+        self._surface = pygame.image.frombuffer(memoryview(buffer)[offset:offset + width * height * 4],
+                                                (width, height), "RGBA")
+        self._images: Dict[str, pygame.Surface] = {}
+
+    @classmethod
+    def open(cls, root: Path, cache_dir: Optional[Path] = None, scale: int = SCALE_FACTOR) -> "SpriteAtlas":
+        cache_dir = default_cache_dir() if cache_dir is None else Path(cache_dir)
+        path = cache_dir / f"atlas-x{scale}-{hashlib.sha1(str(root).encode()).hexdigest()[:8]}.bin"
+        expected = fingerprint(source_files(root), scale)
+        try:
+            with path.open("rb") as handle:
+                buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, stored_scale, _, _, stored, _ = HEADER.unpack_from(buffer)
+            if (magic, version, stored_scale, stored) == (MAGIC, VERSION, scale, expected):
+                return cls(buffer, rebuilt=False)
+            buffer.close()
+        except (OSError, ValueError, struct.error):
+            pass
+        try:
+            data = build_atlas(root, path, scale)
+        except OSError:
+            # read-only cache location: keep the atlas in memory for this run
+            data = build_atlas(root, None, scale)
+        return cls(data, rebuilt=True)
+
+    def keys(self) -> List[str]:
+        return sorted(self.rects)
+
+    def image(self, key: str) -> pygame.Surface:
+        image = self._images.get(key)
+        if image is None:
+            image = self._surface.subsurface(self.rects[key])
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha() if self.alpha[key] else image.convert()
+            self._images[key] = image
+        return image
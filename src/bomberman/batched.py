@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import random
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .arena import POWERUP_CODES, TILE_CODES, Arena
+from .config import (
+    ARENA_HEIGHT,
+    ARENA_WIDTH,
+    BASE_BOMB_COUNT,
+    BASE_FLAME_LENGTH,
+    BOMB_TIMER,
+    DEFAULT_PLAYER_COUNT,
+    DIAGONAL_SCALE,
+    EXPLOSION_DURATION,
+    FIXED_TIMESTEP,
+    PLAYER_SPEED,
+    POWERUP_SPAWN_CHANCE,
+    PowerUpType,
+    TileType,
+)
+from .entities import ACTION_BOMB, ACTION_DOWN, ACTION_LEFT, ACTION_RIGHT, ACTION_UP
+
+FLOOR = TILE_CODES[TileType.FLOOR]
+DESTRUCTIBLE = TILE_CODES[TileType.DESTRUCTIBLE]
+POWERUP_BOMB = POWERUP_CODES[PowerUpType.BOMB]
+POWERUP_FLAME = POWERUP_CODES[PowerUpType.FLAME]
+# Same order as the choice list in GameState so seeded runs draw identically.
+_POWERUP_CHOICES = [POWERUP_BOMB, POWERUP_FLAME]
+_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+class BatchedGameState:
+    """Steps many independent matches at once using structure-of-arrays NumPy buffers.
+
+    Movement, timers, pickups and winner detection are vectorised across all
+    matches. Detonations are rare, order-sensitive events (chains, crate
+    destruction and power-up rolls), so they are resolved per match in the
+    same order as ``GameState`` to stay tick-for-tick identical to it.
+    """
+
+    def __init__(self, num_matches: int, seeds: Optional[Sequence[int]] = None,
+                 bomb_slots: int = 8, width: int = ARENA_WIDTH, height: int = ARENA_HEIGHT,
+                 player_count: int = DEFAULT_PLAYER_COUNT) -> None:
+        if seeds is not None and len(seeds) != num_matches:
+            raise ValueError("expected one seed per match")
+        n, p = num_matches, player_count
+        self.num_matches = n
+        self.width = width
+        self.height = height
+        self.player_count = player_count
+        self.rngs: List[random.Random] = [
+            random.Random(seeds[i] if seeds is not None else None) for i in range(n)
+        ]
+
+        arena = Arena(width, height, player_count)
+        self.template = np.frombuffer(arena.cells, dtype=np.uint8).reshape(self.height, self.width).copy()
+        self.spawns = np.array(arena.spawns, dtype=np.float64)
+
+        self.tiles = np.empty((n, self.height, self.width), dtype=np.uint8)
+        self.powerup_grid = np.zeros((n, self.height, self.width), dtype=np.uint8)
+        self.bomb_grid = np.zeros((n, self.height, self.width), dtype=bool)
+
+        self.positions = np.empty((n, p, 2), dtype=np.float64)
+        self.speed = np.full((n, p), PLAYER_SPEED, dtype=np.float64)
+        self.alive = np.empty((n, p), dtype=bool)
+        self.bomb_capacity = np.empty((n, p), dtype=np.int32)
+        self.flame_length = np.empty((n, p), dtype=np.int32)
+        self.active_bombs = np.empty((n, p), dtype=np.int32)
+        self.score = np.zeros((n, p), dtype=np.int32)
+
+        self.bomb_active = np.zeros((n, bomb_slots), dtype=bool)
+        self.bomb_tile = np.zeros((n, bomb_slots, 2), dtype=np.int32)
+        self.bomb_deadline = np.zeros((n, bomb_slots), dtype=np.float64)
+        self.bomb_flame = np.zeros((n, bomb_slots), dtype=np.int32)
+        self.bomb_owner = np.zeros((n, bomb_slots), dtype=np.int32)
+        self.bomb_seq = np.zeros((n, bomb_slots), dtype=np.int64)
+        self._next_seq = 0
+
+        # timers are absolute deadlines on a per-match round clock, as in GameState
+        self.clock = np.zeros(n, dtype=np.float64)
+
+        # explosions are stored as a centre plus reach along +x, -x, +y, -y
+        self.explosion_active = np.zeros((n, bomb_slots), dtype=bool)
+        self.explosion_deadline = np.zeros((n, bomb_slots), dtype=np.float64)
+        self.explosion_center = np.zeros((n, bomb_slots, 2), dtype=np.int32)
+        self.explosion_reach = np.zeros((n, bomb_slots, 4), dtype=np.int32)
+
+        self.round_over = np.zeros(n, dtype=bool)
+        self.winner = np.zeros(n, dtype=np.int32)  # player id, 0 for none/draw
+
+        self.reset()
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        """Start a new round in every match selected by ``mask`` (all by default)."""
+        if mask is None:
+            mask = np.ones(self.num_matches, dtype=bool)
+        idx = np.nonzero(mask)[0]
+        if idx.size == 0:
+            return
+        self.tiles[idx] = self.template
+        self.powerup_grid[idx] = 0
+        self.bomb_grid[idx] = False
+        self.positions[idx] = self.spawns
+        self.alive[idx] = True
+        self.bomb_capacity[idx] = BASE_BOMB_COUNT
+        self.flame_length[idx] = BASE_FLAME_LENGTH
+        self.active_bombs[idx] = 0
+        self.bomb_active[idx] = False
+        self.explosion_active[idx] = False
+        self.clock[idx] = 0.0
+        self.round_over[idx] = False
+        self.winner[idx] = 0
+
+    def step(self, dt: float, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance every match by ``dt`` using ``actions[N, players]`` action bits.
+
+        Returns the ``round_over`` and ``winner`` arrays (live views, not copies).
+        """
+        actions = np.asarray(actions, dtype=np.uint8)
+        if actions.shape != (self.num_matches, self.player_count):
+            raise ValueError(f"actions must have shape {(self.num_matches, self.player_count)}")
+        live = ~self.round_over
+        if not live.any():
+            return self.round_over, self.winner
+
+        move_x = ((actions & ACTION_RIGHT) != 0).astype(np.float64) - ((actions & ACTION_LEFT) != 0)
+        move_y = ((actions & ACTION_DOWN) != 0).astype(np.float64) - ((actions & ACTION_UP) != 0)
+        diagonal = (move_x != 0) & (move_y != 0)
+        move_x[diagonal] *= DIAGONAL_SCALE
+        move_y[diagonal] *= DIAGONAL_SCALE
+        wants_bomb = (actions & ACTION_BOMB) != 0
+
+        if dt < 1.5 * FIXED_TIMESTEP:
+            self._advance(live, dt, self.clock + dt, move_x, move_y, wants_bomb)
+            return self.round_over, self.winner
+
+        # like GameState, a coarse step is cut after the tick each timer runs out in and after the first
+        # tick of matches where someone drops a bomb
+        ticks = round(dt / FIXED_TIMESTEP)
+        piece = dt / ticks
+        remaining = np.where(live, ticks, 0)
+        dropping = (wants_bomb & self.alive).any(axis=1)
+        while True:
+            going = (remaining > 0) & ~self.round_over
+            if not going.any():
+                break
+            deadline = np.minimum(np.where(self.bomb_active, self.bomb_deadline, np.inf).min(axis=1),
+                                  np.where(self.explosion_active, self.explosion_deadline, np.inf).min(axis=1))
+            now = self.clock.copy()
+            taken = np.zeros(self.num_matches, dtype=np.intp)
+            open_ = going.copy()
+            # repeated addition reproduces the clock of stepping tick by tick exactly
+            while open_.any():
+                now[open_] += piece
+                taken[open_] += 1
+                open_ &= (taken < remaining) & (now < deadline) & ~(dropping & (remaining == ticks))
+            for count in np.unique(taken[going]).tolist():
+                group = going & (taken == count)
+                # bombs are only placed in the step's first tick
+                self._advance(group, count * piece, now, move_x, move_y,
+                              wants_bomb & (remaining == ticks)[:, None])
+            remaining -= taken
+        return self.round_over, self.winner
+
+    def _advance(self, live: np.ndarray, dt: float, now: np.ndarray, move_x: np.ndarray,
+                 move_y: np.ndarray, wants_bomb: np.ndarray) -> None:
+        # players act in id order, so a bomb dropped by player 1 blocks player 2 this tick
+        for p in range(self.player_count):
+            acting = live & self.alive[:, p]
+            self._move_players(p, acting & ((move_x[:, p] != 0) | (move_y[:, p] != 0)),
+                               move_x[:, p], move_y[:, p], dt)
+            self._place_bombs(p, acting & wants_bomb[:, p])
+
+        self._update_bombs(now, live)
+        self._update_explosions(now, live)
+        self.clock[live] = now[live]
+        self._check_powerup_pickups(live)
+        self._determine_round_winner(live)
+
+    def _tile_is_open(self, idx: np.ndarray, tx: np.ndarray, ty: np.ndarray) -> np.ndarray:
+        inside = (tx >= 0) & (tx < self.width) & (ty >= 0) & (ty < self.height)
+        cx = np.clip(tx, 0, self.width - 1)
+        cy = np.clip(ty, 0, self.height - 1)
+        return inside & (self.tiles[idx, cy, cx] == FLOOR) & ~self.bomb_grid[idx, cy, cx]
+
+    def _move_players(self, p: int, mask: np.ndarray, move_x: np.ndarray,
+                      move_y: np.ndarray, dt: float) -> None:
+        idx = np.nonzero(mask)[0]
+        if idx.size == 0:
+            return
+        stride = self.speed[idx, p] * dt
+        diagonal = (move_x[idx] != 0) & (move_y[idx] != 0)
+        steps = max(1, round(dt / FIXED_TIMESTEP))
+        if steps == 1 or not diagonal.any():
+            self._step(idx, p, move_x[idx], move_y[idx], stride)
+            return
+        straight = idx[~diagonal]
+        if straight.size:
+            self._step(straight, p, move_x[straight], move_y[straight], stride[~diagonal])
+        # single ticks alternate the axes, so diagonal strides are walked in tick-sized pieces
+        slanted = idx[diagonal]
+        piece = stride[diagonal] / steps
+        for _ in range(steps):
+            self._step(slanted, p, move_x[slanted], move_y[slanted], piece)
+
+    def _step(self, idx: np.ndarray, p: int, move_x: np.ndarray, move_y: np.ndarray,
+              stride: np.ndarray) -> None:
+        cur_x = self.positions[idx, p, 0]
+        cur_y = self.positions[idx, p, 1]
+        new_x = cur_x + move_x * stride
+        new_y = cur_y + move_y * stride
+        res_x = self._sweep(idx, cur_x, new_x, np.rint(cur_y).astype(np.intp), True)
+        res_y = self._sweep(idx, cur_y, new_y, np.rint(res_x).astype(np.intp), False)
+        self.positions[idx, p, 0] = res_x
+        self.positions[idx, p, 1] = res_y
+
+    def _sweep(self, idx: np.ndarray, start: np.ndarray, end: np.ndarray, lane: np.ndarray,
+               along_x: bool) -> np.ndarray:
+        """``GameState._sweep`` for many matches: each stops before the first closed tile it would enter."""
+        tile = np.rint(start).astype(np.intp)
+        last = np.rint(end).astype(np.intp)
+        step = np.where(last > tile, 1, -1)
+        crossings = np.abs(last - tile)
+        result = end.copy()
+        moving = crossings > 0
+        for k in range(1, int(crossings.max(initial=0)) + 1):
+            moving &= crossings >= k
+            if not moving.any():
+                break
+            ahead = tile + step * k
+            open_ = (self._tile_is_open(idx, ahead, lane) if along_x
+                     else self._tile_is_open(idx, lane, ahead))
+            blocked = moving & ~open_
+            if blocked.any():
+                stop = ahead[blocked] - step[blocked]
+                edge = stop + 0.5 * step[blocked]
+                # np.rint, like round(), sends halves to the even neighbour
+                result[blocked] = np.where(np.rint(edge) == stop, edge, np.nextafter(edge, stop))
+                moving &= ~blocked
+        return result
+
+    def _grow_slots(self) -> None:
+        for name in ("bomb_active", "bomb_tile", "bomb_deadline", "bomb_flame", "bomb_owner",
+                     "bomb_seq", "explosion_active", "explosion_deadline", "explosion_center",
+                     "explosion_reach"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)], axis=1))
+
+    def _place_bombs(self, p: int, mask: np.ndarray) -> None:
+        mask = mask & (self.active_bombs[:, p] < self.bomb_capacity[:, p])
+        idx = np.nonzero(mask)[0]
+        if idx.size == 0:
+            return
+        tx = np.rint(self.positions[idx, p, 0]).astype(np.intp)
+        ty = np.rint(self.positions[idx, p, 1]).astype(np.intp)
+        free_tile = ~self.bomb_grid[idx, ty, tx]
+        idx, tx, ty = idx[free_tile], tx[free_tile], ty[free_tile]
+        if idx.size == 0:
+            return
+        while not (~self.bomb_active[idx]).any(axis=1).all():
+            self._grow_slots()
+        slot = np.argmin(self.bomb_active[idx], axis=1)
+        self.bomb_active[idx, slot] = True
+        self.bomb_tile[idx, slot, 0] = tx
+        self.bomb_tile[idx, slot, 1] = ty
+        self.bomb_deadline[idx, slot] = self.clock[idx] + BOMB_TIMER
+        self.bomb_flame[idx, slot] = self.flame_length[idx, p]
+        self.bomb_owner[idx, slot] = p
+        self.bomb_seq[idx, slot] = self._next_seq
+        self._next_seq += 1
+        self.bomb_grid[idx, ty, tx] = True
+        self.active_bombs[idx, p] += 1
+
+    def _update_bombs(self, now: np.ndarray, live: np.ndarray) -> None:
+        due = self.bomb_active & live[:, None] & (self.bomb_deadline <= now[:, None])
+        for m in np.nonzero(due.any(axis=1))[0].tolist():
+            slots = np.nonzero(due[m])[0]
+            for b in slots[np.argsort(self.bomb_seq[m, slots])].tolist():
+                self._explode_bomb(m, b)
+
+    def _explode_bomb(self, m: int, b: int) -> None:
+        if not self.bomb_active[m, b]:
+            return
+        self.bomb_active[m, b] = False
+        cx, cy = self.bomb_tile[m, b].tolist()
+        self.bomb_grid[m, cy, cx] = False
+        owner = int(self.bomb_owner[m, b])
+        self.active_bombs[m, owner] = max(0, int(self.active_bombs[m, owner]) - 1)
+        tiles, reach = self._collect_explosion_tiles(m, cx, cy, int(self.bomb_flame[m, b]))
+        self._add_explosion(m, cx, cy, reach)
+        self._apply_explosion_effects(m, tiles)
+
+    def _collect_explosion_tiles(self, m: int, cx: int, cy: int,
+                                 flame: int) -> Tuple[List[Tuple[int, int]], List[int]]:
+        grid = self.tiles[m]
+        tiles = [(cx, cy)]
+        reach = []
+        for dx, dy in _DIRECTIONS:
+            length = 0
+            for step in range(1, flame + 1):
+                tx, ty = cx + dx * step, cy + dy * step
+                if not (0 <= tx < self.width and 0 <= ty < self.height):
+                    break
+                code = grid[ty, tx]
+                if code != FLOOR and code != DESTRUCTIBLE:
+                    break
+                tiles.append((tx, ty))
+                length = step
+                if code == DESTRUCTIBLE:
+                    break
+            reach.append(length)
+        return tiles, reach
+
+    def _add_explosion(self, m: int, cx: int, cy: int, reach: List[int]) -> None:
+        free = np.nonzero(~self.explosion_active[m])[0]
+        if free.size == 0:
+            self._grow_slots()
+            free = np.nonzero(~self.explosion_active[m])[0]
+        e = int(free[0])
+        self.explosion_active[m, e] = True
+        self.explosion_deadline[m, e] = self.clock[m] + EXPLOSION_DURATION
+        self.explosion_center[m, e] = (cx, cy)
+        self.explosion_reach[m, e] = reach
+
+    def _apply_explosion_effects(self, m: int, tiles: List[Tuple[int, int]]) -> None:
+        grid = self.tiles[m]
+        rng = self.rngs[m]
+        player_tiles = np.rint(self.positions[m]).astype(np.intp).tolist()
+        for tx, ty in tiles:
+            if grid[ty, tx] == DESTRUCTIBLE:
+                grid[ty, tx] = FLOOR
+                if rng.random() < POWERUP_SPAWN_CHANCE:
+                    self.powerup_grid[m, ty, tx] = rng.choice(_POWERUP_CHOICES)
+            for p, (px, py) in enumerate(player_tiles):
+                if px == tx and py == ty:
+                    self.alive[m, p] = False
+
+        # chain reaction, in placement order like the bomb list in GameState
+        hit = set(tiles)
+        slots = np.nonzero(self.bomb_active[m])[0]
+        for b in slots[np.argsort(self.bomb_seq[m, slots])].tolist():
+            bx, by = self.bomb_tile[m, b].tolist()
+            if (bx, by) in hit:
+                self._explode_bomb(m, b)
+
+    def _update_explosions(self, now: np.ndarray, live: np.ndarray) -> None:
+        self.explosion_active[live[:, None] & (self.explosion_deadline <= now[:, None])] = False
+
+    def _check_powerup_pickups(self, live: np.ndarray) -> None:
+        for p in range(self.player_count):
+            idx = np.nonzero(live & self.alive[:, p])[0]
+            if idx.size == 0:
+                continue
+            tx = np.rint(self.positions[idx, p, 0]).astype(np.intp)
+            ty = np.rint(self.positions[idx, p, 1]).astype(np.intp)
+            kind = self.powerup_grid[idx, ty, tx]
+            self.powerup_grid[idx, ty, tx] = 0
+            self.bomb_capacity[idx, p] += kind == POWERUP_BOMB
+            self.flame_length[idx, p] += kind == POWERUP_FLAME
+
+    def _determine_round_winner(self, live: np.ndarray) -> None:
+        living = self.alive.sum(axis=1)
+        over = live & (living <= 1)
+        if not over.any():
+            return
+        solo = over & (living == 1)
+        winners = np.argmax(self.alive, axis=1)
+        self.round_over |= over
+        self.winner[over] = 0
+        self.winner[solo] = winners[solo] + 1
+        self.score[solo, winners[solo]] += 1
+
+    def explosion_tiles(self, m: int) -> List[Tuple[int, int]]:
+        """Tiles covered by live explosions in match ``m``, in GameState order."""
+        tiles: List[Tuple[int, int]] = []
+        for e in np.nonzero(self.explosion_active[m])[0].tolist():
+            cx, cy = self.explosion_center[m, e].tolist()
+            tiles.append((cx, cy))
+            for (dx, dy), length in zip(_DIRECTIONS, self.explosion_reach[m, e].tolist()):
+                tiles.extend((cx + dx * step, cy + dy * step) for step in range(1, length + 1))
+        return tiles
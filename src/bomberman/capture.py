@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple, Union
+
+import pygame
+
+# byte order in memory of little-endian 32-bit pixels with these (R, G, B) masks:
+# the pygame.image.frombuffer format and the ffmpeg pixel format
+_LAYOUTS = {
+    (0xFF0000, 0xFF00, 0xFF): ("BGRA", "bgr0"),
+    (0xFF, 0xFF00, 0xFF0000): ("RGBA", "rgb0"),
+}
+
+
+class FrameSink:
+    """Where captured frames end up; ``write`` runs on the writer thread."""
+
+    def __init__(self, path: Path, size: Tuple[int, int], layout: Tuple[str, str], fps: float) -> None:
+        self.path = path
+        self.size = size
+        self.layout = layout
+        self.fps = fps
+
+    def write(self, index: int, pixels: bytearray) -> None:
+        raise NotImplementedError
+
+    def close(self, stats: Dict[str, int]) -> None:
+        pass
+
+
+class PngSequence(FrameSink):
+    """One ``frameNNNNNN.png`` per captured frame in a directory."""
+
+    def __init__(self, path: Path, size: Tuple[int, int], layout: Tuple[str, str], fps: float) -> None:
+        super().__init__(path, size, layout, fps)
+        path.mkdir(parents=True, exist_ok=True)
+        # the padding byte would be saved as alpha, so frames go through an opaque surface first
+        self._opaque = pygame.Surface(size, 0, 24)
+
+    def write(self, index: int, pixels: bytearray) -> None:
+        frame = pygame.image.frombuffer(pixels, self.size, self.layout[0])
+        frame.set_alpha(None)
+        self._opaque.blit(frame, (0, 0))
+        pygame.image.save(self._opaque, str(self.path / f"frame{index:06d}.png"))
+
+
+class RawVideo(FrameSink):
+    """Frames back to back, exactly as captured, plus a ``.json`` sidecar describing them for ffmpeg."""
+
+    def __init__(self, path: Path, size: Tuple[int, int], layout: Tuple[str, str], fps: float) -> None:
+        super().__init__(path, size, layout, fps)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "wb")
+
+    def write(self, index: int, pixels: bytearray) -> None:
+        self._file.write(pixels)
+
+    def close(self, stats: Dict[str, int]) -> None:
+        self._file.close()
+        width, height = self.size
+        pix_fmt = self.layout[1]
+        meta = {
+            "width": width, "height": height, "pix_fmt": pix_fmt, "fps": self.fps, **stats,
+            "ffmpeg": f"ffmpeg -f rawvideo -pix_fmt {pix_fmt} -s {width}x{height} -r {self.fps:g} "
+                      f"-i {self.path.name} {self.path.stem}.mp4",
+        }
+        self.path.with_name(self.path.name + ".json").write_text(json.dumps(meta, indent=2))
+
+
+class FrameRecorder:
+    """Copies a surface into a ring of reusable buffers; a writer thread puts them on disk.
+
+    ``capture`` costs one memcpy of the surface's pixel buffer. It never waits
+    for the disk: when every buffer is still queued it drops the frame and
+    counts it, unless the recorder was made with ``drop=False`` (offline
+    rendering), in which case it waits for the writer. A path ending in
+    ``.raw`` gets a raw video stream; anything else a directory of PNGs. If
+    the sink fails (disk full, bad path) the writer stops and the error is
+    raised from the next ``capture`` and from ``close``.
+    """
+
+    def __init__(self, surface: pygame.Surface, path: Union[str, Path], buffers: int = 8,
+                 fps: float = 60.0, drop: bool = True) -> None:
+        self.surface = surface
+        self.drop = drop
+        width, height = size = surface.get_size()
+        layout = _LAYOUTS.get(surface.get_masks()[:3])
+        self._staging: Optional[pygame.Surface] = None
+        if surface.get_bytesize() != 4 or layout is None or surface.get_pitch() != width * 4:
+            # anything else is converted by one blit into a 32-bit copy first
+            self._staging = pygame.Surface(size, 0, 32)
+            layout = _LAYOUTS[self._staging.get_masks()[:3]]
+        path = Path(path)
+        sink = RawVideo if path.suffix == ".raw" else PngSequence
+        self.sink = sink(path, size, layout, fps)
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self._free: Deque[bytearray] = deque(bytearray(width * height * 4) for _ in range(buffers))
+        self._queued: Deque[Tuple[int, bytearray]] = deque()
+        self._ready = threading.Condition()
+        self._closing = False
+        self.error: Optional[BaseException] = None
+        self._writer = threading.Thread(target=self._write, name="frame-writer", daemon=True)
+        self._writer.start()
+
+    def capture(self) -> bool:
+        """Queues the surface's current pixels; False if the frame had to be dropped."""
+        with self._ready:
+            if self.error is not None:
+                raise self.error
+            if not self._free:
+                if self.drop:
+                    self.dropped += 1
+                    return False
+                while not self._free and self.error is None:
+                    self._ready.wait()
+                if self.error is not None:
+                    raise self.error
+            pixels = self._free.popleft()
+        source = self.surface
+        if self._staging is not None:
+            self._staging.blit(source, (0, 0))
+            source = self._staging
+        pixels[:] = source.get_buffer()
+        with self._ready:
+            self._queued.append((self.captured, pixels))
+            self.captured += 1
+            self._ready.notify_all()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"captured": self.captured, "written": self.written, "dropped": self.dropped}
+
+    def _write(self) -> None:
+        while True:
+            with self._ready:
+                while not self._queued and not self._closing:
+                    self._ready.wait()
+                if not self._queued:
+                    return
+                index, pixels = self._queued.popleft()
+            try:
+                self.sink.write(index, pixels)
+            except Exception as error:
+                with self._ready:
+                    self.error = error
+                    self._ready.notify_all()
+                return
+            with self._ready:
+                self.written += 1
+                self._free.append(pixels)
+                self._ready.notify_all()
+
+    def close(self) -> Dict[str, int]:
+        """Writes out everything still queued, finishes the file and returns the counters."""
+        with self._ready:
+            self._closing = True
+            self._ready.notify_all()
+        self._writer.join()
+        stats = self.stats()
+        self.sink.close(stats)
+        if self.error is not None:
+            raise self.error
+        return stats
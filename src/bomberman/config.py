@@ -11,8 +11,14 @@ TILE_SIZE = 16
 SCALE_FACTOR = 2
 ARENA_WIDTH = 13
 ARENA_HEIGHT = 11
+MIN_ARENA_SIZE = 5
+MAX_ARENA_SIZE = 255
+DEFAULT_PLAYER_COUNT = 2
+MAX_PLAYERS = 64
 
+FIXED_TIMESTEP = 1 / 60  # seconds per simulation tick in fixed-step mode
 PLAYER_SPEED = 4.0  # tiles per second
+DIAGONAL_SCALE = 0.7071
 BOMB_TIMER = 2.5  # seconds
 EXPLOSION_DURATION = 0.5  # seconds
 BASE_FLAME_LENGTH = 2
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import importlib
+import random
+from typing import Dict, Optional, Tuple, Type
+
+from .config import BOMB_TIMER
+from .entities import ACTION_BOMB, ACTION_DOWN, ACTION_INPUTS, ACTION_LEFT, ACTION_RIGHT, ACTION_UP, InputBuffer
+from .game_state import GameState
+from .navigation import UNREACHABLE
+
+DIRECTIONS: Dict[int, Tuple[int, int]] = {
+    ACTION_LEFT: (-1, 0),
+    ACTION_RIGHT: (1, 0),
+    ACTION_UP: (0, -1),
+    ACTION_DOWN: (0, 1),
+}
+ACTIONS: Dict[Tuple[int, int], int] = {step: action for action, step in DIRECTIONS.items()}
+
+
+class Controller:
+    """Drives one player by filling its slot of the ``InputBuffer`` every tick.
+
+    Instances are reused from match to match; ``reset`` is called before each
+    match with a seed so bot decisions are reproducible. A ``passive``
+    controller never sets input, which lets headless runners skip ahead to
+    the next timer while only passive players are alive.
+    """
+
+    passive = False
+
+    def reset(self, state: GameState, player_id: int, seed: int) -> None:
+        pass
+
+    def metrics(self) -> Dict[str, float]:
+        """Running statistics worth reporting after a run, e.g. search throughput."""
+        return {}
+
+    def act(self, state: GameState, player_id: int, buffer: InputBuffer) -> None:
+        raise NotImplementedError
+
+
+class IdleController(Controller):
+    passive = True
+
+    def act(self, state: GameState, player_id: int, buffer: InputBuffer) -> None:
+        pass
+
+
+class RandomController(Controller):
+    """Holds a random action byte for a few ticks at a time."""
+
+    def __init__(self, hold: int = 8) -> None:
+        self.hold = hold
+        self.rng = random.Random()
+        self.action = 0
+        self.ticks = 0
+
+    def reset(self, state: GameState, player_id: int, seed: int) -> None:
+        self.rng.seed(seed)
+        self.ticks = 0
+
+    def act(self, state: GameState, player_id: int, buffer: InputBuffer) -> None:
+        if self.ticks % self.hold == 0:
+            self.action = self.rng.randrange(32)
+        self.ticks += 1
+        buffer.set_state(player_id, ACTION_INPUTS[self.action])
+
+
+class WandererController(Controller):
+    """Walks in straight lines and drops bombs on the way out of a tile, so it usually escapes."""
+
+    def __init__(self, bomb_chance: float = 0.5) -> None:
+        self.bomb_chance = bomb_chance
+        self.rng = random.Random()
+        self.held = 0
+
+    def reset(self, state: GameState, player_id: int, seed: int) -> None:
+        self.rng.seed(seed)
+        self.held = 0
+
+    def act(self, state: GameState, player_id: int, buffer: InputBuffer) -> None:
+        player = state.players[player_id]
+        tx, ty = player.tile_position()
+        dx, dy = DIRECTIONS.get(self.held, (0, 0))
+        if self.held == 0 or not state._tile_is_open(tx + dx, ty + dy) or self.rng.random() < 0.02:
+            self.held = self.rng.choice(list(DIRECTIONS))
+            dx, dy = DIRECTIONS[self.held]
+        offset = (player.position[0] - tx) * dx + (player.position[1] - ty) * dy
+        action = self.held
+        if offset > 0.4 and state._tile_is_open(tx + dx, ty + dy) and self.rng.random() < self.bomb_chance:
+            action |= ACTION_BOMB
+        buffer.set_state(player_id, ACTION_INPUTS[action])
+
+
+class SurvivorController(Controller):
+    """Clears crates without blowing itself up, using the state's shared danger map and flow fields.
+
+    Threatened: follow the flow field to the nearest safe tile. Otherwise
+    walk to the nearest crate and drop a bomb there, but only if a tile
+    outside the new blast is close enough to reach in time. Never steps
+    into a threatened tile of its own accord.
+    """
+
+    def __init__(self, bomb_chance: float = 0.5) -> None:
+        self.bomb_chance = bomb_chance
+        self.rng = random.Random()
+
+    def reset(self, state: GameState, player_id: int, seed: int) -> None:
+        self.rng.seed(seed)
+
+    def act(self, state: GameState, player_id: int, buffer: InputBuffer) -> None:
+        player = state.players[player_id]
+        tx, ty = player.tile_position()
+        danger = state.danger
+        flow = state.flow
+        if not danger.is_safe(tx, ty):
+            step = flow.safe().direction(tx, ty)
+        else:
+            crates = flow.crate_fronts()
+            step = crates.direction(tx, ty)
+            if crates.distance(tx, ty) == 0:
+                step = self._escape(state, player, tx, ty)
+                if step is not None and self.rng.random() < self.bomb_chance:
+                    # movement is applied before the bomb drops, so stand still for the drop
+                    buffer.set_state(player_id, ACTION_INPUTS[ACTION_BOMB])
+                    return
+            elif crates.distance(tx, ty) == UNREACHABLE:
+                step = self.rng.choice(list(DIRECTIONS.values()))
+                if not flow.is_open(tx + step[0], ty + step[1]):
+                    step = None
+            if step is not None and not danger.is_safe(tx + step[0], ty + step[1]):
+                step = None
+        buffer.set_state(player_id, ACTION_INPUTS[0 if step is None else ACTIONS[step]])
+
+    @staticmethod
+    def _escape(state: GameState, player, tx: int, ty: int) -> Optional[Tuple[int, int]]:
+        """First step towards shelter from a bomb dropped here, if it can be reached before it goes off."""
+        distance, step = state.flow.escape(tx, ty, player.flame_length)
+        # leave a tile of slack for starting off-centre
+        if distance == UNREACHABLE or (distance + 1) / player.speed >= BOMB_TIMER:
+            return None
+        return step
+
+
+CONTROLLERS: Dict[str, Type[Controller]] = {
+    "idle": IdleController,
+    "random": RandomController,
+    "survivor": SurvivorController,
+    "wanderer": WandererController,
+}
+# controllers in modules of their own, imported on first use like the package exports
+CONTROLLER_MODULES: Dict[str, str] = {
+    "search": "search:SearchController",
+}
+
+
+def make_controller(name: str) -> Controller:
+    """Builds a controller by registry name or from a ``package.module:ClassName`` path."""
+    factory: Optional[Type[Controller]] = CONTROLLERS.get(name)
+    if factory is None and name in CONTROLLER_MODULES:
+        module_name, _, class_name = CONTROLLER_MODULES[name].partition(":")
+        factory = getattr(importlib.import_module(f".{module_name}", __package__), class_name)
+    if factory is None:
+        module_name, _, class_name = name.partition(":")
+        if not class_name:
+            known = sorted([*CONTROLLERS, *CONTROLLER_MODULES])
+            raise ValueError(f"unknown controller {name!r}; use one of {known} or module:Class")
+        factory = getattr(importlib.import_module(module_name), class_name)
+    return factory()
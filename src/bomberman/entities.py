@@ -1,60 +1,183 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from .config import BASE_BOMB_COUNT, BASE_FLAME_LENGTH, PowerUpType
+from .arena import Reach, blast_covers, blast_tiles
+from .config import BASE_BOMB_COUNT, BASE_FLAME_LENGTH, DIAGONAL_SCALE, PowerUpType
+from .timers import Timed
 
 Vec2 = Tuple[float, float]
 
+# Digital action bits, mirroring the keyboard bindings (one byte per player).
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_UP = 4
+ACTION_DOWN = 8
+ACTION_BOMB = 16
+
 
-@dataclass
 class Player:
-    player_id: int
-    position: Vec2
-    direction: Vec2 = (0.0, 0.0)
-    speed: float = 4.0
-    bomb_capacity: int = BASE_BOMB_COUNT
-    flame_length: int = BASE_FLAME_LENGTH
-    active_bombs: int = 0
-    alive: bool = True
-    score: int = 0
+    """A bomber. The tile under ``position`` is kept with it, so ``tile_position`` is a plain read."""
+
+    __slots__ = ("player_id", "_position", "_tile", "direction", "speed", "bomb_capacity", "flame_length",
+                 "active_bombs", "alive", "score")
+    _FIELDS = ("player_id", "position", "direction", "speed", "bomb_capacity", "flame_length",
+               "active_bombs", "alive", "score")
+
+    def __init__(self, player_id: int, position: Vec2, direction: Vec2 = (0.0, 0.0), speed: float = 4.0,
+                 bomb_capacity: int = BASE_BOMB_COUNT, flame_length: int = BASE_FLAME_LENGTH,
+                 active_bombs: int = 0, alive: bool = True, score: int = 0) -> None:
+        self.player_id = player_id
+        self._tile: Optional[Tuple[int, int]] = None
+        self.position = position
+        self.direction = direction
+        self.speed = speed
+        self.bomb_capacity = bomb_capacity
+        self.flame_length = flame_length
+        self.active_bombs = active_bombs
+        self.alive = alive
+        self.score = score
+
+    @property
+    def position(self) -> Vec2:
+        return self._position
+
+    @position.setter
+    def position(self, value: Vec2) -> None:
+        self._position = value
+        tx = int(round(value[0]))
+        ty = int(round(value[1]))
+        tile = self._tile
+        # most moves stay inside a tile; keep the old tuple then
+        if tile is None or tile[0] != tx or tile[1] != ty:
+            self._tile = (tx, ty)
 
     def tile_position(self) -> Tuple[int, int]:
-        return int(round(self.position[0])), int(round(self.position[1]))
+        return self._tile
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._FIELDS)
+        return f"Player({fields})"
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not Player:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._FIELDS)
+
+    __hash__ = None  # mutable, like the dataclass it replaces
 
 
-@dataclass
-class Bomb:
-    owner_id: int
-    position: Vec2
-    timer: float
-    flame_length: int
+class Bomb(Timed):
+    """A ticking bomb; ``timer`` is kept by ``GameState.bomb_timers`` once placed. Bombs never move."""
+
+    __slots__ = ("owner_id", "position", "flame_length", "_tile")
+
+    def __init__(self, owner_id: int, position: Vec2, timer: float, flame_length: int) -> None:
+        super().__init__(timer)
+        self.owner_id = owner_id
+        self.position = position
+        self.flame_length = flame_length
+        self._tile = (int(round(position[0])), int(round(position[1])))
+
+    def __repr__(self) -> str:
+        return (f"Bomb(owner_id={self.owner_id!r}, position={self.position!r}, timer={self.timer!r}, "
+                f"flame_length={self.flame_length!r})")
 
     def tile_position(self) -> Tuple[int, int]:
-        return int(round(self.position[0])), int(round(self.position[1]))
+        return self._tile
+
 
+class Explosion(Timed):
+    """Flames on a set of tiles. A bomb's blast is kept as a centre and a reach per direction;
+    its ``tiles`` are only listed when someone asks for them."""
 
-@dataclass
-class Explosion:
-    tiles: List[Tuple[int, int]]
-    timer: float
+    __slots__ = ("_tiles", "center", "reach")
 
+    def __init__(self, tiles: Optional[List[Tuple[int, int]]], timer: float,
+                 center: Optional[Tuple[int, int]] = None, reach: Optional[Reach] = None) -> None:
+        super().__init__(timer)
+        self._tiles = tiles
+        self.center = center
+        self.reach = reach
 
-@dataclass
+    @classmethod
+    def from_blast(cls, center: Tuple[int, int], reach: Reach, timer: float) -> "Explosion":
+        return cls(None, timer, center, reach)
+
+    @property
+    def tiles(self) -> List[Tuple[int, int]]:
+        if self._tiles is None:
+            self._tiles = blast_tiles(self.center[0], self.center[1], self.reach)
+        return self._tiles
+
+    def covers(self, tx: int, ty: int) -> bool:
+        if self.reach is None:
+            return (tx, ty) in self.tiles
+        return blast_covers(self.center[0], self.center[1], self.reach, tx, ty)
+
+    def __repr__(self) -> str:
+        if self.reach is None:
+            return f"Explosion(tiles={self.tiles!r}, timer={self.timer!r})"
+        return f"Explosion(center={self.center!r}, reach={self.reach!r}, timer={self.timer!r})"
+
+
+@dataclass(slots=True)
 class PowerUp:
     position: Tuple[int, int]
     powerup_type: PowerUpType
 
 
-@dataclass
+@dataclass(slots=True)
 class InputState:
     move: Vec2 = (0.0, 0.0)
     place_bomb: bool = False
 
 
+def input_from_action(action: int) -> InputState:
+    move_x = 0.0
+    move_y = 0.0
+    if action & ACTION_LEFT:
+        move_x -= 1
+    if action & ACTION_RIGHT:
+        move_x += 1
+    if action & ACTION_UP:
+        move_y -= 1
+    if action & ACTION_DOWN:
+        move_y += 1
+    if move_x and move_y:
+        move_x *= DIAGONAL_SCALE
+        move_y *= DIAGONAL_SCALE
+    return InputState(move=(move_x, move_y), place_bomb=bool(action & ACTION_BOMB))
+
+
+# every action byte decodes to one shared InputState; treat them as read-only
+ACTION_INPUTS = tuple(input_from_action(action) for action in range(32))
+NO_INPUT = ACTION_INPUTS[0]
+
+
+def action_from_input(state: InputState) -> int:
+    """Quantises an input to action bits; ``input_from_action`` maps it back."""
+    move_x, move_y = state.move
+    action = ACTION_BOMB if state.place_bomb else 0
+    if move_x < 0:
+        action |= ACTION_LEFT
+    elif move_x > 0:
+        action |= ACTION_RIGHT
+    if move_y < 0:
+        action |= ACTION_UP
+    elif move_y > 0:
+        action |= ACTION_DOWN
+    return action
+
+
 class InputBuffer:
-    """Collects input state for each player for the current frame."""
+    """Collects input state for each player for the current frame.
+
+    One buffer is meant to be reused for the whole game: ``clear`` resets
+    every player it has seen to ``NO_INPUT`` instead of emptying the dict,
+    and missing players read as ``NO_INPUT`` too, so a tick allocates nothing.
+    """
 
     def __init__(self) -> None:
         self.states: Dict[int, InputState] = {}
@@ -63,7 +186,9 @@ class InputBuffer:
         self.states[player_id] = state
 
     def get_state(self, player_id: int) -> InputState:
-        return self.states.get(player_id, InputState())
+        return self.states.get(player_id, NO_INPUT)
 
     def clear(self) -> None:
-        self.states.clear()
+        states = self.states
+        for player_id in states:
+            states[player_id] = NO_INPUT
@@ -1,26 +1,41 @@
 from __future__ import annotations
 
+import math
 import random
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from .arena import Arena
+from .arena import BLAST_DIRECTIONS, Arena, Reach, blast_covers
 from .config import (
     ARENA_HEIGHT,
     ARENA_WIDTH,
     BASE_BOMB_COUNT,
     BASE_FLAME_LENGTH,
     BOMB_TIMER,
+    DEFAULT_PLAYER_COUNT,
     EXPLOSION_DURATION,
+    FIXED_TIMESTEP,
     PLAYER_SPEED,
     POWERUP_SPAWN_CHANCE,
     PowerUpType,
     TileType,
 )
 from .entities import Bomb, Explosion, InputBuffer, InputState, Player, PowerUp
+from .navigation import INF, DangerMap, FlowFieldCache
+from .occupancy import OccupancyIndex
+from .snapshot import Snapshot, capture, restore
+from .timers import TimerQueue
+from .zobrist import LAYOUT, bomb_key, position_key, state_hash, stats_key, zobrist_key
 
 
-@dataclass
+def tile_edge(tile: int, step: int) -> float:
+    """The furthest coordinate towards ``step`` that still rounds to ``tile``."""
+    edge = tile + 0.5 * step
+    # round() sends halves to the even neighbour
+    return edge if round(edge) == tile else math.nextafter(edge, tile)
+
+
+@dataclass(slots=True)
 class MatchResult:
     round_over: bool
     winner: Optional[int] = None
@@ -29,177 +44,467 @@ class MatchResult:
 class GameState:
     """Contains the entire simulation state for a Bomberman match."""
 
-    def __init__(self) -> None:
-        self.arena = Arena()
+    def __init__(self, width: int = ARENA_WIDTH, height: int = ARENA_HEIGHT,
+                 player_count: int = DEFAULT_PLAYER_COUNT, debug: bool = False,
+                 seed: Optional[int] = None) -> None:
+        self.arena = Arena(width, height, player_count)
+        # every random draw goes through this so a seed plus inputs reproduces a match
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # getstate() copies 625 words, so it is cached until the next draw
+        self._rng_state: Optional[tuple] = None
+        self.occupancy = OccupancyIndex()
+        # deadlines on a shared per-round clock; a tick only visits entities that are due
+        self.bomb_timers = TimerQueue()
+        self.explosion_timers = TimerQueue()
+        # bumped whenever a bomb appears or goes off; walkability caches key on it with the arena version
+        self.bomb_version = 0
+        # shared bot queries: detonation times per tile and cached routes
+        self.danger = DangerMap(self)
+        self.flow = FlowFieldCache(self)
+        # cross-check the occupancy index and the hash against the entity lists after every update
+        self.debug = debug
+        # entity half of ``zobrist``: the layout's key, every bomb's and each player's position and stats keys
+        self._layout_key = zobrist_key(LAYOUT, width, height, player_count)
+        self._entity_hash = self._layout_key
+        self._position_keys: Dict[int, int] = {}
+        self._stats_keys: Dict[int, int] = {}
+        # players that moved since the hash was last read; rekeyed on the next read, not every tick
+        self._moved: Dict[int, Player] = {}
         self.players: Dict[int, Player] = {}
         self.bombs: List[Bomb] = []
         self.explosions: List[Explosion] = []
-        self.powerups: List[PowerUp] = []
+        self._powerups: Tuple[Tuple[int, int], Tuple[PowerUp, ...]] = ((-1, -1), ())
         self.round_over: bool = False
         self.winner: Optional[int] = None
+        # handed back by every ``update`` and refreshed in place; copy it to keep an old result
+        self.result = MatchResult(False)
+        # running statistic for tournaments; not part of snapshots or digests
+        self.bombs_placed = 0
         self.spawn_players()
 
     def spawn_players(self) -> None:
+        # scores carry over between rounds; everything else starts fresh
+        scores = {player_id: player.score for player_id, player in self.players.items()}
         self.players = {
-            1: Player(1, (1.0, 1.0), speed=PLAYER_SPEED),
-            2: Player(2, (ARENA_WIDTH - 2.0, ARENA_HEIGHT - 2.0), speed=PLAYER_SPEED),
+            player_id: Player(player_id, (float(sx), float(sy)), speed=PLAYER_SPEED,
+                              score=scores.get(player_id, 0))
+            for player_id, (sx, sy) in enumerate(self.arena.spawns, start=1)
         }
+        self.bombs.clear()
+        self.explosions.clear()
+        self.occupancy.clear()
         for player in self.players.values():
             player.bomb_capacity = BASE_BOMB_COUNT
             player.flame_length = BASE_FLAME_LENGTH
             player.active_bombs = 0
             player.alive = True
-        self.bombs.clear()
-        self.explosions.clear()
-        self.powerups.clear()
+            self.occupancy.add_player(player)
+        self.bomb_timers.clear()
+        self.explosion_timers.clear()
         self.round_over = False
         self.winner = None
         self.arena.reset()
+        self.bomb_version += 1
+        self.danger.invalidate()
+        self.rehash()
+
+    @property
+    def zobrist(self) -> int:
+        """64-bit hash of the arena, the bombs and each player's position (to 1/64 tile) and stats.
+
+        Tiles, bombs and stats are folded in as they change; players that
+        walked are rekeyed on the next read, so a tick pays nothing for the
+        hash and a read costs O(changes). Equal states hash equal in any
+        process. Timers, the clock and the RNG are not part of it. After
+        editing entities directly, call ``rehash``.
+        """
+        moved = self._moved
+        if moved:
+            for player_id, player in moved.items():
+                key = position_key(player)
+                self._entity_hash ^= self._position_keys[player_id] ^ key
+                self._position_keys[player_id] = key
+            moved.clear()
+        return self._entity_hash ^ self.arena.zobrist
+
+    def rehash(self) -> None:
+        """Re-derives the player and bomb part of ``zobrist`` from the entity lists; O(entities)."""
+        value = self._layout_key
+        self._position_keys = {}
+        self._stats_keys = {}
+        self._moved.clear()
+        for player_id, player in self.players.items():
+            key = self._position_keys[player_id] = position_key(player)
+            value ^= key
+            key = self._stats_keys[player_id] = stats_key(player)
+            value ^= key
+        for bomb in self.bombs:
+            value ^= bomb_key(bomb)
+        self._entity_hash = value
+
+    def verify_zobrist(self) -> None:
+        """Recomputes the hash from scratch; raises if the incremental one has drifted."""
+        expected = state_hash(self)
+        if self.zobrist != expected:
+            raise AssertionError(f"zobrist hash out of sync: {self.zobrist:#018x} vs {expected:#018x}")
+
+    def _restat(self, player: Player) -> None:
+        key = stats_key(player)
+        self._entity_hash ^= self._stats_keys[player.player_id] ^ key
+        self._stats_keys[player.player_id] = key
+
+    @property
+    def clock(self) -> float:
+        """Simulated seconds since the round started."""
+        return self.bomb_timers.now
+
+    def set_clock(self, now: float) -> None:
+        self.bomb_timers.now = self.explosion_timers.now = now
 
     def update(self, dt: float, inputs: InputBuffer) -> MatchResult:
+        result = self.result
         if self.round_over:
-            return MatchResult(True, self.winner)
+            result.round_over = True
+            result.winner = self.winner
+            return result
 
+        if dt < 1.5 * FIXED_TIMESTEP:
+            self._advance(dt, self.clock + dt, inputs, True)
+        else:
+            self._advance_coarse(dt, inputs)
+
+        inputs.clear()
+        result.round_over = self.round_over
+        result.winner = self.winner
+        return result
+
+    def _advance_coarse(self, dt: float, inputs: InputBuffer) -> None:
+        # a coarse step is cut after the tick each timer runs out in, so blasts see that tick's positions,
+        # and after its first tick when a bomb is dropped, so the bomb lands where that tick left its owner
+        ticks = round(dt / FIXED_TIMESTEP)
+        piece = dt / ticks
+        place_bombs = True
+        dropping = any(player.alive and inputs.get_state(player_id).place_bomb
+                       for player_id, player in self.players.items())
+        while ticks and not self.round_over:
+            deadline = self._next_deadline()
+            limit = 1 if dropping and place_bombs else ticks
+            now = self.clock
+            taken = 0
+            # repeated addition reproduces the clock of stepping tick by tick exactly
+            while taken < limit:
+                now += piece
+                taken += 1
+                if now >= deadline:
+                    break
+            self._advance(taken * piece, now, inputs, place_bombs)
+            ticks -= taken
+            place_bombs = False
+
+    def _advance(self, dt: float, now: float, inputs: InputBuffer, place_bombs: bool) -> None:
         for player_id, player in self.players.items():
             if not player.alive:
                 continue
             state = inputs.get_state(player_id)
             self._apply_player_input(player, state, dt)
-            if state.place_bomb:
+            if place_bombs and state.place_bomb:
                 self._try_place_bomb(player)
 
-        self._update_bombs(dt)
-        self._update_explosions(dt)
+        self._update_bombs(now)
+        self._update_explosions(now)
+        self.set_clock(now)
         self._check_powerup_pickups()
         self._determine_round_winner()
-
-        inputs.clear()
-        return MatchResult(self.round_over, self.winner)
+        if self.debug:
+            self.occupancy.verify(self.bombs, self.players.values())
+            self.verify_zobrist()
 
     def _apply_player_input(self, player: Player, state: InputState, dt: float) -> None:
         move_x, move_y = state.move
         if move_x == 0 and move_y == 0:
             return
-        desired = (player.position[0] + move_x * player.speed * dt,
-                   player.position[1] + move_y * player.speed * dt)
-        player.position = self._resolve_movement(player, desired)
+        x, y = player.position
+        stride = player.speed * dt
+        # single ticks alternate the axes, so a coarse diagonal stride is walked in tick-sized pieces;
+        # a straight one is swept in one go
+        steps = round(dt / FIXED_TIMESTEP) if move_x and move_y else 1
+        if steps > 1:
+            self._walk_diagonal(player, move_x, move_y, stride / steps, steps)
+            return
+        position = self._resolve_movement(player, (x + move_x * stride, y + move_y * stride))
+        if position is not player.position:
+            player.position = position
+            self.occupancy.move_player(player)
+            self._moved[player.player_id] = player
+
+    def _walk_diagonal(self, player: Player, move_x: float, move_y: float, stride: float, steps: int) -> None:
+        """Moves as ``steps`` single ticks would, each sweeping x and then y in the lane the last one left."""
+        start = player.position
+        for _ in range(steps):
+            x, y = player.position
+            position = self._resolve_movement(player, (x + move_x * stride, y + move_y * stride))
+            if position is player.position:
+                break
+            player.position = position
+        if player.position is not start:
+            self.occupancy.move_player(player)
+            self._moved[player.player_id] = player
 
     def _resolve_movement(self, player: Player, desired: tuple[float, float]) -> tuple[float, float]:
-        current_x, current_y = player.position
+        """Sweeps along x, then along y; each axis stops at the edge of the first closed tile on its way.
+
+        The tile the player stands in never blocks, so a player can walk off a
+        bomb it just dropped. Since nothing is skipped, one long stride along
+        an axis ends where many short ones would. Returns ``player.position``
+        itself when neither axis moves.
+        """
+        x, y = player.position
         new_x, new_y = desired
-        rx, ry = self._move_axis((current_x, current_y), (new_x, current_y))
-        fx, fy = self._move_axis((rx, ry), (rx, new_y))
-        return fx, fy
-
-    def _move_axis(self, start: tuple[float, float], end: tuple[float, float]) -> tuple[float, float]:
-        sx, sy = start
-        ex, ey = end
-        target_tile = (int(round(ex)), int(round(ey)))
-        if not self._tile_is_open(target_tile[0], target_tile[1]):
-            return sx, sy
-        return ex, ey
+        if new_x != x:
+            new_x = self._sweep(x, new_x, player.tile_position()[1], True)
+        if new_y != y:
+            new_y = self._sweep(y, new_y, int(round(new_x)), False)
+        if new_x == x and new_y == y:
+            return player.position
+        return (new_x, new_y)
+
+    def _sweep(self, start: float, end: float, lane: int, along_x: bool) -> float:
+        """How far from ``start`` towards ``end`` one axis gets along row (or column) ``lane``."""
+        tile = int(round(start))
+        last = int(round(end))
+        step = 1 if last > tile else -1
+        while tile != last:
+            ahead = tile + step
+            if not (self._tile_is_open(ahead, lane) if along_x else self._tile_is_open(lane, ahead)):
+                return tile_edge(tile, step)
+            tile = ahead
+        return end
 
     def _tile_is_open(self, tx: int, ty: int) -> bool:
-        if not self.arena.in_bounds(tx, ty):
+        if not self.arena.is_walkable(tx, ty):
             return False
-        tile = self.arena.get_tile(tx, ty)
-        if tile.tile_type in (TileType.SOLID, TileType.DESTRUCTIBLE):
-            return False
-        if any(bomb.tile_position() == (tx, ty) for bomb in self.bombs):
-            return False
-        return True
+        bombs = self.occupancy.bombs
+        return not bombs or (tx, ty) not in bombs
 
     def _try_place_bomb(self, player: Player) -> None:
         if player.active_bombs >= player.bomb_capacity:
             return
         tile_pos = player.tile_position()
-        if any(bomb.tile_position() == tile_pos for bomb in self.bombs):
+        if self.occupancy.has_bomb(tile_pos):
             return
-        bomb = Bomb(player.player_id, tile_pos, BOMB_TIMER, player.flame_length)
-        self.bombs.append(bomb)
+        self.add_bomb(Bomb(player.player_id, tile_pos, BOMB_TIMER, player.flame_length))
         player.active_bombs += 1
+        self._restat(player)
+        self.bombs_placed += 1
 
-    def _update_bombs(self, dt: float) -> None:
-        for bomb in list(self.bombs):
-            bomb.timer -= dt
-            if bomb.timer <= 0:
-                self._explode_bomb(bomb)
+    def add_bomb(self, bomb: Bomb) -> None:
+        """Places a bomb and starts its fuse from ``bomb.timer``."""
+        self.bombs.append(bomb)
+        self.occupancy.add_bomb(bomb)
+        self._entity_hash ^= bomb_key(bomb)
+        self.bomb_timers.schedule(bomb, bomb.timer)
+        self.bomb_version += 1
+        self.danger.add_bomb(bomb)
+
+    def _update_bombs(self, now: float) -> None:
+        # everything that happens this tick happens at ``clock``; timers expire at the tick's end, ``now``
+        pop_due = self.bomb_timers.pop_due
+        bomb = pop_due(now)
+        while bomb is not None:
+            self._explode_bomb(bomb)
+            bomb = pop_due(now)
 
     def _explode_bomb(self, bomb: Bomb) -> None:
         if bomb not in self.bombs:
             return
+        # fuses share one length, so the bomb going off is almost always at the front
         self.bombs.remove(bomb)
+        self.bomb_timers.cancel(bomb)
+        self.occupancy.remove_bomb(bomb)
+        self._entity_hash ^= bomb_key(bomb)
+        self.bomb_version += 1
+        self.danger.invalidate()
         owner = self.players.get(bomb.owner_id)
         if owner:
             owner.active_bombs = max(0, owner.active_bombs - 1)
-        tiles = self._collect_explosion_tiles(bomb)
-        self.explosions.append(Explosion(tiles, EXPLOSION_DURATION))
-        self._apply_explosion_effects(tiles)
+            self._restat(owner)
+        explosion = Explosion.from_blast(bomb.tile_position(), self._blast_reach(bomb), EXPLOSION_DURATION)
+        self.explosions.append(explosion)
+        self.explosion_timers.schedule(explosion, EXPLOSION_DURATION)
+        self._apply_explosion_effects(explosion)
 
-    def _collect_explosion_tiles(self, bomb: Bomb) -> List[tuple[int, int]]:
+    def _blast_reach(self, bomb: Bomb) -> Reach:
         cx, cy = bomb.tile_position()
-        tiles = [(cx, cy)]
-        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            for step in range(1, bomb.flame_length + 1):
-                tx, ty = cx + dx * step, cy + dy * step
-                if not self.arena.in_bounds(tx, ty):
-                    break
-                tile = self.arena.get_tile(tx, ty)
-                tiles.append((tx, ty))
-                if tile.tile_type == TileType.SOLID:
-                    tiles.pop()  # cannot occupy solid tile
-                    break
-                if tile.tile_type == TileType.DESTRUCTIBLE:
-                    break
-        return tiles
+        return self.arena.blast_reach(cx, cy, bomb.flame_length)
+
+    def _apply_explosion_effects(self, explosion: Explosion) -> None:
+        if explosion.reach is None:
+            self._apply_tile_effects(explosion.tiles)
+            return
+        (cx, cy), reach = explosion.center, explosion.reach
+        # rays stop on the first crate, so only the centre and the ends of the rays can hold one;
+        # they are visited in tile order to keep power-up rolls identical
+        ends = [(cx, cy)]
+        ends.extend((cx + dx * length, cy + dy * length)
+                    for (dx, dy), length in zip(BLAST_DIRECTIONS, reach) if length)
+        self._break_crates(ends)
 
-    def _apply_explosion_effects(self, tiles: List[tuple[int, int]]) -> None:
+        # hit-test whichever side is smaller: the blast's tiles or the occupied tiles
+        span = 1 + sum(reach)
+        occupancy = self.occupancy
+        if len(occupancy.players) <= span:
+            for (tx, ty), occupants in occupancy.players.items():
+                if blast_covers(cx, cy, reach, tx, ty):
+                    for player in occupants:
+                        player.alive = False
+                        self._restat(player)
+        else:
+            for tile in explosion.tiles:
+                for player in occupancy.players_at(tile):
+                    player.alive = False
+                    self._restat(player)
+
+        # chain reaction: explode bombs caught in blast right away, in placement order;
+        # their queue entries are cancelled rather than rescheduled to now
+        if len(self.bombs) <= span:
+            caught = [bomb for bomb in self.bombs if blast_covers(cx, cy, reach, *bomb.tile_position())]
+        else:
+            caught = occupancy.bombs_in(explosion.tiles)
+        for bomb in caught:
+            self._explode_bomb(bomb)
+
+    def _apply_tile_effects(self, tiles: List[tuple[int, int]]) -> None:
+        """Effects of flames on arbitrary tiles, for explosions that are not a single blast."""
+        self._break_crates(tiles)
+        for tile in tiles:
+            for player in self.occupancy.players_at(tile):
+                player.alive = False
+                self._restat(player)
+        for bomb in self.occupancy.bombs_in(tiles):
+            self._explode_bomb(bomb)
+
+    def _break_crates(self, tiles: List[tuple[int, int]]) -> None:
         for tx, ty in tiles:
-            tile = self.arena.get_tile(tx, ty)
-            if tile.tile_type == TileType.DESTRUCTIBLE:
+            if self.arena.get_tile(tx, ty).tile_type == TileType.DESTRUCTIBLE:
                 destroyed = self.arena.destroy_tile(tx, ty)
-                if destroyed and random.random() < POWERUP_SPAWN_CHANCE:
-                    power_type = random.choice([PowerUpType.BOMB, PowerUpType.FLAME])
-                    self.arena.place_powerup(tx, ty, power_type)
-                    self.powerups.append(PowerUp((tx, ty), power_type))
-            for player in self.players.values():
-                if player.alive and player.tile_position() == (tx, ty):
-                    player.alive = False
+                self._rng_state = None
+                self.danger.invalidate()
+                if destroyed and self.rng.random() < POWERUP_SPAWN_CHANCE:
+                    power_type = self.rng.choice([PowerUpType.BOMB, PowerUpType.FLAME])
+                    self.spawn_powerup(tx, ty, power_type)
+
+    def spawn_powerup(self, tx: int, ty: int, power_type: PowerUpType) -> None:
+        self.arena.place_powerup(tx, ty, power_type)
 
-        # chain reaction: explode bombs caught in blast
-        for bomb in list(self.bombs):
-            if bomb.tile_position() in tiles:
-                bomb.timer = 0
-                self._explode_bomb(bomb)
+    @property
+    def powerups(self) -> Tuple[PowerUp, ...]:
+        """Power-ups lying in the arena, as views derived from its power-up layer (read-only)."""
+        version = self.arena.version
+        if self._powerups[0] != version:
+            views = tuple(PowerUp(tile, powerup) for tile, powerup in self.arena.powerup_tiles())
+            self._powerups = (version, views)
+        return self._powerups[1]
 
-    def _update_explosions(self, dt: float) -> None:
-        for explosion in list(self.explosions):
-            explosion.timer -= dt
-            if explosion.timer <= 0:
-                self.explosions.remove(explosion)
+    def _update_explosions(self, now: float) -> None:
+        pop_due = self.explosion_timers.pop_due
+        explosion = pop_due(now)
+        while explosion is not None:
+            self.explosions.remove(explosion)
+            explosion = pop_due(now)
 
     def _check_powerup_pickups(self) -> None:
         for player in self.players.values():
             if not player.alive:
                 continue
             tx, ty = player.tile_position()
-            tile = self.arena.get_tile(tx, ty)
-            if tile.powerup:
-                powerup_type = tile.powerup
-                tile.powerup = None
-                self.powerups = [p for p in self.powerups if p.position != (tx, ty)]
+            powerup_type = self.arena.collect_powerup(tx, ty)
+            if powerup_type:
                 if powerup_type == PowerUpType.BOMB:
                     player.bomb_capacity += 1
                 elif powerup_type == PowerUpType.FLAME:
                     player.flame_length += 1
+                self._restat(player)
 
     def _determine_round_winner(self) -> None:
-        living = [player_id for player_id, player in self.players.items() if player.alive]
-        if len(living) <= 1:
-            self.round_over = True
-            self.winner = living[0] if living else None
-            if self.winner:
-                self.players[self.winner].score += 1
+        winner = None
+        for player_id, player in self.players.items():
+            if player.alive:
+                if winner is not None:
+                    return
+                winner = player_id
+        self.round_over = True
+        self.winner = winner
+        if winner:
+            self.players[winner].score += 1
+            self._restat(self.players[winner])
 
     def reset_round(self) -> None:
         self.spawn_players()
+
+    def reset_match(self, seed: Optional[int] = None) -> None:
+        """Starts a new match in place: scores and statistics cleared, RNG reseeded."""
+        for player in self.players.values():
+            player.score = 0
+        self.seed = seed
+        self.rng.seed(seed)
+        self._rng_state = None
+        self.bombs_placed = 0
+        self.spawn_players()
+
+    def snapshot(self) -> Snapshot:
+        """Captures every mutable field, including the RNG, in a compact immutable form."""
+        return capture(self)
+
+    def restore(self, snap: Snapshot) -> None:
+        restore(self, snap)
+
+    def rng_state(self) -> tuple:
+        if self._rng_state is None:
+            self._rng_state = self.rng.getstate()
+        return self._rng_state
+
+    def set_rng_state(self, rng_state: tuple) -> None:
+        if rng_state is not self._rng_state:
+            self.rng.setstate(rng_state)
+            self._rng_state = rng_state
+
+    def next_event_in(self) -> Optional[float]:
+        """Seconds until the next bomb or explosion timer runs out, or None if nothing is ticking."""
+        deadline = self._next_deadline()
+        return deadline - self.clock if deadline != INF else None
+
+    def _next_deadline(self) -> float:
+        deadlines = [deadline for deadline in (self.bomb_timers.next_deadline(),
+                                               self.explosion_timers.next_deadline()) if deadline is not None]
+        return min(deadlines) if deadlines else INF
+
+    def skip_idle(self, dt: float, max_ticks: int) -> int:
+        """Jumps over up to ``max_ticks`` ticks with no input, stopping before the next timer fires.
+
+        Without input nobody moves, so only timers can change the state; the
+        result is identical to calling ``update(dt, empty_buffer)`` that many
+        times. Returns the number of ticks skipped.
+        """
+        if self.round_over:
+            return 0
+        deadline = self._next_deadline()
+        clock = self.clock
+        ticks = 0
+        # repeated addition reproduces the clock of stepping tick by tick exactly
+        while ticks < max_ticks and clock + dt < deadline:
+            clock += dt
+            ticks += 1
+        self.set_clock(clock)
+        return ticks
+
+    def rebuild_occupancy(self) -> None:
+        """Re-derives the occupancy index and ``zobrist`` from the entity lists after bulk edits."""
+        self.occupancy.clear()
+        for player in self.players.values():
+            self.occupancy.add_player(player)
+        for bomb in self.bombs:
+            self.occupancy.add_bomb(bomb)
+        self.bomb_version += 1
+        self.danger.invalidate()
+        self.rehash()
@@ -1,46 +1,191 @@
 from __future__ import annotations
 
-from typing import Dict
+import time
+from typing import Dict, List, Optional, Tuple, Union
 
 import pygame
 
-from .entities import InputBuffer, InputState
+from .entities import (
+    ACTION_BOMB,
+    ACTION_DOWN,
+    ACTION_INPUTS,
+    ACTION_LEFT,
+    ACTION_RIGHT,
+    ACTION_UP,
+    InputBuffer,
+)
+from .profiling import Pacing
+
+# a control is a key code, ("button", pad, button), ("hat", pad, hat, x, y) or ("axis", pad, axis, sign);
+# pads are numbered in the order they are plugged in
+Control = Union[int, Tuple]
+BINDING_ACTIONS = {"left": ACTION_LEFT, "right": ACTION_RIGHT, "up": ACTION_UP, "down": ACTION_DOWN,
+                   "bomb": ACTION_BOMB}
+# how far a stick has to lean before it counts as a direction
+AXIS_DEADZONE = 0.5
+
+
+def pad_bindings(pad: int) -> Dict[str, List[Control]]:
+    """D-pad (hat 0), left stick and the first face button of one gamepad."""
+    return {
+        "left": [("hat", pad, 0, -1, 0), ("axis", pad, 0, -1)],
+        "right": [("hat", pad, 0, 1, 0), ("axis", pad, 0, 1)],
+        "up": [("hat", pad, 0, 0, 1), ("axis", pad, 1, -1)],
+        "down": [("hat", pad, 0, 0, -1), ("axis", pad, 1, 1)],
+        "bomb": [("button", pad, 0)],
+    }
 
 
 class KeyboardController:
+    """Turns key and gamepad events into per-player action bytes, one ``poll`` per simulation tick.
+
+    Feed every pygame event to ``handle_event``; it keeps each player's
+    held controls. A press also latches until the next ``poll``, so a tap
+    that starts and ends between two ticks still reaches the simulation.
+    Every event that changes a player's action is timestamped. When
+    ``frame_shown`` is called right after the display is flipped, the time
+    from that event to the first flip after the tick that consumed it goes
+    into the player's ``latency`` window.
+    """
+
     def __init__(self) -> None:
-        self.bindings: Dict[int, Dict[str, int]] = {
+        self.bindings: Dict[int, Dict[str, List[Control]]] = {
             1: {
-                "up": pygame.K_w,
-                "down": pygame.K_s,
-                "left": pygame.K_a,
-                "right": pygame.K_d,
-                "bomb": pygame.K_SPACE,
+                "up": [pygame.K_w],
+                "down": [pygame.K_s],
+                "left": [pygame.K_a],
+                "right": [pygame.K_d],
+                "bomb": [pygame.K_SPACE],
             },
             2: {
-                "up": pygame.K_UP,
-                "down": pygame.K_DOWN,
-                "left": pygame.K_LEFT,
-                "right": pygame.K_RIGHT,
-                "bomb": pygame.K_RETURN,
+                "up": [pygame.K_UP],
+                "down": [pygame.K_DOWN],
+                "left": [pygame.K_LEFT],
+                "right": [pygame.K_RIGHT],
+                "bomb": [pygame.K_RETURN],
             },
         }
+        for player_id, binding in self.bindings.items():
+            for name, controls in pad_bindings(player_id - 1).items():
+                binding[name].extend(controls)
+        self.latency: Dict[int, Pacing] = {player_id: Pacing() for player_id in self.bindings}
+        self._pads: Dict[int, int] = {}
+        self._joysticks: Dict[int, "pygame.joystick.JoystickType"] = {}
+        self.rebind()
 
-    def poll(self, buffer: InputBuffer) -> None:
-        keys = pygame.key.get_pressed()
+    def rebind(self) -> None:
+        """Rebuilds the control lookup; call after editing ``bindings``."""
+        self._controls: Dict[Control, List[Tuple[int, int]]] = {}
         for player_id, binding in self.bindings.items():
-            move_x = 0.0
-            move_y = 0.0
-            if keys[binding["left"]]:
-                move_x -= 1
-            if keys[binding["right"]]:
-                move_x += 1
-            if keys[binding["up"]]:
-                move_y -= 1
-            if keys[binding["down"]]:
-                move_y += 1
-            if move_x and move_y:
-                move_x *= 0.7071
-                move_y *= 0.7071
-            place_bomb = keys[binding["bomb"]]
-            buffer.set_state(player_id, InputState(move=(move_x, move_y), place_bomb=place_bomb))
+            self.latency.setdefault(player_id, Pacing())
+            for name, controls in binding.items():
+                for control in controls:
+                    self._controls.setdefault(control, []).append((player_id, BINDING_ACTIONS[name]))
+        # analogue controls report a value per pad and axis or hat, not per direction
+        self._analogue: Dict[Tuple, List[Tuple[Control, int, int]]] = {}
+        for control, targets in self._controls.items():
+            if isinstance(control, tuple) and control[0] in ("hat", "axis"):
+                for player_id, bit in targets:
+                    self._analogue.setdefault(control[:3], []).append((control, player_id, bit))
+        self._held: Dict[int, Dict[Control, int]] = {player_id: {} for player_id in self.bindings}
+        self._latched = {player_id: 0 for player_id in self.bindings}
+        self._action = {player_id: 0 for player_id in self.bindings}
+        # earliest unconsumed change per player, then changes consumed by a tick but not yet on screen
+        self._pending: Dict[int, int] = {}
+        self._consumed: Dict[int, int] = {}
+
+    def handle_event(self, event: pygame.event.Event, stamp: Optional[int] = None) -> bool:
+        """Applies one pygame event; True if it was an input event this controller cares about."""
+        kind = event.type
+        if kind == pygame.KEYDOWN or kind == pygame.KEYUP:
+            targets = self._controls.get(event.key)
+            if targets is None:
+                return False
+            self._set(event.key, targets, kind == pygame.KEYDOWN, stamp)
+        elif kind == pygame.JOYBUTTONDOWN or kind == pygame.JOYBUTTONUP:
+            control = ("button", self._pad(event), event.button)
+            targets = self._controls.get(control)
+            if targets is None:
+                return False
+            self._set(control, targets, kind == pygame.JOYBUTTONDOWN, stamp)
+        elif kind == pygame.JOYHATMOTION or kind == pygame.JOYAXISMOTION:
+            hat = kind == pygame.JOYHATMOTION
+            key = ("hat" if hat else "axis", self._pad(event), event.hat if hat else event.axis)
+            analogue = self._analogue.get(key)
+            if analogue is None:
+                return False
+            for control, player_id, bit in analogue:
+                if hat:
+                    x, y = event.value
+                    active = (control[3] == 0 or x == control[3]) and (control[4] == 0 or y == control[4])
+                else:
+                    active = event.value * control[3] > AXIS_DEADZONE
+                self._set(control, ((player_id, bit),), active, stamp)
+        elif kind == pygame.JOYDEVICEADDED:
+            joystick = pygame.joystick.Joystick(event.device_index)
+            self._joysticks[joystick.get_instance_id()] = joystick
+            self._pads.setdefault(joystick.get_instance_id(), len(self._pads))
+        elif kind == pygame.WINDOWFOCUSLOST:
+            # key-ups are not delivered to an unfocused window
+            for player_id, held in self._held.items():
+                held.clear()
+                self._changed(player_id, stamp)
+        else:
+            return False
+        return True
+
+    def _pad(self, event: pygame.event.Event) -> int:
+        instance = getattr(event, "instance_id", event.joy)
+        return self._pads.setdefault(instance, len(self._pads))
+
+    def _set(self, control: Control, targets, pressed: bool, stamp: Optional[int]) -> None:
+        for player_id, bit in targets:
+            held = self._held[player_id]
+            if pressed:
+                if control in held:
+                    continue
+                held[control] = bit
+                self._latched[player_id] |= bit
+            elif held.pop(control, None) is None:
+                continue
+            self._changed(player_id, stamp)
+
+    def _changed(self, player_id: int, stamp: Optional[int]) -> None:
+        action = self._latched[player_id]
+        for bit in self._held[player_id].values():
+            action |= bit
+        if action != self._action[player_id]:
+            self._action[player_id] = action
+            if player_id not in self._pending:
+                self._pending[player_id] = time.perf_counter_ns() if stamp is None else stamp
+
+    def poll(self, buffer: InputBuffer) -> None:
+        """Writes every player's action for the next tick and releases latched presses."""
+        for player_id, held in self._held.items():
+            action = self._latched[player_id]
+            for bit in held.values():
+                action |= bit
+            # decode through the shared per-action states instead of building one per player per frame
+            buffer.set_state(player_id, ACTION_INPUTS[action])
+            stamp = self._pending.pop(player_id, None)
+            if stamp is not None:
+                self._consumed.setdefault(player_id, stamp)
+            if self._latched[player_id]:
+                # a released latch is not a new input, so it is not timed
+                self._latched[player_id] = 0
+                action = 0
+                for bit in held.values():
+                    action |= bit
+            self._action[player_id] = action
+
+    def frame_shown(self, now: Optional[int] = None) -> None:
+        """Call right after ``display.flip``/``update``: closes the latency of every consumed input."""
+        if not self._consumed:
+            return
+        now = time.perf_counter_ns() if now is None else now
+        for player_id, stamp in self._consumed.items():
+            self.latency[player_id].add(now - stamp)
+        self._consumed.clear()
+
+    def latency_summary(self) -> Dict[int, Dict[str, float]]:
+        return {player_id: pacing.summary() for player_id, pacing in self.latency.items() if pacing.samples}
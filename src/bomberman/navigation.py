@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import heapq
+from array import array
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple, Union
+
+from .arena import BLAST_DIRECTIONS, LAYOUT_CACHE_SIZE, TILE_CODES, blast_tiles
+from .config import TileType
+from .entities import Bomb
+
+if TYPE_CHECKING:
+    from .game_state import GameState
+
+TilePos = Tuple[int, int]
+INF = float("inf")
+# flow directions: index into BLAST_DIRECTIONS, or NO_STEP at a target or where nothing is reachable
+NO_STEP = 255
+UNREACHABLE = -1
+# maps tile codes to 1 for floor, 0 otherwise
+_FLOOR_MASK = bytes(code == TILE_CODES[TileType.FLOOR] for code in range(256))
+_FLOOR = TILE_CODES[TileType.FLOOR]
+_CRATE = TILE_CODES[TileType.DESTRUCTIBLE]
+
+
+def _is_crate_front(cells: Union[bytes, bytearray], width: int, height: int, i: int) -> bool:
+    """Whether tile ``i`` is floor with a crate next to it, i.e. a bomb there would break something."""
+    if cells[i] != _FLOOR:
+        return False
+    x = i % width
+    return ((x > 0 and cells[i - 1] == _CRATE) or (x < width - 1 and cells[i + 1] == _CRATE)
+            or (i >= width and cells[i - width] == _CRATE)
+            or (i < width * (height - 1) and cells[i + width] == _CRATE))
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _layout_crate_fronts(template: bytes, width: int, height: int) -> FrozenSet[int]:
+    return frozenset(i for i in range(width * height) if _is_crate_front(template, width, height, i))
+
+
+class DangerMap:
+    """Earliest detonation time of any pending bomb over every tile, chain reactions included.
+
+    Times are absolute deadlines on the round clock, so the map does not
+    change as time passes; it only changes when a bomb is placed, goes off or
+    a crate breaks. A placed bomb is folded in incrementally (it can only
+    make tiles more dangerous); anything else marks the map stale and it is
+    rebuilt on the next query. Blasts are measured against the crates standing
+    now. Call ``invalidate`` after editing bomb timers by hand.
+    """
+
+    def __init__(self, state: "GameState") -> None:
+        self.state = state
+        self.width = state.arena.width
+        self._clear = array("d", [INF]) * (state.arena.width * state.arena.height)
+        self.times = array("d", self._clear)
+        # effective detonation time per bomb tile, after chains
+        self.bomb_times: Dict[TilePos, float] = {}
+        self.version = 0
+        self._stale = True
+
+    def invalidate(self) -> None:
+        self._stale = True
+        self.version += 1
+
+    def add_bomb(self, bomb: Bomb) -> None:
+        if self._stale:
+            return
+        tx, ty = bomb.tile_position()
+        # a bomb already inside another blast goes off with it at the latest
+        self._spread([(min(bomb.deadline, self.times[ty * self.width + tx]), 0, bomb)])
+        self.version += 1
+
+    def _rebuild(self) -> None:
+        self.times[:] = self._clear
+        self.bomb_times.clear()
+        self._spread([(bomb.deadline, order, bomb) for order, bomb in enumerate(self.state.bombs)])
+        self._stale = False
+
+    def _spread(self, heap: List[Tuple[float, int, Bomb]]) -> None:
+        """Dijkstra over bombs: each one lights its blast and hands its time to the bombs it catches."""
+        state = self.state
+        arena = state.arena
+        bombs = state.occupancy.bombs
+        times = self.times
+        bomb_times = self.bomb_times
+        width = self.width
+        heapq.heapify(heap)
+        order = len(heap)
+        while heap:
+            when, _, bomb = heapq.heappop(heap)
+            cx, cy = bomb.tile_position()
+            if bomb_times.get((cx, cy), INF) <= when:
+                continue
+            bomb_times[(cx, cy)] = when
+            for tile in blast_tiles(cx, cy, arena.blast_reach(cx, cy, bomb.flame_length)):
+                i = tile[1] * width + tile[0]
+                if when < times[i]:
+                    times[i] = when
+                caught = bombs.get(tile)
+                if caught is not None and bomb_times.get(tile, INF) > when:
+                    order += 1
+                    heapq.heappush(heap, (when, order, caught))
+
+    def time_at(self, tx: int, ty: int) -> float:
+        """Absolute time the tile next gets hit, or ``inf`` if no pending bomb reaches it."""
+        if self._stale:
+            self._rebuild()
+        return self.times[ty * self.width + tx]
+
+    def time_left(self, tx: int, ty: int) -> float:
+        return self.time_at(tx, ty) - self.state.clock
+
+    def is_safe(self, tx: int, ty: int) -> bool:
+        return self.time_at(tx, ty) == INF
+
+    def threatened(self) -> List[TilePos]:
+        if self._stale:
+            self._rebuild()
+        width = self.width
+        return [(i % width, i // width) for i, when in enumerate(self.times) if when != INF]
+
+
+class FlowField:
+    """Distance from every tile to the nearest of a set of targets, plus the first step to take.
+
+    Routes only pass through open tiles (floor without a bomb), but a route
+    may start on a blocked tile, so a player standing on a bomb still gets
+    a way off it.
+    """
+
+    def __init__(self, width: int, distance: array, steps: bytearray) -> None:
+        self.width = width
+        self.distance_map = distance
+        self.steps = steps
+
+    def distance(self, tx: int, ty: int) -> int:
+        """Steps to the nearest target, or ``UNREACHABLE``."""
+        return self.distance_map[ty * self.width + tx]
+
+    def direction(self, tx: int, ty: int) -> Optional[TilePos]:
+        """The unit step towards the nearest target, or None at a target or when none is reachable."""
+        step = self.steps[ty * self.width + tx]
+        return None if step == NO_STEP else BLAST_DIRECTIONS[step]
+
+    def path(self, tx: int, ty: int) -> List[TilePos]:
+        """Tiles from (tx, ty) to the nearest target, both ends included; empty if unreachable."""
+        if self.distance(tx, ty) == UNREACHABLE:
+            return []
+        tiles = [(tx, ty)]
+        step = self.direction(tx, ty)
+        while step is not None:
+            tx, ty = tx + step[0], ty + step[1]
+            tiles.append((tx, ty))
+            step = self.direction(tx, ty)
+        return tiles
+
+
+class FlowFieldCache:
+    """Flow fields and reachability maps shared by every bot, cached per arena and bomb layout.
+
+    Each field costs one breadth-first search when first asked for; after
+    that every lookup is an array index until a bomb is placed or goes off or
+    the arena changes, which drops the whole cache.
+    """
+
+    def __init__(self, state: "GameState", size: int = 64) -> None:
+        self.state = state
+        self.size = size
+        self.fields: "OrderedDict[Hashable, FlowField]" = OrderedDict()
+        self._version: Optional[tuple] = None
+        self._floor = bytearray()
+        self._open = bytearray()
+        # floor tiles next to a crate, kept in step with the arena's change log
+        self._fronts: Set[int] = set()
+        self._fronts_at = (-1, 0)
+        self.searches = 0
+
+    def version(self) -> tuple:
+        return self.state.arena.version, self.state.bomb_version
+
+    def _current(self) -> None:
+        version = self.version()
+        if version != self._version:
+            self.fields.clear()
+            self._version = version
+            arena = self.state.arena
+            self._floor = arena.cells.translate(_FLOOR_MASK)
+            self._open = bytearray(self._floor)
+            for tx, ty in self.state.occupancy.bombs:
+                self._open[ty * arena.width + tx] = 0
+
+    def is_open(self, tx: int, ty: int) -> bool:
+        self._current()
+        return bool(self._open[ty * self.state.arena.width + tx])
+
+    def _cached(self, key: Hashable) -> Optional[FlowField]:
+        self._current()
+        field = self.fields.get(key)
+        if field is not None:
+            self.fields.move_to_end(key)
+        return field
+
+    def _store(self, key: Hashable, field: FlowField) -> FlowField:
+        self.fields[key] = field
+        if len(self.fields) > self.size:
+            self.fields.popitem(last=False)
+        self.searches += 1
+        return field
+
+    def toward(self, targets: Union[Iterable[TilePos], Callable[[], Iterable[TilePos]]],
+               key: Optional[Hashable] = None) -> FlowField:
+        """Field leading to the nearest of ``targets``.
+
+        With a ``key`` the target set is not hashed, and ``targets`` may be a
+        function that is only called when the field has to be searched.
+        """
+        if key is None:
+            targets = frozenset(targets)
+            key = targets
+        key = ("toward", key)
+        field = self._cached(key)
+        if field is not None:
+            return field
+        if callable(targets):
+            targets = targets()
+        return self._store(key, self._search(targets, reverse=True))
+
+    def from_tile(self, tx: int, ty: int) -> FlowField:
+        """Distances from (tx, ty) to every tile, following legal moves (``direction`` is unused)."""
+        key = ("from", tx, ty)
+        field = self._cached(key)
+        if field is not None:
+            return field
+        return self._store(key, self._search(((tx, ty),), reverse=False))
+
+    def crate_fronts(self) -> FlowField:
+        """Field leading to the nearest floor tile next to a crate, where a bomb would break something."""
+        key = ("crate_fronts",)
+        field = self._cached(key)
+        if field is not None:
+            return field
+        width = self.state.arena.width
+        targets = [(i % width, i // width) for i in sorted(self._crate_fronts())]
+        return self._store(key, self._search(targets, reverse=True))
+
+    def _crate_fronts(self) -> Set[int]:
+        """The front set, brought up to date by re-checking only the tiles logged since the last call."""
+        arena = self.state.arena
+        width, height = arena.width, arena.height
+        generation, seen = self._fronts_at
+        if generation != arena.generation:
+            self._fronts = set(_layout_crate_fronts(arena._template, width, height))
+            seen = 0
+        fronts = self._fronts
+        cells = arena.cells
+        changes = arena.changes
+        for tx, ty in changes[seen:]:
+            for x, y in ((tx, ty), (tx - 1, ty), (tx + 1, ty), (tx, ty - 1), (tx, ty + 1)):
+                if 0 <= x < width and 0 <= y < height:
+                    i = y * width + x
+                    if _is_crate_front(cells, width, height, i):
+                        fronts.add(i)
+                    else:
+                        fronts.discard(i)
+        self._fronts_at = (arena.generation, len(changes))
+        return fronts
+
+    def escape(self, tx: int, ty: int, flame: int) -> Tuple[int, Optional[TilePos]]:
+        """Steps from (tx, ty) out of a blast of ``flame`` set off there, and the first step to take.
+
+        The way out of a blast's cross is straight along one ray and then one
+        step aside, or one step past its end, so only the tiles along the rays
+        are looked at: O(flame), no search. The tile reached must be open and
+        unthreatened. Returns ``(UNREACHABLE, None)`` when there is none.
+        """
+        self._current()
+        arena = self.state.arena
+        width, height = arena.width, arena.height
+        open_tiles = self._open
+        danger = self.state.danger
+        best, first = UNREACHABLE, None
+        for (dx, dy), length in zip(BLAST_DIRECTIONS, arena.blast_reach(tx, ty, flame)):
+            for k in range(1, length + 2):
+                distance = k if k > length else k + 1
+                if best != UNREACHABLE and distance >= best:
+                    break
+                x, y = tx + dx * k, ty + dy * k
+                if not (0 <= x < width and 0 <= y < height and open_tiles[y * width + x]):
+                    break
+                # past the end the tile itself is outside the blast; along the ray, its sides are
+                sides = ((x, y),) if k > length else ((x + dy, y + dx), (x - dy, y - dx))
+                if any(0 <= sx < width and 0 <= sy < height and open_tiles[sy * width + sx]
+                       and danger.is_safe(sx, sy) for sx, sy in sides):
+                    best, first = distance, (dx, dy)
+                    break
+        return best, first
+
+    def safe(self) -> FlowField:
+        """Field leading to the nearest open tile that no pending bomb will reach."""
+        key = ("safe", self.state.danger.version)
+        field = self._cached(key)
+        if field is not None:
+            return field
+        danger = self.state.danger
+        open_tiles = self._open
+        width = self.state.arena.width
+        targets = [(i % width, i // width) for i, is_open in enumerate(open_tiles)
+                   if is_open and danger.is_safe(i % width, i // width)]
+        return self._store(key, self._search(targets, reverse=True))
+
+    def _search(self, sources: Iterable[TilePos], reverse: bool) -> FlowField:
+        """Breadth-first search over open tiles.
+
+        With ``reverse`` the sources are targets and the search runs against
+        the moves: any floor tile next to a reached open tile can step onto it,
+        but only open tiles carry the search further. Otherwise it follows
+        moves out of the sources, which may themselves be blocked.
+        """
+        arena = self.state.arena
+        width, height = arena.width, arena.height
+        floor = self._floor
+        open_tiles = self._open
+        distance = array("i", [UNREACHABLE]) * (width * height)
+        steps = bytearray([NO_STEP]) * (width * height)
+        queue = deque()
+        for tx, ty in sources:
+            i = ty * width + tx
+            if distance[i] == UNREACHABLE and (open_tiles[i] or not reverse):
+                distance[i] = 0
+                queue.append((tx, ty))
+        while queue:
+            x, y = queue.popleft()
+            here = distance[y * width + x] + 1
+            for direction, (dx, dy) in enumerate(BLAST_DIRECTIONS):
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                i = ny * width + nx
+                if distance[i] != UNREACHABLE:
+                    continue
+                if reverse and floor[i]:
+                    distance[i] = here
+                    steps[i] = direction ^ 1  # BLAST_DIRECTIONS pairs opposites: 0/1, 2/3
+                    if open_tiles[i]:
+                        queue.append((nx, ny))
+                elif open_tiles[i]:
+                    distance[i] = here
+                    queue.append((nx, ny))
+        return FlowField(width, distance, steps)
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import struct
+from typing import Dict, List, Optional, Set, Tuple
+
+from .entities import Bomb, Explosion
+from .game_state import GameState
+
+TilePos = Tuple[int, int]
+
+# every message is a length-prefixed payload whose first byte is its type
+FRAME = struct.Struct("<I")
+MSG_JOIN = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_STATE = 4
+
+# type, arena width, height, players
+JOIN = struct.Struct("<BHHB")
+# type, match id, player id, arena width, height, players
+WELCOME = struct.Struct("<BIBHHB")
+# type, action bits
+INPUT = struct.Struct("<BB")
+# type, tick, flags, winner, counts of cells, bombs placed, bombs gone, flames lit, flames out, players
+STATE = struct.Struct("<BIBBHHHHHB")
+CELL = struct.Struct("<HB")
+TILE = struct.Struct("<BB")
+# player id, quantized x, quantized y, alive, score
+PLAYER = struct.Struct("<BHHBH")
+
+FLAG_RESET = 1
+FLAG_ROUND_OVER = 2
+# positions travel as fixed point with this many steps per tile
+POSITION_SCALE = 64
+
+
+def frame(payload: bytes) -> bytes:
+    return FRAME.pack(len(payload)) + payload
+
+
+async def read_message(reader: asyncio.StreamReader, max_length: Optional[int] = None) -> bytes:
+    """Reads one framed message; a length prefix over ``max_length`` raises ConnectionError unread."""
+    (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if max_length is not None and length > max_length:
+        raise ConnectionError(f"message of {length} bytes exceeds the {max_length}-byte limit")
+    return await reader.readexactly(length)
+
+
+def _pack_tiles(tiles) -> bytes:
+    return b"".join(TILE.pack(tx, ty) for tx, ty in tiles)
+
+
+def encode_state(tick: int, flags: int, winner: Optional[int], cells, bombs_on, bombs_off,
+                 flames_on, flames_off, players: List[tuple]) -> bytes:
+    parts = [
+        STATE.pack(MSG_STATE, tick, flags, winner or 0, len(cells) // 2, len(bombs_on), len(bombs_off),
+                   len(flames_on), len(flames_off), len(players)),
+        b"".join(CELL.pack(cells[i], cells[i + 1]) for i in range(0, len(cells), 2)),
+        _pack_tiles(bombs_on),
+        _pack_tiles(bombs_off),
+        _pack_tiles(flames_on),
+        _pack_tiles(flames_off),
+        b"".join(PLAYER.pack(*row) for row in players),
+    ]
+    return b"".join(parts)
+
+
+class DeltaEncoder:
+    """Turns successive states of one match into STATE messages carrying only what changed.
+
+    ``delta`` advances the encoder's memory of what clients have seen;
+    ``keyframe`` describes the current state in full for a client that just
+    joined or fell behind, and leaves that memory alone.
+    """
+
+    def __init__(self, state: GameState) -> None:
+        self.state = state
+        self._generation: Optional[int] = None
+        self._cursor = 0
+        self._players: Dict[int, tuple] = {}
+        self._bombs: Set[TilePos] = set()
+        self._flames: Set[TilePos] = set()
+
+    def _player_rows(self) -> List[tuple]:
+        return [
+            (player_id, int(player.position[0] * POSITION_SCALE + 0.5),
+             int(player.position[1] * POSITION_SCALE + 0.5), player.alive, player.score)
+            for player_id, player in self.state.players.items()
+        ]
+
+    def _flags(self) -> int:
+        return FLAG_ROUND_OVER if self.state.round_over else 0
+
+    def keyframe(self, tick: int) -> bytes:
+        state = self.state
+        bombs = {bomb.tile_position() for bomb in state.bombs}
+        flames = {tile for explosion in state.explosions for tile in explosion.tiles}
+        return encode_state(tick, FLAG_RESET | self._flags(), state.winner, state.arena.changed_cells(),
+                            bombs, (), flames, (), self._player_rows())
+
+    def delta(self, tick: int) -> bytes:
+        state = self.state
+        arena = state.arena
+        flags = self._flags()
+        if arena.generation != self._generation:
+            # the client rewinds its arena to the template and drops bombs and flames
+            flags |= FLAG_RESET
+            cells = arena.changed_cells()
+            self._generation = arena.generation
+            self._bombs = set()
+            self._flames = set()
+        else:
+            touched = set(arena.changes[self._cursor:])
+            cells = [value for tx, ty in touched for value in (ty * arena.width + tx, arena.cell_code(tx, ty))]
+        self._cursor = len(arena.changes)
+
+        bombs = {bomb.tile_position() for bomb in state.bombs}
+        flames = {tile for explosion in state.explosions for tile in explosion.tiles}
+        rows = self._player_rows()
+        players = [row for row in rows if self._players.get(row[0]) != row]
+        message = encode_state(tick, flags, state.winner, cells, bombs - self._bombs, self._bombs - bombs,
+                               flames - self._flames, self._flames - flames, players)
+        self._bombs = bombs
+        self._flames = flames
+        for row in players:
+            self._players[row[0]] = row
+        return message
+
+
+class StateMirror:
+    """Client-side copy of a match rebuilt from STATE messages; drawable, never simulated."""
+
+    def __init__(self, width: int, height: int, players: int) -> None:
+        self.state = GameState(width, height, players)
+        self.tick = -1
+        self._bombs: Dict[TilePos, Bomb] = {}
+        self._flames: Set[TilePos] = set()
+
+    def apply(self, payload: bytes) -> None:
+        (_, tick, flags, winner, cells, bombs_on, bombs_off, flames_on, flames_off,
+         players) = STATE.unpack_from(payload)
+        offset = STATE.size
+
+        def section(layout: struct.Struct, count: int):
+            nonlocal offset
+            end = offset + layout.size * count
+            rows = layout.iter_unpack(payload[offset:end])
+            offset = end
+            return rows
+
+        state = self.state
+        arena = state.arena
+        if flags & FLAG_RESET:
+            arena.reset()
+            self._bombs.clear()
+            self._flames.clear()
+        arena.apply_cells([value for cell in section(CELL, cells) for value in cell])
+        for tile in section(TILE, bombs_on):
+            self._bombs[tile] = Bomb(0, tile, 0.0, 0)
+        for tile in section(TILE, bombs_off):
+            self._bombs.pop(tile, None)
+        self._flames.update(section(TILE, flames_on))
+        self._flames.difference_update(section(TILE, flames_off))
+        for player_id, qx, qy, alive, score in section(PLAYER, players):
+            player = state.players[player_id]
+            player.position = (qx / POSITION_SCALE, qy / POSITION_SCALE)
+            player.alive = bool(alive)
+            player.score = score
+
+        state.bombs = list(self._bombs.values())
+        state.explosions = [Explosion(list(self._flames), 0.0)] if self._flames else []
+        state.round_over = bool(flags & FLAG_ROUND_OVER)
+        state.winner = winner or None
+        self.tick = tick
+
+
+class NetClient:
+    """Thin TCP client for the pygame loop: sends action bytes, drains STATE messages into a mirror."""
+
+    def __init__(self, host: str, port: int, width: int, height: int, players: int,
+                 timeout: float = 5.0) -> None:
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(frame(JOIN.pack(MSG_JOIN, width, height, players)))
+        self._buffer = bytearray()
+        payload = None
+        while payload is None:
+            self._receive()
+            payload = self._next_payload()
+        _, self.match_id, self.player_id, width, height, players = WELCOME.unpack(payload)
+        self.mirror = StateMirror(width, height, players)
+        self.sock.setblocking(False)
+        self._action: Optional[int] = None
+
+    def _receive(self) -> bool:
+        try:
+            data = self.sock.recv(65536)
+        except BlockingIOError:
+            return False
+        if not data:
+            raise ConnectionError("server closed the connection")
+        self._buffer += data
+        return True
+
+    def _next_payload(self) -> Optional[bytes]:
+        if len(self._buffer) < FRAME.size:
+            return None
+        (length,) = FRAME.unpack_from(self._buffer)
+        end = FRAME.size + length
+        if len(self._buffer) < end:
+            return None
+        payload = bytes(self._buffer[FRAME.size:end])
+        del self._buffer[:end]
+        return payload
+
+    def send_action(self, action: int) -> None:
+        if action != self._action:
+            self.sock.sendall(frame(INPUT.pack(MSG_INPUT, action)))
+            self._action = action
+
+    def poll(self) -> int:
+        """Applies every complete STATE message received so far; returns how many there were."""
+        while self._receive():
+            pass
+        applied = 0
+        payload = self._next_payload()
+        while payload is not None:
+            if payload[0] == MSG_STATE:
+                self.mirror.apply(payload)
+                applied += 1
+            payload = self._next_payload()
+        return applied
+
+    def close(self) -> None:
+        self.sock.close()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .arena import POWERUP_CODES, TILE_CODES, Arena
+from .config import ARENA_HEIGHT, ARENA_WIDTH, BOMB_TIMER, DEFAULT_PLAYER_COUNT, PowerUpType, TileType
+
+if TYPE_CHECKING:
+    from .game_state import GameState
+
+# feature planes in channel order; one "player<N>" plane per player follows them
+CHANNELS = ("solid", "destructible", "floor", "powerup_bomb", "powerup_flame",
+            "bomb_timer", "bomb_flame", "explosion")
+SOLID, DESTRUCTIBLE, FLOOR, POWERUP_BOMB, POWERUP_FLAME, BOMB_TIMER_PLANE, BOMB_FLAME, EXPLOSION = range(8)
+FIRST_PLAYER = len(CHANNELS)
+
+# one-hot lookup tables from layer codes to planes, so each layer is a single take
+_TILE_LUT = np.zeros((3, 256), dtype=np.float32)
+for _plane, _tile_type in enumerate((TileType.SOLID, TileType.DESTRUCTIBLE, TileType.FLOOR)):
+    _TILE_LUT[_plane, TILE_CODES[_tile_type]] = 1.0
+_POWERUP_LUT = np.zeros((2, 256), dtype=np.float32)
+for _plane, _powerup in enumerate((PowerUpType.BOMB, PowerUpType.FLAME)):
+    _POWERUP_LUT[_plane, POWERUP_CODES[_powerup]] = 1.0
+
+
+def channel_names(player_count: int) -> Tuple[str, ...]:
+    return CHANNELS + tuple(f"player{player_id}" for player_id in range(1, player_count + 1))
+
+
+class ObservationEncoder:
+    """Encodes ``GameState`` objects as stacked float32 feature planes, without pygame.
+
+    ``buffer`` is one preallocated ``[batch_size, C, H, W]`` array: ``encode``
+    fills row 0 and ``encode_batch`` fills one row per state, and both
+    return views of it, so the result is overwritten by the next call. Copy
+    it to keep it. The tile and power-up planes are table lookups straight
+    from the arena's byte layers; bombs, flames and players are written
+    sparsely. ``bomb_timer`` is the fuse left as a fraction of ``BOMB_TIMER``,
+    ``bomb_flame`` the bomb's flame length in tiles.
+    """
+
+    def __init__(self, width: int = ARENA_WIDTH, height: int = ARENA_HEIGHT,
+                 player_count: int = DEFAULT_PLAYER_COUNT, batch_size: int = 1) -> None:
+        self.width = width
+        self.height = height
+        self.player_count = player_count
+        self.channels = channel_names(player_count)
+        self.buffer = np.zeros((batch_size, len(self.channels), height, width), dtype=np.float32)
+        # every view the encoder writes through is built once up front
+        size = width * height
+        self._rows = [self.buffer[i] for i in range(batch_size)]
+        self._tile_planes = [row[SOLID:FLOOR + 1].reshape(3, size) for row in self._rows]
+        self._powerup_planes = [row[POWERUP_BOMB:POWERUP_FLAME + 1].reshape(2, size) for row in self._rows]
+        self._sparse_planes = [row[BOMB_TIMER_PLANE:] for row in self._rows]
+        self._entity_planes = [(row[BOMB_TIMER_PLANE], row[BOMB_FLAME], row[EXPLOSION]) for row in self._rows]
+        self._batches = [self.buffer[:n] for n in range(batch_size + 1)]
+        # take would convert byte indices to a fresh intp array on every call; convert into this instead
+        self._index = np.empty(size, dtype=np.intp)
+        # per row, the arena last encoded there and its byte layers as NumPy arrays sharing their memory;
+        # replaced when the row sees another arena, so encoding fresh states never piles up views
+        self._layers: List[Optional[Tuple[Arena, np.ndarray, np.ndarray]]] = [None] * batch_size
+
+    def encode(self, state: "GameState") -> np.ndarray:
+        """``[C, H, W]`` planes for one state (row 0 of ``buffer``)."""
+        self._fill(0, state)
+        return self._rows[0]
+
+    def encode_batch(self, states: Sequence["GameState"]) -> np.ndarray:
+        """``[len(states), C, H, W]`` planes, one row per state."""
+        if len(states) > len(self._rows):
+            raise ValueError(f"{len(states)} states do not fit a batch of {len(self._rows)}")
+        for i, state in enumerate(states):
+            self._fill(i, state)
+        return self._batches[len(states)]
+
+    def _arena_layers(self, i: int, arena: Arena) -> Tuple[np.ndarray, np.ndarray]:
+        layers = self._layers[i]
+        if layers is None or layers[0] is not arena:
+            if (arena.width, arena.height) != (self.width, self.height):
+                raise ValueError(f"arena is {arena.width}x{arena.height}, encoder is {self.width}x{self.height}")
+            layers = (arena, np.frombuffer(arena.cells, dtype=np.uint8),
+                      np.frombuffer(arena.powerup_layer, dtype=np.uint8))
+            self._layers[i] = layers
+        return layers[1], layers[2]
+
+    def _fill(self, i: int, state: "GameState") -> None:
+        cells, powerups = self._arena_layers(i, state.arena)
+        index = self._index
+        # mode="clip" lets take write straight into ``out`` instead of buffering; the np.take wrapper
+        # leaves a little cyclic garbage per call on NumPy 2.x, the array method does not
+        np.copyto(index, cells, casting="unsafe")
+        _TILE_LUT.take(index, axis=1, out=self._tile_planes[i], mode="clip")
+        np.copyto(index, powerups, casting="unsafe")
+        _POWERUP_LUT.take(index, axis=1, out=self._powerup_planes[i], mode="clip")
+        self._sparse_planes[i].fill(0.0)
+
+        timers, flames, fire = self._entity_planes[i]
+        for bomb in state.bombs:
+            tx, ty = bomb.tile_position()
+            timers[ty, tx] = bomb.timer / BOMB_TIMER
+            flames[ty, tx] = bomb.flame_length
+
+        for explosion in state.explosions:
+            if explosion.reach is None:
+                for tx, ty in explosion.tiles:
+                    fire[ty, tx] = 1.0
+                continue
+            (cx, cy), (right, left, down, up) = explosion.center, explosion.reach
+            fire[cy, cx - left:cx + right + 1] = 1.0
+            fire[cy - up:cy + down + 1, cx] = 1.0
+
+        row = self._rows[i]
+        for player_id, player in state.players.items():
+            if player.alive:
+                tx, ty = player.tile_position()
+                row[FIRST_PLAYER + player_id - 1, ty, tx] = 1.0
+
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple
+
+from .entities import Bomb, Player
+
+TilePos = Tuple[int, int]
+
+
+class OccupancyIndex:
+    """Per-tile lookup of bombs and players, kept in sync by ``GameState``.
+
+    Power-ups need no index: they live in the arena's power-up layer. Bombs
+    also remember their placement order so chain reactions can be resolved
+    in the same order as the ``GameState.bombs`` list.
+    """
+
+    def __init__(self) -> None:
+        self.bombs: Dict[TilePos, Bomb] = {}
+        self.players: Dict[TilePos, List[Player]] = {}
+        self._bomb_order: Dict[int, int] = {}
+        self._player_tiles: Dict[int, TilePos] = {}
+        self._next_order = 0
+
+    def clear(self) -> None:
+        self.bombs.clear()
+        self.players.clear()
+        self._bomb_order.clear()
+        self._player_tiles.clear()
+
+    def add_bomb(self, bomb: Bomb) -> None:
+        self.bombs[bomb.tile_position()] = bomb
+        self._bomb_order[id(bomb)] = self._next_order
+        self._next_order += 1
+
+    def remove_bomb(self, bomb: Bomb) -> None:
+        tile = bomb.tile_position()
+        if self.bombs.get(tile) is bomb:
+            del self.bombs[tile]
+            del self._bomb_order[id(bomb)]
+
+    def has_bomb(self, tile: TilePos) -> bool:
+        return tile in self.bombs
+
+    def bombs_in(self, tiles: Iterable[TilePos]) -> List[Bomb]:
+        """Bombs on any of ``tiles``, in placement order."""
+        found = [self.bombs[tile] for tile in tiles if tile in self.bombs]
+        found.sort(key=lambda bomb: self._bomb_order[id(bomb)])
+        return found
+
+    def add_player(self, player: Player) -> None:
+        tile = player.tile_position()
+        self.players.setdefault(tile, []).append(player)
+        self._player_tiles[player.player_id] = tile
+
+    def move_player(self, player: Player) -> None:
+        old = self._player_tiles.get(player.player_id)
+        new = player.tile_position()
+        if old == new:
+            return
+        if old is not None:
+            occupants = self.players[old]
+            occupants.remove(player)
+            if not occupants:
+                del self.players[old]
+        self.players.setdefault(new, []).append(player)
+        self._player_tiles[player.player_id] = new
+
+    def players_at(self, tile: TilePos) -> List[Player]:
+        return self.players.get(tile, [])
+
+    def verify(self, bombs: List[Bomb], players: Iterable[Player]) -> None:
+        """Cross-checks every layer against the entity lists; raises on any mismatch."""
+        expected_bombs = {bomb.tile_position(): bomb for bomb in bombs}
+        if len(expected_bombs) != len(bombs) or any(
+            self.bombs.get(tile) is not bomb for tile, bomb in expected_bombs.items()
+        ) or len(self.bombs) != len(bombs):
+            raise AssertionError(f"bomb layer out of sync: {self.bombs} vs {bombs}")
+        order = [self._bomb_order[id(bomb)] for bomb in bombs]
+        if order != sorted(order):
+            raise AssertionError("bomb layer order differs from GameState.bombs")
+
+        expected_players: Dict[TilePos, List[int]] = {}
+        for player in players:
+            expected_players.setdefault(player.tile_position(), []).append(player.player_id)
+        actual_players = {
+            tile: [player.player_id for player in occupants] for tile, occupants in self.players.items()
+        }
+        if {tile: sorted(ids) for tile, ids in expected_players.items()} != {
+            tile: sorted(ids) for tile, ids in actual_players.items()
+        }:
+            raise AssertionError(f"player layer out of sync: {actual_players} vs {expected_players}")
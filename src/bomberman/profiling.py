@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+# GameState methods timed by ``Profiler.instrument``; nested calls become nested trace spans
+GAME_STATE_PHASES = (
+    "update",
+    "_apply_player_input",
+    "_try_place_bomb",
+    "_update_bombs",
+    "_explode_bomb",
+    "_blast_reach",
+    "_apply_explosion_effects",
+    "_update_explosions",
+    "_check_powerup_pickups",
+    "_determine_round_winner",
+)
+
+_NULL_SPAN = nullcontext()
+
+
+def null_span(name: str) -> ContextManager[None]:
+    """Stand-in for ``Profiler.span`` when profiling is off."""
+    return _NULL_SPAN
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+
+
+class Profiler:
+    """Times named phases into a bounded event buffer and tracks rolling frame-time percentiles.
+
+    Nothing is patched or recorded until a profiler exists: ``instrument``
+    shadows the listed methods on one object with timing wrappers and
+    ``uninstrument`` removes them, so an unprofiled ``GameState`` runs its
+    original code. The event buffer holds the last ``window`` seconds and can
+    be written as a Chrome ``trace_event`` file (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, window: float = 10.0, frames: int = 600, budget_ms: Optional[float] = None,
+                 trace_dir: Union[str, Path, None] = None, max_events: int = 500_000) -> None:
+        self.window_ns = int(window * 1e9)
+        self.budget_ns = None if budget_ms is None else int(budget_ms * 1e6)
+        self.trace_dir = None if trace_dir is None else Path(trace_dir)
+        self.events: Deque[Tuple[str, int, int]] = deque(maxlen=max_events)
+        self.frame_times: Deque[int] = deque(maxlen=frames)
+        self.phase_times: Dict[str, Deque[int]] = {}
+        self.dumps: List[Path] = []
+        self._frame_phases: Dict[str, int] = defaultdict(int)
+        self._frame_start: Optional[int] = None
+        self._last_dump = 0
+        self._origin = time.perf_counter_ns()
+
+    def record(self, name: str, start: int, end: int) -> None:
+        self.events.append((name, start, end - start))
+        self._frame_phases[name] += end - start
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def timed(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        clock = time.perf_counter_ns
+        record = self.record
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start, clock())
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    def instrument(self, obj: Any, methods: Iterable[str] = GAME_STATE_PHASES) -> None:
+        for method in methods:
+            setattr(obj, method, self.timed(method.lstrip("_"), getattr(obj, method)))
+
+    @staticmethod
+    def uninstrument(obj: Any, methods: Iterable[str] = GAME_STATE_PHASES) -> None:
+        for method in methods:
+            obj.__dict__.pop(method, None)
+
+    def frame_done(self) -> bool:
+        """Closes the current frame; returns True (and dumps a trace if configured) when over budget."""
+        now = time.perf_counter_ns()
+        if self._frame_start is None:
+            self._frame_start = now
+            return False
+        duration = now - self._frame_start
+        self.events.append(("frame", self._frame_start, duration))
+        self._frame_start = now
+        self.frame_times.append(duration)
+        for name in self._frame_phases.keys() - self.phase_times.keys():
+            self.phase_times[name] = deque(maxlen=self.frame_times.maxlen)
+        for name, history in self.phase_times.items():
+            history.append(self._frame_phases.get(name, 0))
+        self._frame_phases.clear()
+
+        over = self.budget_ns is not None and duration > self.budget_ns
+        # one dump per window, so a run of slow frames does not flood the disk
+        if over and self.trace_dir is not None and now - self._last_dump > self.window_ns:
+            self._last_dump = now
+            self.dump_trace()
+        return over
+
+    def percentile(self, q: float, samples: Optional[Iterable[int]] = None) -> float:
+        """The q-th percentile (0-100) in milliseconds of frame times or of the given samples."""
+        ordered = sorted(self.frame_times if samples is None else samples)
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, int(len(ordered) * q / 100))
+        return ordered[index] / 1e6
+
+    def summary(self, phases: int = 6) -> List[str]:
+        """Overlay text: frame p50/p99, then the costliest phases by mean time per frame."""
+        lines = [f"frame p50 {self.percentile(50):.2f} ms  p99 {self.percentile(99):.2f} ms"]
+        means = sorted(((sum(times) / len(times), name) for name, times in self.phase_times.items()),
+                       reverse=True)
+        lines.extend(f"{name} {mean / 1e6:.3f} ms" for mean, name in means[:phases])
+        return lines
+
+    def trace_events(self, seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+        cutoff = time.perf_counter_ns() - int((seconds or self.window_ns / 1e9) * 1e9)
+        origin = self._origin
+        return [
+            {"name": name, "ph": "X", "ts": (start - origin) / 1e3, "dur": duration / 1e3, "pid": 1, "tid": 1}
+            for name, start, duration in self.events if start >= cutoff
+        ]
+
+    def dump_trace(self, path: Union[str, Path, None] = None, seconds: Optional[float] = None) -> Path:
+        if path is None:
+            directory = self.trace_dir or Path(".")
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{len(self.dumps)}.json"
+        path = Path(path)
+        path.write_text(json.dumps({"traceEvents": self.trace_events(seconds), "displayTimeUnit": "ms"}))
+        self.dumps.append(path)
+        return path
+
+
+class Pacing:
+    """Rolling window of intervals in nanoseconds, summarised as percentiles in milliseconds."""
+
+    def __init__(self, window: int = 600) -> None:
+        self.samples: Deque[int] = deque(maxlen=window)
+
+    def add(self, nanoseconds: int) -> None:
+        self.samples.append(nanoseconds)
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))] / 1e6
+
+    def summary(self) -> Dict[str, float]:
+        return {"p50_ms": self.percentile(50), "p99_ms": self.percentile(99), "max_ms": self.percentile(100)}
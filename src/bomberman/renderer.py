@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from .assets import AssetManager
+from .config import SCALE_FACTOR, TILE_SIZE
+from .game_state import GameState, MatchResult
+
+EXPLOSION_COLOR = (255, 200, 50, 160)
+HUD_COLOR = (255, 255, 255)
+MESSAGE_COLOR = (255, 255, 0)
+OVERLAY_COLOR = (120, 255, 120)
+# larger arenas scroll and zoom inside a window of at most this size
+MAX_WINDOW_WIDTH = 1280
+MAX_WINDOW_HEIGHT = 800
+
+
+def window_size(width: int, height: int) -> Tuple[int, int]:
+    """Window size in pixels for an arena of ``width`` x ``height`` tiles."""
+    tile_size = TILE_SIZE * SCALE_FACTOR
+    return min(width * tile_size, MAX_WINDOW_WIDTH), min(height * tile_size, MAX_WINDOW_HEIGHT)
+
+
+def draw_arena(screen: pygame.Surface, assets: AssetManager, state: GameState) -> None:
+    """Draws the whole arena from scratch; the reference path for screenshots and tests."""
+    tile_size = TILE_SIZE * SCALE_FACTOR
+    for x, y, tile in state.arena.iter_tiles():
+        image = assets.tile_image(tile.tile_type)
+        screen.blit(image, (x * tile_size, y * tile_size))
+
+    for powerup in state.powerups:
+        px, py = powerup.position
+        screen.blit(assets.powerup_image(powerup.powerup_type), (px * tile_size, py * tile_size))
+
+    for bomb in state.bombs:
+        bx, by = bomb.tile_position()
+        screen.blit(assets.bomb_image(), (bx * tile_size, by * tile_size))
+
+    explosion_surface = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+    explosion_surface.fill(EXPLOSION_COLOR)
+    for explosion in state.explosions:
+        for tx, ty in explosion.tiles:
+            screen.blit(explosion_surface, (tx * tile_size, ty * tile_size))
+
+    for player_id, player in state.players.items():
+        if not player.alive:
+            continue
+        px = int(player.position[0] * tile_size)
+        py = int(player.position[1] * tile_size)
+        screen.blit(assets.player_image(player_id), (px - tile_size // 2, py - tile_size // 2))
+
+
+ZOOM_STEPS = (1.0, 0.75, 0.5, 0.375, 0.25)
+
+
+class Camera:
+    """Picks the visible part of the arena, zooming out to keep living players in view.
+
+    ``origin`` is the arena pixel drawn at the view's top-left corner; it is
+    negative when the arena is smaller than the view and gets centred. It
+    only moves once the ideal origin has drifted a whole tile away, so a
+    walking player does not force a background rebuild every frame.
+    """
+
+    def __init__(self, view_size: Tuple[int, int], base_tile: int, margin: int = 2) -> None:
+        self.view_width, self.view_height = view_size
+        self.base_tile = base_tile
+        self.margin = margin
+        self.tile_size = base_tile
+        self.origin = (0, 0)
+
+    def follow(self, state: GameState) -> bool:
+        """Re-aims the camera at the area of interest; returns True if the view moved."""
+        arena = state.arena
+        players = list(state.players.values())
+        points = [player.position for player in players if player.alive] or [p.position for p in players]
+        left = max(0.0, min(x for x, _ in points) - self.margin)
+        right = min(arena.width - 1.0, max(x for x, _ in points) + self.margin)
+        top = max(0.0, min(y for _, y in points) - self.margin)
+        bottom = min(arena.height - 1.0, max(y for _, y in points) + self.margin)
+
+        for step in ZOOM_STEPS:
+            tile_size = max(1, int(self.base_tile * step))
+            if ((right - left + 1) * tile_size <= self.view_width
+                    and (bottom - top + 1) * tile_size <= self.view_height):
+                break
+        origin = (
+            self._axis_origin((left + right + 1) / 2, arena.width, tile_size, self.view_width),
+            self._axis_origin((top + bottom + 1) / 2, arena.height, tile_size, self.view_height),
+        )
+        ox, oy = self.origin
+        # hysteresis: small drifts keep the current view and its background
+        if (tile_size == self.tile_size
+                and abs(origin[0] - ox) < tile_size and abs(origin[1] - oy) < tile_size):
+            return False
+        moved = (tile_size, origin) != (self.tile_size, self.origin)
+        self.tile_size, self.origin = tile_size, origin
+        return moved
+
+    @staticmethod
+    def _axis_origin(center: float, tiles: int, tile_size: int, view: int) -> int:
+        extent = tiles * tile_size
+        if extent <= view:
+            return (extent - view) // 2
+        return min(max(0, int(center * tile_size) - view // 2), extent - view)
+
+    def visible_tiles(self, width: int, height: int) -> Tuple[range, range]:
+        ox, oy = self.origin
+        ts = self.tile_size
+        xs = range(max(0, ox // ts), min(width, (ox + self.view_width) // ts + 1))
+        ys = range(max(0, oy // ts), min(height, (oy + self.view_height) // ts + 1))
+        return xs, ys
+
+
+class Renderer:
+    """Draws frames incrementally and reports the screen rects that changed.
+
+    The visible arena and its power-ups live on a pre-composited background
+    that is patched only for tiles listed in ``Arena.changes``. Bombs,
+    explosions, players and HUD text are drawn on top each frame, and the
+    areas they covered last frame are restored from the background. The
+    background is rebuilt from the visible tiles only when a round starts or
+    the camera moves, so the cost never depends on the full arena size.
+    """
+
+    def __init__(self, screen: pygame.Surface, assets: AssetManager, font: pygame.font.Font) -> None:
+        self.screen = screen
+        self.assets = assets
+        self.font = font
+        self.camera = Camera(screen.get_size(), TILE_SIZE * SCALE_FACTOR)
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self._explosion_base = pygame.Surface((self.camera.base_tile, self.camera.base_tile), pygame.SRCALPHA)
+        self._explosion_base.fill(EXPLOSION_COLOR)
+        self._scaled: Dict[Tuple[int, int], pygame.Surface] = {}
+        self._generation: Optional[int] = None
+        self._change_cursor = 0
+        self._previous_rects: List[pygame.Rect] = []
+        self._text_cache: Dict[str, Tuple[str, pygame.Surface]] = {}
+        # extra HUD lines, e.g. the profiler summary
+        self.overlay: List[str] = []
+
+    @property
+    def tile_size(self) -> int:
+        return self.camera.tile_size
+
+    def draw(self, state: GameState, result: MatchResult) -> List[pygame.Rect]:
+        """Draws the next frame onto the screen and returns the rects to push."""
+        arena = state.arena
+        moved = self.camera.follow(state)
+        if moved or arena.generation != self._generation:
+            self._rebuild_background(state)
+            dirty = [self.screen.get_rect()]
+            self.screen.blit(self.background, (0, 0))
+        else:
+            dirty = self._patch_background(state)
+            dirty.extend(self._previous_rects)
+            for rect in dirty:
+                self.screen.blit(self.background, rect, rect)
+
+        rects = self._draw_sprites(state)
+        rects.extend(self._draw_hud(state, result))
+        dirty.extend(rects)
+        self._previous_rects = rects
+        return dirty
+
+    def _image(self, image: pygame.Surface) -> pygame.Surface:
+        size = self.camera.tile_size
+        if size == self.camera.base_tile:
+            return image
+        key = (id(image), size)
+        scaled = self._scaled.get(key)
+        if scaled is None:
+            scaled = pygame.transform.scale(image, (size, size))
+            self._scaled[key] = scaled
+        return scaled
+
+    def _tile_rect(self, tx: int, ty: int) -> pygame.Rect:
+        ox, oy = self.camera.origin
+        ts = self.camera.tile_size
+        return pygame.Rect(tx * ts - ox, ty * ts - oy, ts, ts)
+
+    def _draw_tile(self, state: GameState, tx: int, ty: int) -> None:
+        tile = state.arena.get_tile(tx, ty)
+        rect = self._tile_rect(tx, ty)
+        self.background.blit(self._image(self.assets.tile_image(tile.tile_type)), rect)
+        if tile.powerup:
+            self.background.blit(self._image(self.assets.powerup_image(tile.powerup)), rect)
+
+    def _rebuild_background(self, state: GameState) -> None:
+        self.background.fill((0, 0, 0))
+        xs, ys = self.camera.visible_tiles(state.arena.width, state.arena.height)
+        for y in ys:
+            for x in xs:
+                self._draw_tile(state, x, y)
+        self._generation = state.arena.generation
+        self._change_cursor = len(state.arena.changes)
+        self._previous_rects = []
+
+    def _patch_background(self, state: GameState) -> List[pygame.Rect]:
+        changes = state.arena.changes
+        patched = {changes[i] for i in range(self._change_cursor, len(changes))}
+        self._change_cursor = len(changes)
+        screen_rect = self.screen.get_rect()
+        rects = []
+        for tx, ty in patched:
+            rect = self._tile_rect(tx, ty)
+            if rect.colliderect(screen_rect):
+                self._draw_tile(state, tx, ty)
+                rects.append(rect)
+        return rects
+
+    def _draw_sprites(self, state: GameState) -> List[pygame.Rect]:
+        rects: List[pygame.Rect] = []
+        bomb_image = self._image(self.assets.bomb_image())
+        for bomb in state.bombs:
+            rects.append(self.screen.blit(bomb_image, self._tile_rect(*bomb.tile_position())))
+
+        explosion_image = self._image(self._explosion_base)
+        for explosion in state.explosions:
+            for tx, ty in explosion.tiles:
+                rects.append(self.screen.blit(explosion_image, self._tile_rect(tx, ty)))
+
+        ts = self.camera.tile_size
+        ox, oy = self.camera.origin
+        half = ts // 2
+        for player_id, player in state.players.items():
+            if not player.alive:
+                continue
+            px = int(player.position[0] * ts) - ox
+            py = int(player.position[1] * ts) - oy
+            image = self._image(self.assets.player_image(player_id))
+            rects.append(self.screen.blit(image, (px - half, py - half)))
+        # off-screen sprites blit to empty rects
+        return [rect for rect in rects if rect.width and rect.height]
+
+    def _text(self, slot: str, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        cached = self._text_cache.get(slot)
+        if cached is None or cached[0] != text:
+            cached = (text, self.font.render(text, True, color))
+            self._text_cache[slot] = cached
+        return cached[1]
+
+    def _draw_hud(self, state: GameState, result: MatchResult) -> List[pygame.Rect]:
+        score = "  ".join(f"P{player_id}: {player.score}" for player_id, player in state.players.items())
+        rects = [self.screen.blit(self._text("score", score, HUD_COLOR), (10, 10))]
+        if result.round_over:
+            if result.winner:
+                message = f"Player {result.winner} wins! Press R to reset."
+            else:
+                message = "Draw! Press R to reset."
+            rects.append(self.screen.blit(self._text("message", message, MESSAGE_COLOR), (10, 30)))
+        for index, line in enumerate(self.overlay):
+            text = self._text(f"overlay{index}", line, OVERLAY_COLOR)
+            rects.append(self.screen.blit(text, (10, 50 + 16 * index)))
+        return rects
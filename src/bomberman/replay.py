@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+from .config import FIXED_TIMESTEP
+from .entities import ACTION_INPUTS, InputBuffer, action_from_input
+from .game_state import GameState, MatchResult
+
+MAGIC = b"BMRP"
+VERSION = 1
+# magic, version, width, height, players, seed, dt, ticks, resets, packed input length
+HEADER = struct.Struct("<4sBHHBqdIII")
+# seeds are stored as signed 64-bit integers
+SEED_RANGE = range(-(1 << 63), 1 << 63)
+DIGEST_SIZE = 32
+
+
+def state_digest(state: GameState) -> bytes:
+    """SHA-256 over every piece of simulation state, including the RNG."""
+    return hashlib.sha256(state.snapshot().to_bytes()).digest()
+
+
+@dataclass
+class Replay:
+    """A recorded match: setup parameters, one action byte per player per tick, and round resets."""
+
+    width: int
+    height: int
+    players: int
+    seed: int
+    dt: float = FIXED_TIMESTEP
+    inputs: bytearray = field(default_factory=bytearray)
+    resets: List[int] = field(default_factory=list)
+    digest: bytes = b""
+
+    @property
+    def ticks(self) -> int:
+        return len(self.inputs) // self.players
+
+    def new_state(self) -> GameState:
+        return GameState(self.width, self.height, self.players, seed=self.seed)
+
+    def to_bytes(self) -> bytes:
+        packed = zlib.compress(bytes(self.inputs), 9)
+        header = HEADER.pack(MAGIC, VERSION, self.width, self.height, self.players, self.seed,
+                             self.dt, self.ticks, len(self.resets), len(packed))
+        digest = self.digest.ljust(DIGEST_SIZE, b"\0")
+        return header + struct.pack(f"<{len(self.resets)}I", *self.resets) + packed + digest
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        (magic, version, width, height, players, seed, dt, ticks, resets,
+         packed_size) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a bomberman replay (or an unsupported version)")
+        offset = HEADER.size
+        reset_ticks = struct.unpack_from(f"<{resets}I", data, offset)
+        offset += 4 * resets
+        inputs = bytearray(zlib.decompress(data[offset:offset + packed_size]))
+        offset += packed_size
+        if len(inputs) != ticks * players:
+            raise ValueError("replay input block is truncated")
+        digest = data[offset:offset + DIGEST_SIZE]
+        return cls(width, height, players, seed, dt, inputs, list(reset_ticks), digest)
+
+    def save(self, path: Union[str, Path]) -> None:
+        Path(path).write_bytes(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Replay":
+        return cls.from_bytes(Path(path).read_bytes())
+
+
+class ReplayRecorder:
+    """Logs each fixed-step tick's inputs while a match is being played."""
+
+    def __init__(self, state: GameState, dt: float = FIXED_TIMESTEP) -> None:
+        if state.seed is None:
+            raise ValueError("recording needs a GameState created with an explicit seed")
+        if state.seed not in SEED_RANGE:
+            raise ValueError("recording needs a seed that fits in a signed 64-bit integer")
+        arena = state.arena
+        self.state = state
+        self.replay = Replay(arena.width, arena.height, len(state.players), state.seed, dt)
+
+    def record_reset(self) -> None:
+        """Call right after ``GameState.reset_round`` so playback resets at the same tick."""
+        self.replay.resets.append(self.replay.ticks)
+
+    def record_tick(self, buffer: InputBuffer) -> None:
+        """Quantises ``buffer`` in place and logs it; call just before ``GameState.update``.
+
+        The live simulation then consumes exactly what playback will feed it.
+        """
+        for player_id in range(1, self.replay.players + 1):
+            action = action_from_input(buffer.get_state(player_id))
+            buffer.set_state(player_id, ACTION_INPUTS[action])
+            self.replay.inputs.append(action)
+
+    def finish(self) -> Replay:
+        self.replay.digest = state_digest(self.state)
+        return self.replay
+
+
+def simulate(replay: Replay, state: Optional[GameState] = None,
+             on_tick: Optional[Callable[[GameState, MatchResult], None]] = None) -> GameState:
+    """Re-runs a replay headlessly as fast as possible and returns the final state.
+
+    ``on_tick`` is called after every tick, e.g. to draw it.
+    """
+    if state is None:
+        state = replay.new_state()
+    buffer = InputBuffer()
+    players = replay.players
+    inputs = replay.inputs
+    resets = set(replay.resets)
+    dt = replay.dt
+    for tick in range(replay.ticks):
+        if tick in resets:
+            state.reset_round()
+        base = tick * players
+        for player_id in range(1, players + 1):
+            buffer.set_state(player_id, ACTION_INPUTS[inputs[base + player_id - 1]])
+        result = state.update(dt, buffer)
+        if on_tick is not None:
+            on_tick(state, result)
+    return state
+
+
+def verify(replay: Replay) -> bool:
+    return state_digest(simulate(replay)) == replay.digest
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .arena import BLAST_DIRECTIONS
+from .config import FIXED_TIMESTEP, TileType
+from .controllers import Controller
+from .entities import ACTION_BOMB, ACTION_DOWN, ACTION_INPUTS, ACTION_LEFT, ACTION_RIGHT, ACTION_UP, InputBuffer
+from .game_state import GameState
+from .navigation import UNREACHABLE
+from .snapshot import Snapshot
+
+MOVES = (0, ACTION_LEFT, ACTION_RIGHT, ACTION_UP, ACTION_DOWN)
+# tree edges: stand or walk, or drop a bomb standing still for one tick and then walk
+MACRO_ACTIONS: Tuple[Tuple[int, bool], ...] = (
+    tuple((move, False) for move in MOVES) + tuple((move, True) for move in MOVES[1:])
+)
+# a background search drops a job the game has stopped refreshing, e.g. while paused
+STALE_JOB_SECONDS = 0.25
+
+
+class Node:
+    """Visit count and summed reward of one action sequence; children are indexed like ``MACRO_ACTIONS``."""
+
+    __slots__ = ("visits", "value", "children")
+
+    def __init__(self) -> None:
+        self.visits = 0
+        self.value = 0.0
+        self.children: List[Optional[Node]] = [None] * len(MACRO_ACTIONS)
+
+    def select(self, exploration: float, rng: random.Random) -> int:
+        untried = [i for i, child in enumerate(self.children) if child is None or not child.visits]
+        if untried:
+            return rng.choice(untried)
+        log_visits = math.log(self.visits)
+        best = -1.0
+        choice = 0
+        for i, child in enumerate(self.children):
+            score = child.value / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best:
+                best, choice = score, i
+        return choice
+
+    def best(self) -> int:
+        """The most visited action; standing still if nothing has been tried."""
+        visits = [child.visits if child is not None else 0 for child in self.children]
+        return max(range(len(visits)), key=visits.__getitem__) if any(visits) else 0
+
+
+class SearchController(Controller):
+    """Open-loop Monte Carlo tree search over short held actions, within a hard time budget.
+
+    Every ``decision_ticks`` ticks the player commits to one of
+    ``MACRO_ACTIONS``. Each ``act`` spends at most ``budget_ms`` (or
+    ``iterations`` rollouts) growing the tree below the committed action, so
+    the search carries over from tick to tick and the chosen child becomes
+    the next root. Rollouts restore a snapshot into a private ``GameState``
+    and step it in ``step_ticks`` chunks, with opponents walking at random.
+    With ``background`` the search runs on a worker thread instead and
+    ``act`` only publishes the state and reads off the current best action.
+    """
+
+    def __init__(self, budget_ms: Optional[float] = 4.0, iterations: Optional[int] = None,
+                 decision_ticks: int = 8, horizon: int = 12, step_ticks: int = 4,
+                 exploration: float = 0.7, background: bool = False) -> None:
+        self.budget = None if budget_ms is None else budget_ms / 1000.0
+        self.iterations = iterations
+        self.decision_ticks = decision_ticks
+        self.horizon = horizon
+        self.step_ticks = step_ticks
+        self.exploration = exploration
+        self.background = background
+        self.rng = random.Random()
+        self.model: Optional[GameState] = None
+        self.inputs = InputBuffer()
+        self.root = Node()
+        self.action = 0
+        self.remaining = 0
+        self.rollouts = 0
+        self.search_seconds = 0.0
+        self.slowest_search = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition()
+        # (snapshot, player, pending ticks, root it was posted for, time posted)
+        self._job: Optional[Tuple[Snapshot, int, int, Node, float]] = None
+        self._stopping = False
+        self._worker: Optional[threading.Thread] = None
+
+    def reset(self, state: GameState, player_id: int, seed: int) -> None:
+        arena = state.arena
+        with self._lock:
+            self.rng.seed(seed)
+            model = self.model
+            if model is None or (model.arena.width, model.arena.height, model.arena.player_count) != (
+                    arena.width, arena.height, arena.player_count):
+                self.model = GameState(arena.width, arena.height, arena.player_count)
+            self.root = Node()
+            self.remaining = 0
+
+    def metrics(self) -> Dict[str, float]:
+        rate = self.rollouts / self.search_seconds if self.search_seconds else 0.0
+        return {"rollouts": self.rollouts, "rollouts_per_sec": rate, "slowest_ms": self.slowest_search * 1000}
+
+    def act(self, state: GameState, player_id: int, buffer: InputBuffer) -> None:
+        if self.model is None:
+            self.reset(state, player_id, 0)
+        snap = state.snapshot()
+        if self.remaining == 0:
+            if not self.background:
+                self.search(snap, player_id, 0)
+            with self._lock:
+                self.action = self.root.best()
+                child = self.root.children[self.action]
+                self.root = child if child is not None else Node()
+            self.remaining = self.decision_ticks
+        elif not self.background:
+            self.search(snap, player_id, self.remaining)
+        if self.background:
+            self._publish(snap, player_id, self.remaining)
+
+        move, bomb = MACRO_ACTIONS[self.action]
+        if bomb and self.remaining == self.decision_ticks:
+            buffer.set_state(player_id, ACTION_INPUTS[ACTION_BOMB])
+        else:
+            buffer.set_state(player_id, ACTION_INPUTS[move])
+        self.remaining -= 1
+
+    def search(self, snap: Snapshot, player_id: int, pending: int) -> int:
+        """Grows the tree from ``snap``, where the committed action still has ``pending`` ticks to run.
+
+        Stops at the time budget or iteration cap, whichever comes first;
+        returns the number of completed rollouts.
+        """
+        start = time.perf_counter()
+        deadline = None if self.budget is None else start + self.budget
+        done = 0
+        with self._lock:
+            while self.iterations is None or done < self.iterations:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if not self._iterate(snap, player_id, pending, deadline):
+                    break
+                done += 1
+        elapsed = time.perf_counter() - start
+        self.rollouts += done
+        self.search_seconds += elapsed
+        self.slowest_search = max(self.slowest_search, elapsed)
+        return done
+
+    def _iterate(self, snap: Snapshot, player_id: int, pending: int, deadline: Optional[float]) -> bool:
+        """One selection, expansion, rollout and backup; False if the deadline cut it short."""
+        model = self.model
+        model.restore(snap)
+        me = model.players[player_id]
+        changes = len(model.arena.changes)
+        rng = self.rng
+        if pending and not self._advance(player_id, self.action, pending,
+                                         pending == self.decision_ticks, deadline):
+            return False
+
+        node = self.root
+        path = [node]
+        depth = 0
+        while depth < self.horizon and me.alive and not model.round_over:
+            index = node.select(self.exploration, rng)
+            child = node.children[index]
+            expanded = child is None
+            if expanded:
+                child = node.children[index] = Node()
+            if not self._advance(player_id, index, self.decision_ticks, True, deadline):
+                return False
+            node = child
+            path.append(node)
+            depth += 1
+            if expanded or not child.visits:
+                break
+        while depth < self.horizon and me.alive and not model.round_over:
+            if not self._advance(player_id, rng.randrange(len(MOVES)), self.decision_ticks, True, deadline):
+                return False
+            depth += 1
+
+        value = self._evaluate(player_id, len(model.arena.changes) - changes)
+        for node in path:
+            node.visits += 1
+            node.value += value
+        return True
+
+    def _advance(self, player_id: int, index: int, ticks: int, start: bool, deadline: Optional[float]) -> bool:
+        """Holds one macro action for ``ticks`` ticks; ``start`` includes its bomb drop, if any."""
+        model = self.model
+        inputs = self.inputs
+        rng = self.rng
+        move, bomb = MACRO_ACTIONS[index]
+        others = [(other, ACTION_INPUTS[rng.choice(MOVES)])
+                  for other, player in model.players.items() if other != player_id and player.alive]
+        while ticks and not model.round_over:
+            # movement is swept (diagonals in tick-sized pieces), so a chunk moves players as far as
+            # its single ticks would
+            chunk = 1 if bomb and start else min(self.step_ticks, ticks)
+            for other, held in others:
+                inputs.set_state(other, held)
+            inputs.set_state(player_id, ACTION_INPUTS[ACTION_BOMB if bomb and start else move])
+            start = False
+            model.update(chunk * FIXED_TIMESTEP, inputs)
+            ticks -= chunk
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+        return True
+
+    def _evaluate(self, player_id: int, broken: int) -> float:
+        """Reward in [0, 1]: alive first, then opponents down, crates broken or about to be."""
+        model = self.model
+        me = model.players[player_id]
+        if not me.alive:
+            return 0.0
+        others = [player for other, player in model.players.items() if other != player_id]
+        value = 0.6 + 0.25 * sum(not player.alive for player in others) / max(1, len(others))
+
+        arena = model.arena
+        for bomb in model.bombs:
+            if bomb.owner_id != player_id:
+                continue
+            cx, cy = bomb.tile_position()
+            for (dx, dy), reach in zip(BLAST_DIRECTIONS, arena.blast_reach(cx, cy, bomb.flame_length)):
+                if reach and arena.get_tile(cx + dx * reach, cy + dy * reach).tile_type is TileType.DESTRUCTIBLE:
+                    broken += 1
+        value += 0.15 * min(broken, 3) / 3
+
+        tx, ty = me.tile_position()
+        danger = model.danger
+        if not danger.is_safe(tx, ty):
+            steps = model.flow.safe().distance(tx, ty)
+            # a tile of slack for starting off-centre, as in SurvivorController
+            if steps == UNREACHABLE or (steps + 1) / me.speed >= danger.time_left(tx, ty):
+                value *= 0.1
+            else:
+                value *= 0.9
+        return value
+
+    def _publish(self, snap: Snapshot, player_id: int, pending: int) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work, name="search", daemon=True)
+            self._worker.start()
+        with self._wake:
+            self._job = None if snap.round_over else (snap, player_id, pending, self.root, time.perf_counter())
+            self._wake.notify()
+
+    def _work(self) -> None:
+        while True:
+            with self._wake:
+                while self._job is None and not self._stopping:
+                    self._wake.wait()
+                if self._stopping:
+                    return
+                snap, player_id, pending, root, posted = self._job
+                if time.perf_counter() - posted > STALE_JOB_SECONDS:
+                    self._job = None
+                    continue
+            start = time.perf_counter()
+            # one rollout per lock hold, so ``act`` can re-root between them
+            with self._lock:
+                done = root is self.root and self._iterate(snap, player_id, pending, None)
+            self.rollouts += done
+            self.search_seconds += time.perf_counter() - start
+
+    def close(self) -> None:
+        """Stops the background worker, if one was started."""
+        if self._worker is not None:
+            with self._wake:
+                self._stopping = True
+                self._wake.notify()
+            self._worker.join()
+            self._worker = None
+            self._stopping = False
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from .config import FIXED_TIMESTEP
+from .entities import ACTION_INPUTS, InputBuffer
+from .game_state import GameState
+from .net import (
+    INPUT,
+    JOIN,
+    MSG_INPUT,
+    MSG_JOIN,
+    MSG_WELCOME,
+    WELCOME,
+    DeltaEncoder,
+    frame,
+    read_message,
+)
+
+# a finished round restarts by itself after this many ticks
+ROUND_RESTART_TICKS = 120
+# clients whose socket buffer grows past this skip deltas and get a keyframe once drained
+MAX_CLIENT_BUFFER = 64 * 1024
+
+
+class Match:
+    """One hosted ``GameState`` with its seats, latest inputs and traffic counters."""
+
+    def __init__(self, match_id: int, width: int, height: int, players: int, seed: Optional[int]) -> None:
+        self.match_id = match_id
+        self.layout = (width, height, players)
+        self.state = GameState(width, height, players, seed=seed)
+        self.encoder = DeltaEncoder(self.state)
+        self.clients: Dict[int, asyncio.StreamWriter] = {}
+        self.stale: Dict[int, bool] = {}
+        self.actions = bytearray(players)
+        self.inputs = InputBuffer()
+        self.tick = 0
+        self.idle_ticks = 0
+        self.cpu_seconds = 0.0
+        self.bytes_sent = 0
+
+    def free_seat(self) -> Optional[int]:
+        for player_id in range(1, self.layout[2] + 1):
+            if player_id not in self.clients:
+                return player_id
+        return None
+
+    def step(self, dt: float) -> bytes:
+        """Advances one tick and returns the framed delta for every up-to-date client."""
+        state = self.state
+        if state.round_over:
+            self.idle_ticks += 1
+            if self.idle_ticks >= ROUND_RESTART_TICKS:
+                state.reset_round()
+                self.idle_ticks = 0
+        for player_id, action in enumerate(self.actions, start=1):
+            self.inputs.set_state(player_id, ACTION_INPUTS[action])
+        state.update(dt, self.inputs)
+        self.tick += 1
+        return frame(self.encoder.delta(self.tick))
+
+    def broadcast(self, message: bytes) -> None:
+        keyframe = None
+        for player_id, writer in self.clients.items():
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self.stale[player_id] = True
+                continue
+            if self.stale.get(player_id):
+                if keyframe is None:
+                    keyframe = frame(self.encoder.keyframe(self.tick))
+                payload = keyframe
+                self.stale[player_id] = False
+            else:
+                payload = message
+            writer.write(payload)
+            self.bytes_sent += len(payload)
+
+
+class MatchServer:
+    """Authoritative server hosting many matches on one event loop at a fixed tick rate.
+
+    Clients send JOIN once, then an INPUT byte whenever their action changes;
+    any other or truncated message closes the connection.
+    Every tick each match is advanced once and one delta message is encoded
+    and written to all of its clients.
+    """
+
+    def __init__(self, tick_rate: float = 1 / FIXED_TIMESTEP, seed: Optional[int] = None) -> None:
+        self.dt = 1 / tick_rate
+        self.seed = seed
+        self.matches: Dict[int, Match] = {}
+        self.ticks = 0
+        self.late_ticks = 0
+        self._next_match_id = 1
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._handlers: Set[asyncio.Task] = set()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self._ticker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._ticker.cancel()
+        self._server.close()
+        for handler in self._handlers:
+            handler.cancel()
+        await asyncio.gather(self._ticker, *self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            self.tick()
+            deadline += self.dt
+            delay = deadline - loop.time()
+            if delay < 0:
+                # fell behind: skip the missed ticks rather than bursting to catch up
+                self.late_ticks += 1
+                deadline = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def tick(self) -> None:
+        for match in self.matches.values():
+            started = time.perf_counter()
+            match.broadcast(match.step(self.dt))
+            match.cpu_seconds += time.perf_counter() - started
+        self.ticks += 1
+
+    def _seat(self, width: int, height: int, players: int) -> Tuple[Match, int]:
+        layout = (width, height, players)
+        for match in self.matches.values():
+            if match.layout == layout:
+                seat = match.free_seat()
+                if seat is not None:
+                    return match, seat
+        seed = None if self.seed is None else self.seed + self._next_match_id
+        match = Match(self._next_match_id, width, height, players, seed)
+        self.matches[match.match_id] = match
+        self._next_match_id += 1
+        return match, 1
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        match: Optional[Match] = None
+        player_id = 0
+        try:
+            payload = await read_message(reader, JOIN.size)
+            if len(payload) != JOIN.size or payload[0] != MSG_JOIN:
+                return
+            _, width, height, players = JOIN.unpack(payload)
+            try:
+                match, player_id = self._seat(width, height, players)
+            except ValueError:
+                return
+            match.clients[player_id] = writer
+            match.stale[player_id] = True
+            writer.write(frame(WELCOME.pack(MSG_WELCOME, match.match_id, player_id, width, height, players)))
+            while True:
+                payload = await read_message(reader, INPUT.size)
+                if len(payload) != INPUT.size or payload[0] != MSG_INPUT:
+                    return
+                match.actions[player_id - 1] = payload[1] & 31
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(handler)
+            if match is not None:
+                del match.clients[player_id]
+                match.stale.pop(player_id, None)
+                match.actions[player_id - 1] = 0
+                if not match.clients:
+                    del self.matches[match.match_id]
+            writer.close()
+
+    def stats(self) -> Dict[str, float]:
+        matches: List[Match] = list(self.matches.values())
+        match_ticks = sum(match.tick for match in matches) or 1
+        return {
+            "matches": len(matches),
+            "clients": sum(len(match.clients) for match in matches),
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "cpu_us_per_match_tick": sum(match.cpu_seconds for match in matches) / match_ticks * 1e6,
+            "bytes_sent": sum(match.bytes_sent for match in matches),
+        }
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, Dict, List, Optional, Tuple
+
+from .config import FIXED_TIMESTEP
+from .entities import ACTION_BOMB, ACTION_INPUTS, InputBuffer
+from .game_state import GameState, MatchResult
+from .profiling import Pacing
+from .snapshot import Snapshot
+
+if TYPE_CHECKING:
+    from .controllers import Controller
+    from .replay import ReplayRecorder
+
+# past this much backlog the simulation drops time instead of spiralling, like the fixed-step loop in main
+MAX_CATCH_UP_TICKS = 5
+# players moving further than this between two frames teleported (a new round) and are not interpolated
+TELEPORT_TILES = 1.0
+
+
+class InputQueue:
+    """Timestamped action bytes handed from the input thread to the simulation thread.
+
+    Events are ``(perf_counter_ns, player_id, action)``. A ``deque`` appends
+    and pops from opposite ends atomically in CPython, so with one producer
+    and one consumer neither side ever takes a lock.
+    """
+
+    def __init__(self) -> None:
+        self._events: Deque[Tuple[int, int, int]] = deque()
+
+    def push(self, player_id: int, action: int, stamp: Optional[int] = None) -> None:
+        self._events.append((time.perf_counter_ns() if stamp is None else stamp, player_id, action))
+
+    def drain(self, until: int) -> List[Tuple[int, int, int]]:
+        """Removes and returns the events stamped at or before ``until``, oldest first."""
+        events = self._events
+        drained = []
+        while events and events[0][0] <= until:
+            drained.append(events.popleft())
+        return drained
+
+
+class Frame:
+    """One published simulation tick: an immutable snapshot and the moment it stands for."""
+
+    __slots__ = ("tick", "time", "snapshot")
+
+    def __init__(self, tick: int, time_ns: int, snapshot: Snapshot) -> None:
+        self.tick = tick
+        self.time = time_ns
+        self.snapshot = snapshot
+
+
+class SimulationThread:
+    """Steps a ``GameState`` at a fixed rate on its own thread, whatever the renderer is doing.
+
+    Each tick is due at a fixed point on ``perf_counter``; the thread sleeps
+    until then, applies the input events stamped up to it (an action is held
+    until its player's next event, and a bomb press drained with a release
+    still counts for that tick), lets ``bots`` act, updates the state and
+    publishes a ``Frame``. ``frames`` is the latest pair, replaced in one
+    assignment, so readers never see a half-written state. Anything else
+    that must touch the state, such as a round reset, goes through ``call``.
+    """
+
+    def __init__(self, state: GameState, inputs: Optional[InputQueue] = None,
+                 bots: Optional[Dict[int, "Controller"]] = None, recorder: Optional["ReplayRecorder"] = None,
+                 dt: float = FIXED_TIMESTEP) -> None:
+        self.state = state
+        self.inputs = inputs if inputs is not None else InputQueue()
+        self.bots = bots or {}
+        self.recorder = recorder
+        self.dt = dt
+        self.tick_ns = int(dt * 1e9)
+        self.ticks = 0
+        self.dropped_ticks = 0
+        # how late each tick started, how long it took and how old its inputs were
+        self.lateness = Pacing()
+        self.tick_time = Pacing()
+        self.input_latency = Pacing()
+        self._held: Dict[int, int] = {}
+        self._buffer = InputBuffer()
+        self._calls: Deque[Callable[[], None]] = deque()
+        first = Frame(0, time.perf_counter_ns(), state.snapshot())
+        self.frames: Tuple[Frame, Frame] = (first, first)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+            self._stopping.clear()
+
+    def call(self, func: Callable[[], None]) -> None:
+        """Runs ``func`` on the simulation thread before the next tick."""
+        self._calls.append(func)
+
+    def metrics(self) -> Dict[str, float]:
+        metrics: Dict[str, float] = {"ticks": self.ticks, "dropped_ticks": self.dropped_ticks}
+        for name, pacing in (("late", self.lateness), ("tick", self.tick_time), ("input", self.input_latency)):
+            for key, value in pacing.summary().items():
+                metrics[f"{name}_{key}"] = value
+        return metrics
+
+    def _run(self) -> None:
+        due = time.perf_counter_ns() + self.tick_ns
+        while not self._stopping.is_set():
+            now = time.perf_counter_ns()
+            if now < due:
+                self._stopping.wait((due - now) / 1e9)
+                continue
+            if now - due > MAX_CATCH_UP_TICKS * self.tick_ns:
+                skipped = (now - due) // self.tick_ns
+                self.dropped_ticks += skipped
+                due += skipped * self.tick_ns
+            self.lateness.add(now - due)
+            self.step(due)
+            self.tick_time.add(time.perf_counter_ns() - now)
+            due += self.tick_ns
+
+    def step(self, due: int) -> Frame:
+        """Runs the tick due at ``due`` (``perf_counter_ns``) and publishes it; the thread calls this."""
+        calls = self._calls
+        while calls:
+            calls.popleft()()
+        held = self._held
+        # a bomb tap released again within the same tick still places its bomb
+        taps: Dict[int, int] = {}
+        for stamp, player_id, action in self.inputs.drain(due):
+            held[player_id] = action
+            taps[player_id] = taps.get(player_id, 0) | action & ACTION_BOMB
+            self.input_latency.add(due - stamp)
+        state = self.state
+        buffer = self._buffer
+        for player_id, action in held.items():
+            buffer.set_state(player_id, ACTION_INPUTS[action | taps.get(player_id, 0)])
+        for player_id, bot in self.bots.items():
+            if state.players[player_id].alive and not state.round_over:
+                bot.act(state, player_id, buffer)
+        if self.recorder is not None and not state.round_over:
+            self.recorder.record_tick(buffer)
+        state.update(self.dt, buffer)
+        self.ticks += 1
+        frame = Frame(self.ticks, due, state.snapshot())
+        self.frames = (self.frames[1], frame)
+        return frame
+
+
+class FrameView:
+    """A drawable ``GameState`` that follows published frames, with players interpolated between the last two.
+
+    ``show`` draws the world as of one tick ago, so there is always a newer
+    frame to blend towards. Only tiles that changed since the last frame
+    are rewritten, so an incremental ``Renderer`` keeps patching just those.
+    """
+
+    def __init__(self, width: int, height: int, players: int, dt: float = FIXED_TIMESTEP) -> None:
+        self.state = GameState(width, height, players)
+        self.result = MatchResult(False)
+        self.delay_ns = int(dt * 1e9)
+        self.alpha = 1.0
+        self._shown: Optional[Frame] = None
+
+    def show(self, frames: Tuple[Frame, Frame], now: Optional[int] = None) -> MatchResult:
+        previous, latest = frames
+        state = self.state
+        snap = latest.snapshot
+        if latest is not self._shown:
+            state.arena.sync_cells(snap.arena)
+            state.restore(snap)
+            self.result.round_over = snap.round_over
+            self.result.winner = snap.winner
+            self._shown = latest
+        span = latest.time - previous.time
+        if span <= 0:
+            self.alpha = 1.0
+            return self.result
+        now = time.perf_counter_ns() if now is None else now
+        alpha = (now - self.delay_ns - previous.time) / span
+        self.alpha = alpha = min(1.0, max(0.0, alpha))
+        before = {row[0]: row for row in previous.snapshot.players}
+        for row in snap.players:
+            old = before.get(row[0])
+            if old is None or not old[9]:
+                continue
+            ox, oy = old[1], old[2]
+            x, y = row[1], row[2]
+            if abs(x - ox) + abs(y - oy) <= TELEPORT_TILES:
+                state.players[row[0]].position = (ox + (x - ox) * alpha, oy + (y - oy) * alpha)
+        return self.result
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import struct
+from array import array
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional, Tuple
+
+from .arena import POWERUP_CODES
+from .entities import Bomb, Explosion, Player
+
+if TYPE_CHECKING:
+    from .game_state import GameState
+
+# layout (3), round_over, winner, clock, then counts of players, bombs, explosions, power-ups, cells
+_HEADER = struct.Struct("<HHH?HdHHHHI")
+_PLAYER = struct.Struct("<HdddddHHH?I")
+_BOMB = struct.Struct("<HdddH")
+# deadline, centre, reach along +x, -x, +y, -y
+_EXPLOSION = struct.Struct("<dHHBBBB")
+_POWERUP = struct.Struct("<HHB")
+_CELL = struct.Struct("<IB")
+_RNG = struct.Struct("<i?d")
+
+
+class Snapshot:
+    """Immutable copy of every mutable field of a ``GameState``.
+
+    Everything is held in flat tuples, so taking, comparing and hashing a
+    snapshot never walks the arena: the grid is stored as the tiles that
+    differ from the layout template. Bomb and explosion rows hold absolute
+    deadlines on the round ``clock``, so restoring reproduces timers exactly.
+    """
+
+    __slots__ = ("layout", "arena", "players", "bombs", "explosions", "powerups",
+                 "round_over", "winner", "clock", "rng")
+
+    def __init__(self, layout: Tuple[int, int, int], arena: Tuple[int, ...], players: Tuple[tuple, ...],
+                 bombs: Tuple[tuple, ...], explosions: Tuple[tuple, ...], powerups: Tuple[tuple, ...],
+                 round_over: bool, winner: Optional[int], clock: float, rng: tuple) -> None:
+        self.layout = layout
+        self.arena = arena
+        self.players = players
+        self.bombs = bombs
+        self.explosions = explosions
+        self.powerups = powerups
+        self.round_over = round_over
+        self.winner = winner
+        self.clock = clock
+        self.rng = rng
+
+    def _key(self) -> tuple:
+        return (self.layout, self.arena, self.players, self.bombs, self.explosions, self.powerups,
+                self.round_over, self.winner, self.clock)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Snapshot):
+            return NotImplemented
+        return self._key() == other._key() and (self.rng is other.rng or self.rng == other.rng)
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(*self.layout, self.round_over, self.winner or 0, self.clock, len(self.players),
+                              len(self.bombs), len(self.explosions), len(self.powerups),
+                              len(self.arena) // 2)]
+        parts.extend(_PLAYER.pack(*player) for player in self.players)
+        parts.extend(_BOMB.pack(*bomb) for bomb in self.bombs)
+        parts.extend(_EXPLOSION.pack(*explosion) for explosion in self.explosions)
+        parts.extend(_POWERUP.pack(*powerup) for powerup in self.powerups)
+        cells = self.arena
+        parts.extend(_CELL.pack(cells[i], cells[i + 1]) for i in range(0, len(cells), 2))
+        version, internal, gauss = self.rng
+        parts.append(_RNG.pack(version, gauss is not None, gauss or 0.0))
+        parts.append(array("I", internal).tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Snapshot":
+        (width, height, player_count, round_over, winner, clock, players, bombs, explosions, powerups,
+         cells) = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+
+        def read(layout: struct.Struct) -> tuple:
+            nonlocal offset
+            values = layout.unpack_from(data, offset)
+            offset += layout.size
+            return values
+
+        player_rows = tuple(read(_PLAYER) for _ in range(players))
+        bomb_rows = tuple(read(_BOMB) for _ in range(bombs))
+        explosion_rows = tuple(read(_EXPLOSION) for _ in range(explosions))
+        powerup_rows = tuple(read(_POWERUP) for _ in range(powerups))
+        arena = tuple(value for _ in range(cells) for value in read(_CELL))
+        version, has_gauss, gauss = read(_RNG)
+        internal = array("I")
+        internal.frombytes(data[offset:])
+        rng = (version, tuple(internal), gauss if has_gauss else None)
+        return cls((width, height, player_count), arena, player_rows, bomb_rows, explosion_rows,
+                   powerup_rows, round_over, winner or None, clock, rng)
+
+
+def _explosion_rows(explosions: Iterable[Explosion]) -> Iterator[tuple]:
+    for explosion in explosions:
+        if explosion.reach is not None:
+            yield (explosion.deadline, *explosion.center, *explosion.reach)
+        else:
+            # explosions built from a tile list become one flame of zero reach per tile
+            for tx, ty in explosion.tiles:
+                yield (explosion.deadline, tx, ty, 0, 0, 0, 0)
+
+
+def capture(state: "GameState") -> Snapshot:
+    arena = state.arena
+    players = tuple(
+        (player_id, player.position[0], player.position[1], player.direction[0], player.direction[1],
+         player.speed, player.bomb_capacity, player.flame_length, player.active_bombs, player.alive,
+         player.score)
+        for player_id, player in state.players.items()
+    )
+    bombs = tuple(
+        (bomb.owner_id, bomb.position[0], bomb.position[1], bomb.deadline, bomb.flame_length)
+        for bomb in state.bombs
+    )
+    explosions = tuple((explosion.deadline, *explosion.center, *explosion.reach) for explosion in state.explosions
+                       if explosion.reach is not None)
+    if len(explosions) != len(state.explosions):
+        explosions = tuple(_explosion_rows(state.explosions))
+    powerups = tuple(
+        (powerup.position[0], powerup.position[1], POWERUP_CODES[powerup.powerup_type])
+        for powerup in state.powerups
+    )
+    return Snapshot((arena.width, arena.height, arena.player_count), arena.changed_cells(), players,
+                    bombs, explosions, powerups, state.round_over, state.winner, state.clock, state.rng_state())
+
+
+def restore(state: "GameState", snap: Snapshot) -> None:
+    arena = state.arena
+    if snap.layout != (arena.width, arena.height, arena.player_count):
+        raise ValueError(f"snapshot layout {snap.layout} does not match this arena")
+    if snap.arena is not arena.changed_cells():
+        arena.restore_cells(snap.arena)
+
+    previous = state.players
+    state.players = {}
+    for (player_id, x, y, dx, dy, speed, capacity, flame, active, alive, score) in snap.players:
+        player = previous.get(player_id) or Player(player_id, (x, y))
+        player.position = (x, y)
+        player.direction = (dx, dy)
+        player.speed = speed
+        player.bomb_capacity = capacity
+        player.flame_length = flame
+        player.active_bombs = active
+        player.alive = alive
+        player.score = score
+        state.players[player_id] = player
+    state.bomb_timers.clear(snap.clock)
+    state.explosion_timers.clear(snap.clock)
+    state.bombs = []
+    for owner, x, y, deadline, flame in snap.bombs:
+        bomb = Bomb(owner, (x, y), 0.0, flame)
+        state.bomb_timers.schedule_at(bomb, deadline)
+        state.bombs.append(bomb)
+    state.explosions = []
+    for deadline, cx, cy, *reach in snap.explosions:
+        explosion = Explosion.from_blast((cx, cy), tuple(reach), 0.0)
+        state.explosion_timers.schedule_at(explosion, deadline)
+        state.explosions.append(explosion)
+    state.round_over = snap.round_over
+    state.winner = snap.winner
+    state.set_rng_state(snap.rng)
+    state.rebuild_occupancy()
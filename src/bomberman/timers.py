@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import heapq
+from typing import List, Optional, Tuple
+
+
+class Timed:
+    """Base for entities whose countdown is an absolute deadline on a ``TimerQueue`` clock.
+
+    ``timer`` reads as the time left and assigning it reschedules the entity,
+    so code that sets ``bomb.timer = 0`` keeps working. Until an entity is
+    scheduled its ``deadline`` simply holds the time left.
+    """
+
+    __slots__ = ("queue", "deadline", "entry")
+
+    def __init__(self, timer: float) -> None:
+        self.queue: Optional[TimerQueue] = None
+        self.deadline = timer
+        self.entry = 0
+
+    @property
+    def timer(self) -> float:
+        queue = self.queue
+        return self.deadline if queue is None else self.deadline - queue.now
+
+    @timer.setter
+    def timer(self, value: float) -> None:
+        if self.queue is None:
+            self.deadline = value
+        else:
+            self.queue.schedule(self, value)
+
+
+class TimerQueue:
+    """Min-heap of deadlines on a simulation clock, so a tick only touches what is due.
+
+    Entries are ``(deadline, entry, entity)``; the entry number breaks ties in
+    scheduling order. Rescheduling or cancelling leaves the old entry in
+    place, and stale entries are dropped when they reach the top.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self._heap: List[Tuple[float, int, Timed]] = []
+        self._entries = 0
+
+    def clear(self, now: float = 0.0) -> None:
+        self._heap.clear()
+        self.now = now
+
+    def schedule(self, entity: Timed, delay: float) -> None:
+        self.schedule_at(entity, self.now + delay)
+
+    def schedule_at(self, entity: Timed, deadline: float) -> None:
+        self._entries += 1
+        entity.queue = self
+        entity.deadline = deadline
+        entity.entry = self._entries
+        heapq.heappush(self._heap, (deadline, self._entries, entity))
+
+    def cancel(self, entity: Timed) -> None:
+        if entity.queue is self:
+            entity.deadline -= self.now
+            entity.queue = None
+
+    def pop_due(self, now: float) -> Optional[Timed]:
+        """Unschedules and returns the earliest entity due at ``now``, or None."""
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, entry, entity = heapq.heappop(heap)
+            if entity.queue is self and entity.entry == entry:
+                self.cancel(entity)
+                return entity
+        return None
+
+    def next_deadline(self) -> Optional[float]:
+        heap = self._heap
+        while heap:
+            _, entry, entity = heap[0]
+            if entity.queue is self and entity.entry == entry:
+                return heap[0][0]
+            heapq.heappop(heap)
+        return None
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from array import array
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from .config import ARENA_HEIGHT, ARENA_WIDTH, DEFAULT_PLAYER_COUNT, FIXED_TIMESTEP, MAX_PLAYERS
+from .controllers import Controller, make_controller
+from .entities import InputBuffer
+from .game_state import GameState
+
+# one packed array file per column; rows are appended in whatever order matches finish
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("match", "I"),
+    ("winner", "B"),  # 0 for a drawn match
+    ("rounds", "H"),
+    ("ticks", "I"),
+    ("bombs", "I"),
+)
+Row = Tuple[int, int, int, int, int]
+
+
+@dataclass(frozen=True)
+class TournamentConfig:
+    """Everything that decides a match's outcome besides its index."""
+
+    controllers: Tuple[str, ...]
+    width: int = ARENA_WIDTH
+    height: int = ARENA_HEIGHT
+    players: int = DEFAULT_PLAYER_COUNT
+    wins: int = 3
+    max_rounds: int = 9
+    round_ticks: int = 3600
+    seed: int = 0
+
+    def match_seed(self, match_id: int) -> int:
+        return (self.seed << 32) | match_id
+
+
+class MatchRunner:
+    """Plays matches back to back on a single reused ``GameState`` and controller set."""
+
+    def __init__(self, config: TournamentConfig) -> None:
+        self.config = config
+        self.state = GameState(config.width, config.height, config.players)
+        self.controllers: List[Controller] = [
+            make_controller(config.controllers[i % len(config.controllers)]) for i in range(config.players)
+        ]
+        self.buffer = InputBuffer()
+        self.active_players = [player_id for player_id, controller in enumerate(self.controllers, start=1)
+                               if not controller.passive]
+
+    def play(self, match_id: int) -> Row:
+        config = self.config
+        state = self.state
+        seed = config.match_seed(match_id)
+        state.reset_match(seed)
+        for player_id, controller in enumerate(self.controllers, start=1):
+            controller.reset(state, player_id, seed * MAX_PLAYERS + player_id)
+
+        rounds = 0
+        ticks = 0
+        while rounds < config.max_rounds and max(p.score for p in state.players.values()) < config.wins:
+            if rounds:
+                state.reset_round()
+            rounds += 1
+            round_ticks = 0
+            while round_ticks < config.round_ticks:
+                if not any(state.players[player_id].alive for player_id in self.active_players):
+                    # nobody will send input, so jump straight to the next bomb or flame timer
+                    round_ticks += state.skip_idle(FIXED_TIMESTEP, config.round_ticks - round_ticks)
+                    if round_ticks == config.round_ticks:
+                        break
+                for player_id, controller in enumerate(self.controllers, start=1):
+                    if state.players[player_id].alive:
+                        controller.act(state, player_id, self.buffer)
+                state.update(FIXED_TIMESTEP, self.buffer)
+                round_ticks += 1
+                if state.round_over:
+                    break
+            ticks += round_ticks
+
+        ranking = sorted(state.players.values(), key=lambda player: player.score, reverse=True)
+        top = ranking[0]
+        winner = top.player_id if len(ranking) == 1 or top.score > ranking[1].score else 0
+        return match_id, winner, rounds, ticks, state.bombs_placed
+
+
+class ResultsFile:
+    """Append-only columnar results: one packed ``array`` file per column plus ``meta.json``.
+
+    Rows are only ever appended whole, and a run that was killed mid-write is
+    trimmed back to its last complete row on reopen, so ``--resume`` can skip
+    the matches already on disk.
+    """
+
+    def __init__(self, directory: Union[str, Path], config: TournamentConfig, resume: bool = False) -> None:
+        self.directory = Path(directory)
+        meta_path = self.directory / "meta.json"
+        meta = {"config": asdict(config), "columns": dict(COLUMNS)}
+        if meta_path.exists():
+            if not resume:
+                raise FileExistsError(f"{self.directory} already holds results; pass resume to continue it")
+            stored = json.loads(meta_path.read_text())
+            stored["config"]["controllers"] = tuple(stored["config"]["controllers"])
+            if stored != meta:
+                raise ValueError(f"{self.directory} was written with a different tournament config")
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            meta_path.write_text(json.dumps(meta, indent=2))
+
+        rows = min(self._column_path(name).stat().st_size // array(code).itemsize
+                   if self._column_path(name).exists() else 0 for name, code in COLUMNS)
+        self._files: Dict[str, BinaryIO] = {}
+        for name, code in COLUMNS:
+            handle = open(self._column_path(name), "ab")
+            handle.truncate(rows * array(code).itemsize)
+            self._files[name] = handle
+        self.rows = rows
+
+    def _column_path(self, name: str) -> Path:
+        return self.directory / f"{name}.col"
+
+    def completed(self) -> Set[int]:
+        return set(load_results(self.directory)["match"][:self.rows])
+
+    def append(self, rows: List[Row]) -> None:
+        for index, (name, code) in enumerate(COLUMNS):
+            handle = self._files[name]
+            array(code, [row[index] for row in rows]).tofile(handle)
+            handle.flush()
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        for handle in self._files.values():
+            handle.close()
+
+
+def load_results(directory: Union[str, Path]) -> Dict[str, array]:
+    """Reads every column back; ``numpy.fromfile`` works on the same files."""
+    columns = {}
+    for name, code in COLUMNS:
+        column = array(code)
+        path = Path(directory) / f"{name}.col"
+        if path.exists():
+            column.frombytes(path.read_bytes())
+        columns[name] = column
+    rows = min(len(column) for column in columns.values())
+    return {name: column[:rows] for name, column in columns.items()}
+
+
+_runner: Optional[MatchRunner] = None
+
+
+def _init_worker(config: TournamentConfig) -> None:
+    global _runner
+    _runner = MatchRunner(config)
+
+
+def _play(match_id: int) -> Row:
+    return _runner.play(match_id)
+
+
+def run_tournament(config: TournamentConfig, matches: int, directory: Union[str, Path],
+                   workers: Optional[int] = None, resume: bool = False,
+                   progress: Optional[Callable[[int, int, float], None]] = None) -> int:
+    """Plays matches ``0..matches-1`` not already on disk; returns how many were played.
+
+    Each worker process builds one ``MatchRunner`` up front and reuses it, so
+    per-match cost is only the simulation itself. Results are flushed in
+    small batches as they arrive.
+    """
+    results = ResultsFile(directory, config, resume)
+    done = results.completed()
+    pending = [match_id for match_id in range(matches) if match_id not in done]
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    played = 0
+    batch: List[Row] = []
+    last_flush = started
+    pool = None
+
+    def flush() -> None:
+        results.append(batch)
+        batch.clear()
+        if progress is not None:
+            progress(played, len(pending), time.perf_counter() - started)
+
+    try:
+        if workers == 1:
+            runner = MatchRunner(config)
+            rows = map(runner.play, pending)
+        else:
+            import multiprocessing  # only the parent of a pooled run pays for this
+
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config,))
+            chunksize = max(1, min(16, len(pending) // (workers * 8)))
+            rows = pool.imap_unordered(_play, pending, chunksize)
+        for row in rows:
+            batch.append(row)
+            played += 1
+            now = time.perf_counter()
+            if len(batch) >= 256 or now - last_flush >= 1.0:
+                flush()
+                last_flush = now
+        if batch or progress is not None:
+            flush()
+        if pool is not None:
+            pool.close()
+            pool.join()
+            pool = None
+    finally:
+        if pool is not None:
+            pool.terminate()
+        results.close()
+    return played
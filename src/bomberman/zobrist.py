@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Tuple
+
+if TYPE_CHECKING:
+    from .arena import Arena
+    from .entities import Bomb, Player
+    from .game_state import GameState
+
+_MASK = (1 << 64) - 1
+# feature kinds lead every key, so equal numbers on different features never share one
+CELL = 1
+PLAYER_POSITION = 2
+PLAYER_STATS = 3
+BOMB = 4
+LAYOUT = 5
+# players are hashed on a 1/64-tile grid, the resolution net deltas send
+POSITION_STEPS = 64
+# memoised keys; the table starts over once it holds this many
+KEY_CACHE_SIZE = 1 << 16
+_KEYS: Dict[Tuple[int, ...], int] = {}
+_MISSING = object()
+
+
+def zobrist_key(*values: int) -> int:
+    """A fixed pseudo-random 64-bit key for a tuple of integers (chained splitmix64).
+
+    Unlike ``hash()`` it is the same in every process and on every platform,
+    so hashes can be compared between peers and stored in files. Keys are
+    memoised, since the same few cells and players come up tick after tick.
+    """
+    key = _KEYS.get(values)
+    if key is not None:
+        return key
+    if len(_KEYS) >= KEY_CACHE_SIZE:
+        _KEYS.clear()
+    z = 0
+    for value in values:
+        z = (z ^ value & _MASK) + 0x9E3779B97F4A7C15 & _MASK
+        z = (z ^ z >> 30) * 0xBF58476D1CE4E5B9 & _MASK
+        z = (z ^ z >> 27) * 0x94D049BB133111EB & _MASK
+        z ^= z >> 31
+    _KEYS[values] = z
+    return z
+
+
+def position_key(player: "Player") -> int:
+    x, y = player.position
+    return zobrist_key(PLAYER_POSITION, player.player_id,
+                       int(round(x * POSITION_STEPS)), int(round(y * POSITION_STEPS)))
+
+
+def stats_key(player: "Player") -> int:
+    return zobrist_key(PLAYER_STATS, player.player_id, player.alive, player.bomb_capacity,
+                       player.flame_length, player.active_bombs, player.score)
+
+
+def bomb_key(bomb: "Bomb") -> int:
+    tx, ty = bomb.tile_position()
+    return zobrist_key(BOMB, tx, ty, bomb.owner_id, bomb.flame_length)
+
+
+def cell_key(index: int, code: int, base: int) -> int:
+    """What a cell holding ``code`` adds to the arena hash; cells still at their layout ``base`` add nothing."""
+    return zobrist_key(CELL, index, code) ^ zobrist_key(CELL, index, base) if code != base else 0
+
+
+def arena_hash(arena: "Arena") -> int:
+    """The arena's hash recomputed from every cell; O(tiles)."""
+    value = 0
+    template = arena._template
+    layer = arena.powerup_layer
+    for index, code in enumerate(arena.cells):
+        value ^= cell_key(index, code | layer[index] << 4, template[index])
+    return value
+
+
+def state_hash(state: "GameState") -> int:
+    """``state.zobrist`` recomputed from scratch, for checking the incremental one."""
+    arena = state.arena
+    value = zobrist_key(LAYOUT, arena.width, arena.height, arena.player_count) ^ arena_hash(arena)
+    for player in state.players.values():
+        value ^= position_key(player) ^ stats_key(player)
+    for bomb in state.bombs:
+        value ^= bomb_key(bomb)
+    return value
+
+
+class TranspositionTable:
+    """Bounded map from state hashes (or tuples containing them) to results; evicts the least recently used.
+
+    Two different states can share a 64-bit hash, so callers that cannot
+    afford a rare wrong answer should store something to check against.
+    """
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entries = self._entries
+        value = entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+from .bomberman.config import ARENA_HEIGHT, ARENA_WIDTH, DEFAULT_PLAYER_COUNT
+from .bomberman.controllers import CONTROLLER_MODULES, CONTROLLERS
+from .bomberman.tournament import MatchRunner, TournamentConfig
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Step scripted matches without pygame or SDL.")
+    parser.add_argument("--matches", type=int, default=10)
+    known = ", ".join(sorted([*CONTROLLERS, *CONTROLLER_MODULES]))
+    parser.add_argument("--controllers", default="wanderer",
+                        help=f"comma-separated, one per player and cycled: {known} "
+                             "or package.module:ClassName")
+    parser.add_argument("--width", type=int, default=ARENA_WIDTH)
+    parser.add_argument("--height", type=int, default=ARENA_HEIGHT)
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYER_COUNT)
+    parser.add_argument("--wins", type=int, default=3, help="round wins that take the match")
+    parser.add_argument("--round-ticks", type=int, default=3600, help="ticks before a round is a draw")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    config = TournamentConfig(tuple(args.controllers.split(",")), args.width, args.height, args.players,
+                              wins=args.wins, round_ticks=args.round_ticks, seed=args.seed)
+    runner = MatchRunner(config)
+    total_ticks = 0
+    wins = [0] * (args.players + 1)
+    start = time.perf_counter()
+    for match_id in range(args.matches):
+        _, winner, rounds, ticks, bombs = runner.play(match_id)
+        total_ticks += ticks
+        wins[winner] += 1
+        outcome = f"P{winner} wins" if winner else "draw"
+        print(f"match {match_id}: {outcome} after {rounds} rounds, {ticks} ticks, {bombs} bombs")
+    elapsed = time.perf_counter() - start
+    rate = total_ticks / elapsed if elapsed > 0 else float("inf")
+    print(f"{total_ticks} ticks in {elapsed:.3f}s ({rate:,.0f} ticks/sec)")
+    rates = ", ".join(f"P{player_id} {count / args.matches:.0%}"
+                      for player_id, count in enumerate(wins) if player_id)
+    print(f"win rate: {rates}, draws {wins[0] / args.matches:.0%}")
+    for player_id, controller in enumerate(runner.controllers, start=1):
+        metrics = controller.metrics()
+        if metrics:
+            print(f"P{player_id} " + ", ".join(
+                f"{name} {value:,}" if isinstance(value, int) else f"{name} {value:,.1f}"
+                for name, value in metrics.items()))
+    if "pygame" in sys.modules:
+        print("warning: pygame was imported by a controller", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .bomberman.config import ARENA_HEIGHT, ARENA_WIDTH, DEFAULT_PLAYER_COUNT, FIXED_TIMESTEP
+from .bomberman.net import FRAME, INPUT, JOIN, MSG_INPUT, MSG_JOIN, WELCOME, StateMirror, frame, read_message
+from .bomberman.server import MatchServer
+
+
+async def simulated_client(host: str, port: int, layout: Tuple[int, int, int], duration: float,
+                           seed: int, mirror: bool, totals: Dict[str, int]) -> None:
+    """Joins, mashes random actions a few times a second and counts what the server sends back."""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(frame(JOIN.pack(MSG_JOIN, *layout)))
+    _, _, _, width, height, players = WELCOME.unpack(await read_message(reader))
+    state = StateMirror(width, height, players) if mirror else None
+
+    async def receive() -> None:
+        while True:
+            payload = await read_message(reader)
+            totals["bytes_down"] += FRAME.size + len(payload)
+            totals["messages"] += 1
+            if state is not None:
+                state.apply(payload)
+
+    receiver = asyncio.create_task(receive())
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            message = frame(INPUT.pack(MSG_INPUT, rng.randrange(32)))
+            writer.write(message)
+            totals["bytes_up"] += len(message)
+            await asyncio.sleep(rng.uniform(0.1, 0.3))
+    finally:
+        receiver.cancel()
+        writer.close()
+
+
+async def run(args: argparse.Namespace) -> int:
+    server = None
+    host, port = args.host, args.port
+    if port is None:
+        server = MatchServer(args.tick_rate, seed=1)
+        await server.start(host, 0)
+        host, port = server.address
+    layout = (args.width, args.height, args.players)
+    totals = {"bytes_down": 0, "bytes_up": 0, "messages": 0}
+    cpu_start = time.process_time()
+    clients = [
+        asyncio.create_task(simulated_client(host, port, layout, args.duration, seed, args.mirror, totals))
+        for seed in range(args.clients)
+    ]
+    await asyncio.sleep(args.duration * 0.9)
+    stats = server.stats() if server is not None else None
+    await asyncio.gather(*clients)
+    cpu = time.process_time() - cpu_start
+
+    print(f"{args.clients} clients for {args.duration:g}s, {layout[0]}x{layout[1]} arenas of {layout[2]} players")
+    print(f"downstream: {totals['bytes_down'] / args.clients / args.duration:,.0f} B/s per client "
+          f"({totals['bytes_down'] / max(1, totals['messages']):.1f} B/message)")
+    print(f"upstream:   {totals['bytes_up'] / args.clients / args.duration:,.0f} B/s per client")
+    print(f"process CPU: {cpu / args.duration:.0%} of one core")
+    if stats is not None:
+        expected = args.duration * 0.9 * args.tick_rate
+        print(f"server: {stats['matches']} matches, {stats['ticks']} ticks of ~{expected:.0f} expected, "
+              f"{stats['late_ticks']} late, {stats['cpu_us_per_match_tick']:.1f} us CPU per match tick")
+        await server.stop()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure server bandwidth and CPU with simulated loopback clients.")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--width", type=int, default=ARENA_WIDTH)
+    parser.add_argument("--height", type=int, default=ARENA_HEIGHT)
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYER_COUNT)
+    parser.add_argument("--tick-rate", type=float, default=1 / FIXED_TIMESTEP)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="target a running server instead of an in-process one")
+    parser.add_argument("--mirror", action="store_true", help="decode every message into a client-side state")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
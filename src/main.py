@@ -1,92 +1,258 @@
 from __future__ import annotations
+import argparse
 import os
+import random
+import time
+from typing import List, Optional
 
 import pygame
 
+from .bomberman.archive import ARCHIVE_SUFFIX, ArchiveWriter
 from .bomberman.assets import AssetManager
-from .bomberman.config import ARENA_HEIGHT, ARENA_WIDTH, SCALE_FACTOR, TILE_SIZE
-from .bomberman.entities import InputBuffer
-from .bomberman.game_state import GameState
+from .bomberman.capture import FrameRecorder
+from .bomberman.config import (
+    ARENA_HEIGHT,
+    ARENA_WIDTH,
+    DEFAULT_PLAYER_COUNT,
+    FIXED_TIMESTEP,
+)
+from .bomberman.entities import InputBuffer, action_from_input
+from .bomberman.game_state import GameState, MatchResult
 from .bomberman.input import KeyboardController
+from .bomberman.net import NetClient
+from .bomberman.profiling import Pacing, Profiler, null_span
+from .bomberman.renderer import Renderer, window_size
+from .bomberman.replay import SEED_RANGE, ReplayRecorder
+from .bomberman.search import SearchController
+from .bomberman.simthread import FrameView, SimulationThread
 
-WINDOW_WIDTH = ARENA_WIDTH * TILE_SIZE * SCALE_FACTOR
-WINDOW_HEIGHT = ARENA_HEIGHT * TILE_SIZE * SCALE_FACTOR
+# fixed-step mode drops simulation time rather than spiralling after a long stall
+MAX_STEPS_PER_FRAME = 5
 
 
-def draw_arena(screen: pygame.Surface, assets: AssetManager, state: GameState) -> None:
-    tile_size = TILE_SIZE * SCALE_FACTOR
-    for x, y, tile in state.arena.iter_tiles():
-        image = assets.tile_image(tile.tile_type)
-        screen.blit(image, (x * tile_size, y * tile_size))
+def seed_arg(text: str) -> int:
+    seed = int(text)
+    if seed not in SEED_RANGE:
+        raise argparse.ArgumentTypeError(f"{seed} does not fit in a signed 64-bit integer")
+    return seed
 
-    for powerup in state.powerups:
-        px, py = powerup.position
-        screen.blit(assets.powerup_image(powerup.powerup_type), (px * tile_size, py * tile_size))
 
-    for bomb in state.bombs:
-        bx, by = bomb.tile_position()
-        screen.blit(assets.bomb_image(), (bx * tile_size, by * tile_size))
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bomberman GB Arena")
+    parser.add_argument("--width", type=int, default=ARENA_WIDTH, help="arena width in tiles")
+    parser.add_argument("--height", type=int, default=ARENA_HEIGHT, help="arena height in tiles")
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYER_COUNT, help="number of players")
+    parser.add_argument("--fixed-step", action="store_true",
+                        help="advance the simulation in fixed ticks instead of the frame delta")
+    parser.add_argument("--seed", type=seed_arg, help="seed for power-up drops")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record a replay to PATH on exit, or a seekable session archive written as "
+                             "you play if PATH ends in .bma (implies --fixed-step)")
+    parser.add_argument("--connect", metavar="HOST:PORT",
+                        help="join a match on a server (python -m src.server) instead of playing locally")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase; F3 toggles the overlay, F12 dumps a Chrome trace")
+    parser.add_argument("--frame-budget", type=float, metavar="MS",
+                        help="dump a Chrome trace whenever a frame takes longer (implies --profile)")
+    parser.add_argument("--trace-dir", default="traces", help="where trace files are written")
+    parser.add_argument("--cpu", type=int, action="append", default=[], metavar="PLAYER",
+                        help="let the tree-search bot play PLAYER (repeatable); its search runs on a thread")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="record the window on a writer thread: PNG frames into directory PATH, "
+                             "or a raw video stream if PATH ends in .raw")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run the simulation at a fixed rate on its own thread and interpolate "
+                             "between ticks when drawing (implies --fixed-step)")
+    return parser.parse_args(argv)
 
-    explosion_surface = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
-    explosion_surface.fill((255, 200, 50, 160))
-    for explosion in state.explosions:
-        for tx, ty in explosion.tiles:
-            screen.blit(explosion_surface, (tx * tile_size, ty * tile_size))
 
-    for player_id, player in state.players.items():
-        if not player.alive:
-            continue
-        px = int(player.position[0] * tile_size)
-        py = int(player.position[1] * tile_size)
-        screen.blit(assets.player_image(player_id), (px - tile_size // 2, py - tile_size // 2))
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    seed = args.seed
+    if seed is None and args.record:
+        seed = random.randrange(2 ** 63)
+    client = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        client = NetClient(host or "127.0.0.1", int(port), args.width, args.height, args.players)
+        state = client.mirror.state
+    else:
+        state = GameState(args.width, args.height, args.players, seed=seed)
+    recorder = None
+    if args.record and client is None:
+        if args.record.endswith(ARCHIVE_SUFFIX):
+            recorder = ArchiveWriter(args.record, state, metadata={
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S"), "cpu": args.cpu})
+        else:
+            recorder = ReplayRecorder(state)
+    fixed_step = args.fixed_step or recorder is not None or args.threaded
 
-
-def main() -> None:
     os.environ.setdefault("SDL_VIDEO_CENTERED", "1")
     pygame.init()
-    pygame.display.set_caption("Bomberman GB Arena")
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    caption = "Bomberman GB Arena"
+    if client is not None:
+        caption += f" - match {client.match_id}, player {client.player_id}"
+    pygame.display.set_caption(caption)
+    screen = pygame.display.set_mode(window_size(args.width, args.height))
+    capture = FrameRecorder(screen, args.capture) if args.capture else None
     clock = pygame.time.Clock()
 
     assets = AssetManager()
     assets.load()
-    state = GameState()
     controller = KeyboardController()
     inputs = InputBuffer()
+    # bots overwrite the keyboard's slot for their player; never used over the network
+    bots = {} if client is not None else {player_id: SearchController(background=True) for player_id in args.cpu}
+    for player_id, bot in bots.items():
+        bot.reset(state, player_id, player_id if seed is None else seed + player_id)
+
+    def poll(buffer: InputBuffer) -> None:
+        controller.poll(buffer)
+        for player_id, bot in bots.items():
+            if state.players[player_id].alive and not state.round_over:
+                bot.act(state, player_id, buffer)
+
+    def reset_round() -> None:
+        state.reset_round()
+        for player_id, bot in bots.items():
+            bot.reset(state, player_id, bot.rng.randrange(2 ** 32))
+        if recorder is not None:
+            recorder.record_reset()
+
+    # threaded mode: the simulation thread owns ``state`` and bots; this loop only sends input and draws ``view``
+    sim = None
+    view = None
+    held = {}
+    frame_pacing = Pacing()
+    if args.threaded and client is None:
+        sim = SimulationThread(state, bots=bots, recorder=recorder)
+        view = FrameView(args.width, args.height, args.players)
     font = pygame.font.SysFont("Arial", 18)
+    renderer = Renderer(screen, assets, font)
 
+    profiler = None
+    span = null_span
+    if args.profile or args.frame_budget is not None:
+        profiler = Profiler(budget_ms=args.frame_budget, trace_dir=args.trace_dir)
+        if sim is None:
+            profiler.instrument(state)
+        span = profiler.span
+    show_overlay = profiler is not None
+    overlay_refresh = 0
+
+    result = MatchResult(state.round_over, state.winner)
+    accumulator = 0.0
+    if sim is not None:
+        sim.start()
+    last_frame = time.perf_counter_ns()
     running = True
     while running:
         dt = clock.tick(60) / 1000.0
+        now = time.perf_counter_ns()
+        frame_pacing.add(now - last_frame)
+        last_frame = now
         for event in pygame.event.get():
+            if controller.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 running = False
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_r and state.round_over:
-                state.reset_round()
-
-        controller.poll(inputs)
-        result = state.update(dt, inputs)
-
-        screen.fill((0, 0, 0))
-        draw_arena(screen, assets, state)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profiler is not None:
+                show_overlay = not show_overlay
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F12 and profiler is not None:
+                print(f"wrote {profiler.dump_trace()}")
+            elif (event.type == pygame.KEYDOWN and event.key == pygame.K_r and result.round_over
+                  and client is None):
+                if sim is not None:
+                    sim.call(reset_round)
+                else:
+                    reset_round()
 
-        score_text = font.render(
-            f"P1: {state.players[1].score}  P2: {state.players[2].score}", True, (255, 255, 255)
-        )
-        screen.blit(score_text, (10, 10))
-        if result.round_over:
-            if result.winner:
-                message = f"Player {result.winner} wins! Press R to reset."
-            else:
-                message = "Draw! Press R to reset."
-            msg_surface = font.render(message, True, (255, 255, 0))
-            screen.blit(msg_surface, (10, 30))
+        if client is not None:
+            # the server restarts finished rounds; either key set steers this client's player
+            with span("controller.poll"):
+                controller.poll(inputs)
+            client.send_action(action_from_input(inputs.get_state(1)) | action_from_input(inputs.get_state(2)))
+            inputs.clear()
+            with span("net.poll"):
+                client.poll()
+            result = MatchResult(state.round_over, state.winner)
+        elif sim is not None:
+            with span("controller.poll"):
+                controller.poll(inputs)
+            # only changes are sent; the simulation holds each action until the next one
+            stamp = time.perf_counter_ns()
+            for player_id, polled in inputs.states.items():
+                action = action_from_input(polled)
+                if held.get(player_id) != action:
+                    held[player_id] = action
+                    sim.inputs.push(player_id, action, stamp)
+            inputs.clear()
+            with span("interpolate"):
+                result = view.show(sim.frames)
+        elif fixed_step:
+            accumulator = min(accumulator + dt, MAX_STEPS_PER_FRAME * FIXED_TIMESTEP)
+            while accumulator >= FIXED_TIMESTEP:
+                with span("controller.poll"):
+                    poll(inputs)
+                if recorder is not None:
+                    recorder.record_tick(inputs)
+                result = state.update(FIXED_TIMESTEP, inputs)
+                accumulator -= FIXED_TIMESTEP
+        else:
+            with span("controller.poll"):
+                poll(inputs)
+            result = state.update(dt, inputs)
 
-        pygame.display.flip()
+        if profiler is not None:
+            overlay_refresh -= 1
+            if overlay_refresh <= 0:
+                # re-rendering overlay text every frame would show up in the numbers it reports
+                renderer.overlay = profiler.summary() if show_overlay else []
+                if show_overlay:
+                    renderer.overlay.extend(
+                        f"input P{player_id} p99 {latency['p99_ms']:.2f} ms"
+                        for player_id, latency in controller.latency_summary().items())
+                if show_overlay and sim is not None:
+                    metrics = sim.metrics()
+                    renderer.overlay.append(f"tick late p99 {metrics['late_p99_ms']:.2f} ms  "
+                                            f"dropped {metrics['dropped_ticks']}")
+                overlay_refresh = 30
+        with span("render"):
+            rects = renderer.draw(state if view is None else view.state, result)
+        with span("display.update"):
+            pygame.display.update(rects)
+        controller.frame_shown()
+        if capture is not None:
+            with span("capture"):
+                capture.capture()
+        if profiler is not None:
+            profiler.frame_done()
 
+    if capture is not None:
+        stats = capture.close()
+        print(f"captured {stats['captured']:,} frames to {args.capture}, dropped {stats['dropped']:,}")
     pygame.quit()
+    if sim is not None:
+        sim.stop()
+        pacing = frame_pacing.summary()
+        metrics = sim.metrics()
+        print(f"frames p50 {pacing['p50_ms']:.2f} ms  p99 {pacing['p99_ms']:.2f} ms; "
+              f"ticks {metrics['ticks']:,}, late p99 {metrics['late_p99_ms']:.2f} ms, "
+              f"max {metrics['late_max_ms']:.2f} ms, dropped {metrics['dropped_ticks']:,}, "
+              f"input p99 {metrics['input_p99_ms']:.2f} ms")
+    for player_id, latency in controller.latency_summary().items():
+        print(f"player {player_id} input to display p50 {latency['p50_ms']:.2f} ms  "
+              f"p99 {latency['p99_ms']:.2f} ms  max {latency['max_ms']:.2f} ms")
+    for bot in bots.values():
+        bot.close()
+    if client is not None:
+        client.close()
+    if isinstance(recorder, ArchiveWriter):
+        recorder.finish()
+    elif recorder is not None:
+        recorder.finish().save(args.record)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+
+from .bomberman.archive import ARCHIVE_SUFFIX, ReplayArchive, find_archives
+from .bomberman.game_state import GameState
+from .bomberman.replay import Replay, simulate, state_digest
+
+
+def render_video(replay: Replay, path: str, every: int) -> GameState:
+    """Simulates the replay and draws every ``every``-th tick offscreen into a FrameRecorder.
+
+    Nothing waits for the display or a frame clock, so this runs as fast as
+    drawing and the writer thread allow; frames are never dropped.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+
+    from .bomberman.assets import AssetManager
+    from .bomberman.capture import FrameRecorder
+    from .bomberman.renderer import Renderer, window_size
+
+    pygame.init()
+    screen = pygame.display.set_mode(window_size(replay.width, replay.height))
+    assets = AssetManager()
+    assets.load()
+    renderer = Renderer(screen, assets, pygame.font.Font(None, 18))
+    recorder = FrameRecorder(screen, path, fps=round(1 / (replay.dt * every), 3), drop=False)
+    ticks = 0
+
+    def draw(state: GameState, result) -> None:
+        nonlocal ticks
+        ticks += 1
+        if ticks % every == 0:
+            renderer.draw(state, result)
+            recorder.capture()
+
+    try:
+        return simulate(replay, on_tick=draw)
+    finally:
+        stats = recorder.close()
+        pygame.quit()
+        print(f"wrote {stats['written']:,} frames to {path}")
+
+
+def list_archives(directory: str, where: List[str]) -> int:
+    filters = {}
+    for condition in where:
+        key, _, value = condition.partition("=")
+        try:
+            filters[key] = json.loads(value)
+        except ValueError:
+            filters[key] = value
+    count = 0
+    for info in find_archives(directory, **filters):
+        count += 1
+        length = f"{info.ticks:>9,} ticks" if info.finished else "     live      "
+        print(f"{info.path}  {length}  {json.dumps(info.metadata, sort_keys=True)}")
+    print(f"{count} archive(s)")
+    return 0
+
+
+def seek(path: str, tick: int) -> int:
+    with ReplayArchive(path) as archive:
+        start = time.perf_counter()
+        state = archive.state_at(tick)
+        elapsed = time.perf_counter() - start
+        keyframe, _ = archive.keyframe(tick)
+    print(f"tick {tick} of {archive.ticks} in {elapsed * 1000:.1f} ms (keyframe at {keyframe})")
+    for player_id, player in state.players.items():
+        x, y = player.position
+        status = "alive" if player.alive else "down"
+        print(f"P{player_id}: ({x:.2f}, {y:.2f}) {status}, score {player.score}")
+    print(f"{len(state.bombs)} bomb(s), {len(state.explosions)} explosion(s)")
+    # compare against the same tick elsewhere to find where two runs diverge
+    print(f"state hash {state.zobrist:016x}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded match headlessly and check its digest.")
+    parser.add_argument("replay", help=f"path to a .bmr replay or a {ARCHIVE_SUFFIX} session archive "
+                                       "(a directory with --list)")
+    parser.add_argument("--video", metavar="PATH",
+                        help="also render it offscreen: PNG frames into directory PATH, "
+                             "or raw video if PATH ends in .raw")
+    parser.add_argument("--every", type=int, default=1, metavar="N", help="with --video, keep every N-th tick")
+    parser.add_argument("--seek", type=int, metavar="TICK",
+                        help=f"show the state at TICK of a {ARCHIVE_SUFFIX} archive instead of replaying it all")
+    parser.add_argument("--list", action="store_true", help="list the session archives under a directory")
+    parser.add_argument("--where", action="append", default=[], metavar="KEY=VALUE",
+                        help="with --list, only archives with this metadata (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        return list_archives(args.replay, args.where)
+    if args.seek is not None:
+        return seek(args.replay, args.seek)
+    if args.replay.endswith(ARCHIVE_SUFFIX):
+        with ReplayArchive(args.replay) as archive:
+            replay = archive.to_replay()
+    else:
+        replay = Replay.load(args.replay)
+    start = time.perf_counter()
+    state = render_video(replay, args.video, args.every) if args.video else simulate(replay)
+    elapsed = time.perf_counter() - start
+    rate = replay.ticks / elapsed if elapsed > 0 else float("inf")
+    print(f"{replay.ticks} ticks in {elapsed:.3f}s ({rate:,.0f} ticks/sec)")
+    scores = "  ".join(f"P{player_id}: {player.score}" for player_id, player in state.players.items())
+    print(f"final scores: {scores}")
+
+    if not replay.digest:
+        print("archive is unfinished: no digest to check")
+        return 0
+    if state_digest(state) != replay.digest:
+        print("DESYNC: final state does not match the recorded digest")
+        return 1
+    print("digest OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+
+from .bomberman.config import FIXED_TIMESTEP
+from .bomberman.server import MatchServer
+
+
+async def serve(host: str, port: int, tick_rate: float, seed: Optional[int]) -> None:
+    server = MatchServer(tick_rate, seed)
+    await server.start(host, port)
+    print(f"serving on {server.address[0]}:{server.address[1]} at {tick_rate:g} ticks/sec")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            stats = server.stats()
+            print(f"{stats['matches']} matches, {stats['clients']} clients, "
+                  f"{stats['cpu_us_per_match_tick']:.0f} us/match tick, {stats['late_ticks']} late ticks")
+    finally:
+        await server.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Host Bomberman matches for networked clients.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--tick-rate", type=float, default=1 / FIXED_TIMESTEP)
+    parser.add_argument("--seed", type=int, help="base seed for power-up drops")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.tick_rate, args.seed))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from collections import Counter
+from typing import List, Optional
+
+from .bomberman.config import ARENA_HEIGHT, ARENA_WIDTH, DEFAULT_PLAYER_COUNT
+from .bomberman.controllers import CONTROLLERS
+from .bomberman.tournament import TournamentConfig, load_results, run_tournament
+
+
+def report_progress(played: int, total: int, elapsed: float) -> None:
+    rate = played / elapsed if elapsed > 0 else 0.0
+    eta = (total - played) / rate if rate else 0.0
+    print(f"\r{played}/{total} matches, {rate:,.1f} matches/sec, ETA {eta:,.0f}s", end="", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run bot-vs-bot matches across a process pool.")
+    parser.add_argument("out", help="results directory (one .col file per column plus meta.json)")
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--controllers", default="wanderer",
+                        help=f"comma-separated, one per player and cycled: {', '.join(CONTROLLERS)} "
+                             "or package.module:ClassName")
+    parser.add_argument("--width", type=int, default=ARENA_WIDTH)
+    parser.add_argument("--height", type=int, default=ARENA_HEIGHT)
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYER_COUNT)
+    parser.add_argument("--wins", type=int, default=3, help="round wins that take the match")
+    parser.add_argument("--max-rounds", type=int, default=9)
+    parser.add_argument("--round-ticks", type=int, default=3600, help="ticks before a round is a draw")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="processes to use (default: all cores)")
+    parser.add_argument("--resume", action="store_true", help="continue a run, skipping finished matches")
+    args = parser.parse_args(argv)
+
+    config = TournamentConfig(tuple(args.controllers.split(",")), args.width, args.height, args.players,
+                              args.wins, args.max_rounds, args.round_ticks, args.seed)
+    try:
+        played = run_tournament(config, args.matches, args.out, args.workers, args.resume, report_progress)
+    except (FileExistsError, ValueError) as error:
+        print(error, file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+
+    results = load_results(args.out)
+    wins = Counter(results["winner"])
+    total = len(results["match"])
+    print(f"played {played} new matches, {total} on record")
+    for player_id in range(1, args.players + 1):
+        controller = config.controllers[(player_id - 1) % len(config.controllers)]
+        print(f"P{player_id} ({controller}): {wins[player_id] / max(1, total):.1%} wins")
+    print(f"draws: {wins[0] / max(1, total):.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from src.bomberman.archive import ArchiveWriter, ReplayArchive, find_archives, read_info, write_archive
+from src.bomberman.config import FIXED_TIMESTEP
+from src.bomberman.entities import InputBuffer, InputState
+from src.bomberman.game_state import GameState
+from src.bomberman.replay import ReplayRecorder, verify
+
+INTERVAL = 50
+
+
+def play(writer: ArchiveWriter, state: GameState, ticks: int, rng: random.Random, frames: list,
+         recorder=None) -> None:
+    """Plays random inputs, keeping the snapshot every tick starts from in ``frames``."""
+    buffer = InputBuffer()
+    for _ in range(ticks):
+        if state.round_over:
+            state.reset_round()
+            writer.record_reset()
+            if recorder is not None:
+                recorder.record_reset()
+        for player_id in state.players:
+            move = rng.choice([(1.0, 0.0), (-1.0, 0.0), (0.0, 1.0), (0.0, -1.0)])
+            buffer.set_state(player_id, InputState(move=move, place_bomb=rng.random() < 0.05))
+        writer.record_tick(buffer)
+        if recorder is not None:
+            recorder.record_tick(buffer)
+        frames.append(state.snapshot())
+        state.update(FIXED_TIMESTEP, buffer)
+
+
+def test_seeking_matches_the_live_match(tmp_path) -> None:
+    state = GameState(seed=4)
+    path = tmp_path / "session.bma"
+    writer = ArchiveWriter(path, state, INTERVAL, metadata={"arena": "classic"})
+    recorder = ReplayRecorder(state)
+    frames = []
+    play(writer, state, 1500, random.Random(8), frames, recorder)
+    writer.finish()
+    frames.append(state.snapshot())
+    replay = recorder.finish()
+    assert replay.resets
+
+    with ReplayArchive(path) as archive:
+        assert archive.finished and archive.ticks == 1500
+        ticks = {0, 1, INTERVAL - 1, INTERVAL, 1499, 1500, *replay.resets, *(r + 1 for r in replay.resets)}
+        ticks.update(random.Random(1).sample(range(1500), 30))
+        scratch = GameState(seed=4)
+        for tick in sorted(ticks):
+            assert archive.state_at(tick, scratch).snapshot() == frames[tick], tick
+        converted = archive.to_replay()
+    assert converted.inputs == replay.inputs and converted.resets == replay.resets
+    assert converted.digest == replay.digest and verify(converted)
+    with ReplayArchive(path) as archive, pytest.raises(IndexError):
+        archive.state_at(1501)
+
+    copy = tmp_path / "copy.bma"
+    write_archive(replay, copy, keyframe_interval=200)
+    with ReplayArchive(copy) as archive:
+        assert archive.state_at(777).snapshot() == frames[777]
+
+
+def test_live_archives_can_be_followed(tmp_path) -> None:
+    state = GameState(seed=2)
+    path = tmp_path / "live.bma"
+    writer = ArchiveWriter(path, state, INTERVAL)
+    frames = []
+    rng = random.Random(3)
+    play(writer, state, 130, rng, frames)
+    # two whole blocks are on disk; the rest is still buffered
+    archive = ReplayArchive(path)
+    assert not archive.finished and archive.ticks == 100 and read_info(path).ticks is None
+    assert archive.state_at(75).snapshot() == frames[75]
+
+    writer.flush()
+    archive.refresh()
+    assert archive.ticks == 130
+    play(writer, state, 40, rng, frames)
+    writer.finish()
+    archive.refresh()
+    assert archive.finished and archive.ticks == 170
+    assert archive.state_at(160).snapshot() == frames[160]
+    archive.close()
+
+    # a torn write leaves everything before it readable
+    path.write_bytes(path.read_bytes()[:writer.blocks[-1][1] + 10])
+    with ReplayArchive(path) as torn:
+        assert not torn.finished and torn.ticks == 150
+
+
+def test_archives_are_listed_from_their_headers(tmp_path) -> None:
+    for index in range(6):
+        state = GameState(seed=index)
+        writer = ArchiveWriter(tmp_path / f"match{index}.bma", state, INTERVAL,
+                               metadata={"server": "eu" if index % 2 else "us", "match": index})
+        play(writer, state, 20 * (index + 1), random.Random(index), [])
+        if index != 5:
+            writer.finish()
+        else:
+            writer.flush()
+    (tmp_path / "junk.bma").write_bytes(b"not an archive")
+
+    found = list(find_archives(tmp_path, server="eu"))
+    assert [info.metadata["match"] for info in found] == [1, 3, 5]
+    assert [info.ticks for info in found] == [40, 80, None]
+    finished = list(find_archives(tmp_path, where=lambda info: info.finished and info.ticks > 50))
+    assert [info.metadata["match"] for info in finished] == [2, 3, 4]
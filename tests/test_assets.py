@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import os
+import shutil
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from src.bomberman.assets import ASSET_ROOT, AssetManager
+from src.bomberman.atlas import SpriteAtlas, source_files
+from src.bomberman.config import SCALE_FACTOR
+
+
+@pytest.fixture
+def display():
+    pygame.init()
+    yield pygame.display.set_mode((64, 64))
+    pygame.quit()
+
+
+def pixels(surface) -> bytes:
+    return pygame.image.tobytes(surface, "RGBA")
+
+
+def test_atlas_matches_individually_scaled_sources(tmp_path, display) -> None:
+    cold = SpriteAtlas.open(ASSET_ROOT, tmp_path)
+    warm = SpriteAtlas.open(ASSET_ROOT, tmp_path)
+    assert cold.rebuilt and not warm.rebuilt
+    for key, path in source_files(ASSET_ROOT).items():
+        image = pygame.image.load(str(path)).convert()
+        size = (image.get_width() * SCALE_FACTOR, image.get_height() * SCALE_FACTOR)
+        assert pixels(warm.image(key)) == pixels(pygame.transform.scale(image, size)), key
+
+
+def test_changed_sources_invalidate_the_cache_and_new_skins_load(tmp_path, display) -> None:
+    root = tmp_path / "assets"
+    shutil.copytree(ASSET_ROOT, root)
+    cache = tmp_path / "cache"
+    assets = AssetManager(root, cache)
+    assets.load()
+    assert assets.atlas.rebuilt
+    tinted = pixels(assets.player_image(3))
+
+    shutil.copy(root / "sprites/bomb.ppm", root / "sprites/player3.ppm")
+    assets.load()
+    assert assets.atlas.rebuilt
+    assert pixels(assets.player_image(3)) == pixels(assets.bomb_image()) != tinted
+
+    assets.load()
+    assert not assets.atlas.rebuilt
+    stat = (root / "tiles/floor.ppm").stat()
+    os.utime(root / "tiles/floor.ppm", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assets.load()
+    assert assets.atlas.rebuilt
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.bomberman.batched import POWERUP_CODES, TILE_CODES, BatchedGameState
+from src.bomberman.config import PowerUpType
+from src.bomberman.entities import InputBuffer, input_from_action
+from src.bomberman.game_state import GameState
+
+DT = 1 / 60
+TICKS = 900
+SEEDS = [3, 17, 42, 1234, 9001, 65535]
+CAPACITY = 3  # extra bombs per player so chain reactions show up in short runs
+LAYOUTS = [(13, 11, 2), (21, 15, 4)]
+DIRECTIONS = {1: (-1, 0), 2: (1, 0), 4: (0, -1), 8: (0, 1)}
+
+
+def choose_action(state: GameState, player_id: int, held: int, rng: random.Random) -> tuple:
+    """Wander toward power-ups and drop bombs just before leaving a tile, so the player escapes."""
+    player = state.players[player_id]
+    dx, dy = DIRECTIONS.get(held, (0, 0))
+    tx, ty = player.tile_position()
+    for action, (nx, ny) in DIRECTIONS.items():
+        if state._tile_is_open(tx + nx, ty + ny) and state.arena.get_tile(tx + nx, ty + ny).powerup:
+            return action, action
+    if held == 0 or not state._tile_is_open(tx + dx, ty + dy) or rng.random() < 0.02:
+        held = rng.choice(list(DIRECTIONS))
+    dx, dy = DIRECTIONS[held]
+    offset = (player.position[0] - tx) * dx + (player.position[1] - ty) * dy
+    bomb = 16 if offset > 0.4 and state._tile_is_open(tx + dx, ty + dy) and rng.random() < 0.5 else 0
+    return held, held | bomb
+
+
+def seeded_powerups(state: GameState) -> dict:
+    """Power-ups in every spawn pocket so pickups show up in short runs."""
+    arena = state.arena
+    powerups = {}
+    for sx, sy in arena.spawns:
+        nx = sx + 1 if sx < arena.width / 2 else sx - 1
+        ny = sy + 1 if sy < arena.height / 2 else sy - 1
+        powerups[(nx, sy)] = PowerUpType.BOMB
+        powerups[(sx, ny)] = PowerUpType.FLAME
+    return powerups
+
+
+def scalar_view(state: GameState) -> tuple:
+    players = tuple(
+        (p.position, p.alive, p.bomb_capacity, p.flame_length, p.active_bombs, p.score)
+        for _, p in sorted(state.players.items())
+    )
+    grid = tuple(TILE_CODES[tile.tile_type] for _, _, tile in state.arena.iter_tiles())
+    powerups = tuple(POWERUP_CODES[tile.powerup] for _, _, tile in state.arena.iter_tiles())
+    bombs = sorted((b.tile_position(), b.owner_id, b.flame_length, b.timer) for b in state.bombs)
+    flames = sorted(tile for explosion in state.explosions for tile in explosion.tiles)
+    return players, grid, powerups, bombs, flames, state.round_over, state.winner
+
+
+def batched_view(batch: BatchedGameState, m: int) -> tuple:
+    players = tuple(
+        ((batch.positions[m, p, 0].item(), batch.positions[m, p, 1].item()),
+         bool(batch.alive[m, p]), int(batch.bomb_capacity[m, p]), int(batch.flame_length[m, p]),
+         int(batch.active_bombs[m, p]), int(batch.score[m, p]))
+        for p in range(batch.player_count)
+    )
+    grid = tuple(batch.tiles[m].ravel().tolist())
+    powerups = tuple(batch.powerup_grid[m].ravel().tolist())
+    bombs = sorted(
+        (tuple(batch.bomb_tile[m, b].tolist()), int(batch.bomb_owner[m, b]) + 1,
+         int(batch.bomb_flame[m, b]), (batch.bomb_deadline[m, b] - batch.clock[m]).item())
+        for b in np.nonzero(batch.bomb_active[m])[0]
+    )
+    flames = sorted(batch.explosion_tiles(m))
+    winner = int(batch.winner[m]) or None
+    return players, grid, powerups, bombs, flames, bool(batch.round_over[m]), winner
+
+
+def run_scalar(seed: int, ticks: int, layout: tuple, dt: float = DT) -> tuple:
+    """Play one match on the scalar engine; returns the per-tick views and the actions used."""
+    policy_rng = random.Random(seed + 1)
+    state = GameState(*layout, debug=True, seed=seed)
+    buffer = InputBuffer()
+    players = len(state.players)
+    held = [0] * players
+    views = []
+    actions = np.zeros((ticks, players), dtype=np.uint8)
+    for t in range(ticks):
+        if state.round_over or t == 0:
+            state.reset_round()
+            for player in state.players.values():
+                player.bomb_capacity = CAPACITY
+            state.rehash()
+            for (tx, ty), kind in seeded_powerups(state).items():
+                state.spawn_powerup(tx, ty, kind)
+        for p in range(players):
+            held[p], actions[t, p] = choose_action(state, p + 1, held[p], policy_rng)
+            buffer.set_state(p + 1, input_from_action(int(actions[t, p])))
+        state.update(dt, buffer)
+        views.append(scalar_view(state))
+    return views, actions
+
+
+@pytest.mark.parametrize("dt", [DT, 6 * DT])
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_batched_matches_scalar_engine_tick_for_tick(layout: tuple, dt: float) -> None:
+    ticks = TICKS if dt == DT else TICKS // 6
+    runs = [run_scalar(seed, ticks, layout, dt) for seed in SEEDS]
+    expected = [views for views, _ in runs]
+    actions = np.stack([match_actions for _, match_actions in runs], axis=1)
+
+    batch = BatchedGameState(len(SEEDS), seeds=SEEDS, bomb_slots=1, width=layout[0],
+                             height=layout[1], player_count=layout[2])
+    powerups = seeded_powerups(GameState(*layout))
+    rounds = 0
+    for t in range(ticks):
+        rounds += int(batch.round_over.sum())
+        starting = batch.round_over.copy() if t else np.ones(len(SEEDS), dtype=bool)
+        batch.reset(starting)
+        batch.bomb_capacity[starting] = CAPACITY
+        for (tx, ty), kind in powerups.items():
+            batch.powerup_grid[starting, ty, tx] = POWERUP_CODES[kind]
+        batch.step(dt, actions[t])
+        for m in range(len(SEEDS)):
+            assert batched_view(batch, m) == expected[m][t], f"match {m} diverged at tick {t}"
+    assert rounds > 0
+
+
+def test_rejects_mismatched_action_shape() -> None:
+    batch = BatchedGameState(4)
+    with pytest.raises(ValueError):
+        batch.step(DT, np.zeros((4, 3), dtype=np.uint8))
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import json
+
+from benchmarks import bench_simulation, bench_snapshot  # noqa: F401  (registers benchmarks)
+from benchmarks.registry import BENCHMARKS, compare, load_history, run
+
+
+def test_simulation_benchmarks_run_and_record_history(tmp_path) -> None:
+    for name, bench in BENCHMARKS.items():
+        if name.startswith(("update.", "explosion.", "arena.", "state.")):
+            bench.setup()()
+    history = tmp_path / "history.jsonl"
+    record = run(["arena.reset", "snapshot.take"], repeat=1, min_time=0.001, history=history)
+    assert set(record["results"]) == {"arena.reset", "snapshot.take"}
+    assert load_history(history) == [json.loads(json.dumps(record))]
+
+
+def test_compare_flags_slowdowns_past_the_threshold() -> None:
+    baseline = {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "gone": {"seconds": 1.0}}
+    current = {"a": {"seconds": 1.05}, "b": {"seconds": 1.2}, "new": {"seconds": 1.0}}
+    assert compare(current, baseline, threshold=0.1) == [("a", 1.0, 1.05, False), ("b", 1.0, 1.2, True)]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from src.bomberman.capture import FrameRecorder
+from src.bomberman.config import FIXED_TIMESTEP
+from src.bomberman.entities import InputBuffer, InputState
+from src.bomberman.game_state import GameState
+from src.bomberman.replay import ReplayRecorder
+
+
+@pytest.fixture
+def screen():
+    pygame.init()
+    yield pygame.display.set_mode((64, 48))
+    pygame.quit()
+
+
+def test_raw_stream_holds_the_exact_pixels(screen, tmp_path) -> None:
+    recorder = FrameRecorder(screen, tmp_path / "match.raw", buffers=2, drop=False)
+    frames = []
+    for shade in range(5):
+        screen.fill((shade * 40, 255 - shade * 40, 7))
+        frames.append(bytes(screen.get_buffer()))
+        assert recorder.capture()
+    assert recorder.close() == {"captured": 5, "written": 5, "dropped": 0}
+    assert (tmp_path / "match.raw").read_bytes() == b"".join(frames)
+    meta = json.loads((tmp_path / "match.raw.json").read_text())
+    assert (meta["width"], meta["height"], meta["pix_fmt"]) == (64, 48, "bgr0")
+
+
+def test_frames_are_dropped_not_waited_for_when_the_writer_lags(screen, tmp_path) -> None:
+    recorder = FrameRecorder(screen, tmp_path / "match.raw", buffers=3)
+    release = threading.Event()
+    write = recorder.sink.write
+    recorder.sink.write = lambda index, pixels: (release.wait(), write(index, pixels))
+    results = [recorder.capture() for _ in range(10)]
+    assert results.count(True) == 3 and recorder.dropped == 7
+    release.set()
+    assert recorder.close()["written"] == 3
+
+
+def test_a_failing_sink_is_reported_instead_of_hanging(screen, tmp_path) -> None:
+    recorder = FrameRecorder(screen, tmp_path / "match.raw", buffers=2, drop=False)
+
+    def full(index, pixels):
+        raise OSError(28, "No space left on device")
+
+    recorder.sink.write = full
+    with pytest.raises(OSError, match="No space"):
+        for _ in range(5):
+            recorder.capture()
+    with pytest.raises(OSError, match="No space"):
+        recorder.close()
+
+
+def test_png_frames_from_a_surface_in_another_format(tmp_path) -> None:
+    pygame.init()
+    try:
+        surface = pygame.Surface((20, 10), 0, 24)
+        surface.fill((200, 100, 50))
+        recorder = FrameRecorder(surface, tmp_path / "frames")
+        recorder.capture()
+        recorder.close()
+        image = pygame.image.load(str(tmp_path / "frames" / "frame000000.png"))
+    finally:
+        pygame.quit()
+    assert image.get_size() == (20, 10) and image.get_at((3, 3)) == (200, 100, 50, 255)
+
+
+def test_replays_render_offline(tmp_path) -> None:
+    from src import replay as replay_cli
+
+    state = GameState(seed=9)
+    recorder = ReplayRecorder(state)
+    buffer = InputBuffer()
+    for tick in range(60):
+        buffer.set_state(1, InputState(move=(1.0, 0.0)))
+        recorder.record_tick(buffer)
+        state.update(FIXED_TIMESTEP, buffer)
+    recorder.finish().save(tmp_path / "match.bmr")
+
+    video = tmp_path / "match.raw"
+    assert replay_cli.main([str(tmp_path / "match.bmr"), "--video", str(video), "--every", "4"]) == 0
+    meta = json.loads((tmp_path / "match.raw.json").read_text())
+    assert meta["written"] == 15 and meta["fps"] == 15
+    assert video.stat().st_size == 15 * meta["width"] * meta["height"] * 4
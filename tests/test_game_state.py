@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import random
+import tracemalloc
+
 import pytest
 
-from src.bomberman.config import PowerUpType, TileType
-from src.bomberman.entities import Bomb, InputBuffer, InputState, PowerUp
+from src.bomberman.arena import BLAST_DIRECTIONS, Arena, Tile, blast_covers, blast_tiles
+from src.bomberman.config import FIXED_TIMESTEP, PowerUpType, TileType
+from src.bomberman.entities import ACTION_INPUTS, ACTION_LEFT, ACTION_RIGHT, Bomb, InputBuffer, InputState, PowerUp
 from src.bomberman.game_state import GameState
 
 
@@ -20,7 +24,7 @@ def test_bomb_explosion_clears_destructible(game_state: GameState) -> None:
     game_state._try_place_bomb(player)
     bomb = game_state.bombs[0]
     bomb.timer = 0
-    game_state._update_bombs(0)
+    game_state._update_bombs(game_state.clock)
     assert game_state.arena.get_tile(*target_tile).tile_type == TileType.FLOOR
 
 
@@ -30,19 +34,101 @@ def test_player_blocked_by_solid(game_state: GameState) -> None:
     buffer = InputBuffer()
     buffer.set_state(1, InputState(move=(0.0, 1.0)))
     game_state.update(0.25, buffer)
-    assert player.position == (2.0, 1.0)
+    # up to the pillar's edge, never into it
+    assert player.position[0] == 2.0 and 1.0 < player.position[1] < 1.5
+    assert player.tile_position() == (2, 1)
+
+
+def walk(state: GameState, script: list, ticks_per_update: int) -> list:
+    """Holds each (move, ticks) of ``script`` for player 1; returns its position at every multiple of 8 ticks."""
+    buffer = InputBuffer()
+    player = state.players[1]
+    positions = []
+    for move, ticks in script:
+        for tick in range(0, ticks, ticks_per_update):
+            buffer.set_state(1, InputState(move=move))
+            state.update(ticks_per_update * FIXED_TIMESTEP, buffer)
+            assert state.arena.is_walkable(*player.tile_position())
+            if (tick + ticks_per_update) % 8 == 0:
+                positions.append(player.position)
+    return positions
+
+
+@pytest.mark.parametrize("speed", [4.0, 12.0])
+def test_coarse_steps_move_players_like_fine_steps(speed: float) -> None:
+    # walls, the arena edge, a crate, a bomb, and sliding along the top wall while pressing into it
+    script = [((1.0, 0.0), 64), ((0.0, 1.0), 16), ((0.0, 1.0), 24), ((-1.0, 0.0), 40), ((0.0, -1.0), 32),
+              ((0.7071, -0.7071), 48), ((1.0, 0.0), 80), ((0.0, 1.0), 48), ((-1.0, 0.0), 24)]
+    # diagonals through the pillar grid, where single ticks check a different lane each step
+    diagonal = [((0.7071, 0.7071), 32), ((-0.7071, 0.7071), 24), ((0.7071, -0.7071), 40)]
+    for moves in (script, diagonal):
+        runs = []
+        for ticks_per_update in (1, 4, 8):
+            state = GameState()
+            for x, y, tile in state.arena.iter_tiles():
+                if tile.tile_type is TileType.DESTRUCTIBLE and y < 5:
+                    state.arena.destroy_tile(x, y)
+            state.players[1].speed = speed
+            state.add_bomb(Bomb(2, (5, 3), 60.0, 1))
+            runs.append(walk(state, moves, ticks_per_update))
+        fine = runs[0]
+        for coarse in runs[1:]:
+            assert len(coarse) == len(fine)
+            for got, expected in zip(coarse, fine):
+                assert got == pytest.approx(expected, abs=1e-9)
+        tiles = {(round(x), round(y)) for x, y in fine}
+        assert (5, 3) not in tiles
+        assert (11, 1) in tiles if moves is script else len(tiles) > 3
+
+
+def play_rounds(seed: int, ticks_per_update: int) -> tuple:
+    """Random moves held for 4 ticks with bombs dropped on the first; returns who survived and won."""
+    rng = random.Random(seed)
+    state = GameState(seed=seed)
+    buffer = InputBuffer()
+    moves = [(1.0, 0.0), (-1.0, 0.0), (0.0, 1.0), (0.0, -1.0), (0.0, 0.0)]
+    while not state.round_over and state.clock < 30:
+        chunk = {player_id: (rng.choice(moves), rng.random() < 0.15) for player_id in state.players}
+        for tick in range(0, 4, ticks_per_update):
+            for player_id, (move, bomb) in chunk.items():
+                buffer.set_state(player_id, InputState(move=move, place_bomb=bomb and tick == 0))
+            state.update(ticks_per_update * FIXED_TIMESTEP, buffer)
+    return tuple(player.alive for player in state.players.values()), state.winner
+
+
+@pytest.mark.parametrize("seed", [94, 160])
+def test_coarse_steps_set_off_bombs_in_the_tick_they_belong_to(seed: int) -> None:
+    # in these matches a bomb goes off, or is dropped, partway through a 4-tick step
+    assert play_rounds(seed, 4) == play_rounds(seed, 1)
+
+
+def test_one_long_stride_stops_before_bombs_but_leaves_its_own(game_state: GameState) -> None:
+    game_state.arena.destroy_tile(3, 1)
+    game_state.arena.destroy_tile(4, 1)
+    player = game_state.players[1]
+    player.position = (1.0, 1.0)
+    game_state._try_place_bomb(player)
+    buffer = InputBuffer()
+    buffer.set_state(1, InputState(move=(1.0, 0.0)))
+    game_state.update(0.5, buffer)
+    assert player.position == (3.0, 1.0)
+
+    buffer.set_state(1, InputState(move=(-1.0, 0.0)))
+    game_state.update(1.0, buffer)
+    assert player.tile_position() == (2, 1) and player.position[0] == 1.5
 
 
 def test_powerup_pickup_increases_capacity(game_state: GameState) -> None:
     player = game_state.players[1]
     start_capacity = player.bomb_capacity
     tx, ty = 2, 1
-    game_state.arena.place_powerup(tx, ty, PowerUpType.BOMB)
-    game_state.powerups.append(PowerUp((tx, ty), PowerUpType.BOMB))
+    game_state.spawn_powerup(tx, ty, PowerUpType.BOMB)
+    assert game_state.powerups == (PowerUp((tx, ty), PowerUpType.BOMB),)
     buffer = InputBuffer()
     buffer.set_state(1, InputState(move=(1.0, 0.0)))
     game_state.update(0.25, buffer)
     assert player.bomb_capacity == start_capacity + 1
+    assert game_state.powerups == ()
 
 
 def test_round_end_when_opponent_defeated(game_state: GameState) -> None:
@@ -55,3 +141,205 @@ def test_round_end_when_opponent_defeated(game_state: GameState) -> None:
     assert game_state.round_over is True
     assert game_state.winner == 1
     assert game_state.players[1].score == 1
+
+
+def test_occupancy_index_tracks_bombs_players_and_powerups() -> None:
+    state = GameState(debug=True)
+    player = state.players[1]
+    buffer = InputBuffer()
+    buffer.set_state(1, InputState(move=(1.0, 0.0)))
+    for _ in range(6):
+        state.update(1 / 60, buffer)
+        buffer.set_state(1, InputState(move=(1.0, 0.0)))
+    assert player in state.occupancy.players_at(player.tile_position())
+
+    buffer.set_state(1, InputState(place_bomb=True))
+    state.update(1 / 60, buffer)
+    bomb = state.bombs[0]
+    assert state.occupancy.bombs[bomb.tile_position()] is bomb
+    assert not state._tile_is_open(*bomb.tile_position())
+
+    bomb.timer = 0
+    state._update_bombs(state.clock)
+    assert state.occupancy.bombs == {}
+    state.occupancy.verify(state.bombs, state.players.values())
+
+
+def test_occupancy_verify_detects_desync(game_state: GameState) -> None:
+    game_state.bombs.append(Bomb(owner_id=1, position=(1, 1), timer=1.0, flame_length=1))
+    with pytest.raises(AssertionError):
+        game_state.occupancy.verify(game_state.bombs, game_state.players.values())
+
+
+def test_large_arena_spawns_many_players_in_open_pockets() -> None:
+    state = GameState(width=255, height=255, player_count=64)
+    assert len(state.players) == 64
+    tiles = {player.tile_position() for player in state.players.values()}
+    assert len(tiles) == 64
+    for tx, ty in tiles:
+        assert state.arena.get_tile(tx, ty).tile_type == TileType.FLOOR
+    assert state.players[2].tile_position() == (253, 253)
+
+
+def test_arena_reset_restores_only_changed_tiles() -> None:
+    state = GameState(width=31, height=21, player_count=4)
+    arena = state.arena
+    arena.destroy_tile(3, 1)
+    arena.place_powerup(3, 1, PowerUpType.FLAME)
+    untouched = arena.get_tile(5, 1)
+    arena.reset()
+    assert arena.get_tile(3, 1).tile_type == TileType.DESTRUCTIBLE
+    assert arena.get_tile(3, 1).powerup is None
+    assert arena.get_tile(5, 1) is untouched
+    assert arena.changes == []
+
+
+def test_scores_carry_over_between_rounds(game_state: GameState) -> None:
+    game_state.players[1].score = 2
+    game_state.reset_round()
+    assert game_state.players[1].score == 2
+    assert game_state.players[1].position == (1.0, 1.0)
+
+
+def test_rejects_oversized_arena() -> None:
+    with pytest.raises(ValueError):
+        GameState(width=256, height=11)
+    with pytest.raises(ValueError):
+        GameState(width=7, height=7, player_count=20)
+
+
+def test_reassigning_a_timer_reschedules_the_bomb(game_state: GameState) -> None:
+    game_state.arena.destroy_tile(5, 3)
+    bomb = Bomb(1, (5, 3), 2.5, 1)
+    game_state.add_bomb(bomb)
+    buffer = InputBuffer()
+    for _ in range(30):
+        game_state.update(FIXED_TIMESTEP, buffer)
+    bomb.timer = 0.25
+    assert bomb.timer == pytest.approx(0.25)
+    for _ in range(14):
+        game_state.update(FIXED_TIMESTEP, buffer)
+    assert game_state.bombs == [bomb]
+    game_state.update(FIXED_TIMESTEP, buffer)
+    assert game_state.bombs == [] and len(game_state.explosions) == 1
+    assert game_state.next_event_in() == pytest.approx(0.5 - FIXED_TIMESTEP)
+
+
+def test_skipping_idle_ticks_matches_stepping() -> None:
+    def setup() -> GameState:
+        state = GameState(width=15, height=13, player_count=4, seed=3)
+        for delay, tile in zip((1.0, 1.5, 0.4), ((5, 3), (9, 7), (7, 5))):
+            state.arena.destroy_tile(*tile)
+            state.add_bomb(Bomb(1, tile, delay, 3))
+        return state
+
+    stepped, skipped = setup(), setup()
+    buffer = InputBuffer()
+    for _ in range(200):
+        stepped.update(FIXED_TIMESTEP, buffer)
+    ticks = 0
+    updates = 0
+    while ticks < 200:
+        ticks += skipped.skip_idle(FIXED_TIMESTEP, 200 - ticks)
+        if ticks < 200:
+            skipped.update(FIXED_TIMESTEP, buffer)
+            ticks += 1
+            updates += 1
+    assert skipped.snapshot() == stepped.snapshot()
+    assert len(stepped.arena.changed_cells()) > 6  # the blasts broke crates
+    assert updates == 6  # three detonations and three flames dying out
+
+
+def walked_reach(arena: Arena, cx: int, cy: int, flame: int) -> tuple:
+    """The step-by-step walk the ray tables replace."""
+    reach = []
+    for dx, dy in BLAST_DIRECTIONS:
+        length = 0
+        for step in range(1, flame + 1):
+            tx, ty = cx + dx * step, cy + dy * step
+            if not arena.in_bounds(tx, ty) or arena.get_tile(tx, ty).tile_type == TileType.SOLID:
+                break
+            length = step
+            if arena.get_tile(tx, ty).tile_type == TileType.DESTRUCTIBLE:
+                break
+        reach.append(length)
+    return tuple(reach)
+
+
+def test_blast_rays_follow_crate_changes_resets_and_restores() -> None:
+    rng = random.Random(7)
+    arena = Arena(17, 13, 4)
+    crates = [(x, y) for x, y, tile in arena.iter_tiles() if tile.tile_type == TileType.DESTRUCTIBLE]
+    tiles = [(x, y) for x, y, _ in arena.iter_tiles()]
+
+    def check() -> None:
+        for cx, cy in tiles:
+            for flame in (1, 3, 20):
+                assert arena.blast_reach(cx, cy, flame) == walked_reach(arena, cx, cy, flame)
+
+    for tile in rng.sample(crates, 40):
+        arena.destroy_tile(*tile)
+    check()
+    cells = arena.changed_cells()
+    arena.reset()
+    check()
+    arena.restore_cells(cells)
+    check()
+
+    reach = arena.blast_reach(5, 5, 20)
+    covered = set(blast_tiles(5, 5, reach))
+    assert all(blast_covers(5, 5, reach, tx, ty) == ((tx, ty) in covered) for tx, ty in tiles)
+
+
+def test_arena_reset_restores_every_layer_of_the_template() -> None:
+    arena = Arena(17, 13, 4)
+    fresh = Arena(17, 13, 4)
+    crates = [(x, y) for x, y, tile in arena.iter_tiles() if tile.tile_type == TileType.DESTRUCTIBLE]
+    # a few changes are patched in place, many are copied back wholesale
+    for count in (1, 3, len(crates)):
+        for tx, ty in crates[:count]:
+            arena.destroy_tile(tx, ty)
+            arena.place_powerup(tx, ty, PowerUpType.FLAME)
+        assert arena.get_tile(*crates[0]) == Tile(TileType.FLOOR, PowerUpType.FLAME)
+        arena.reset()
+        assert arena.cells == fresh.cells
+        assert arena.powerup_layer == fresh.powerup_layer
+        assert arena.rays == fresh.rays
+    # tiles are shared views, not per-cell objects
+    assert arena.get_tile(1, 1) is fresh.get_tile(1, 1)
+
+
+def test_steady_state_ticks_barely_allocate() -> None:
+    state = GameState(seed=1)
+    for tile in ((3, 1), (4, 1), (5, 1)):
+        state.arena.destroy_tile(*tile)
+    state.add_bomb(Bomb(2, (11, 9), 100.0, 2))
+    buffer = InputBuffer()
+    player = state.players[1]
+
+    def tick(i: int) -> None:
+        buffer.set_state(1, ACTION_INPUTS[ACTION_RIGHT if i % 120 < 60 else ACTION_LEFT])
+        assert state.update(FIXED_TIMESTEP, buffer) is state.result
+
+    tracemalloc.start()
+    try:
+        for i in range(240):
+            tick(i)
+        peaks = [0] * 240
+        start = tracemalloc.get_traced_memory()[0]
+        for i in range(240):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            tick(i)
+            peaks[i] = tracemalloc.get_traced_memory()[1] - before
+        growth = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    # what is left is loop iterators and dict views; inputs, results and tile tuples are all reused
+    assert sorted(peaks)[len(peaks) // 2] <= 256
+    assert growth <= 256
+    assert player.tile_position() is player.tile_position() == (1, 1)
+    player.position = (1.4, 1.0)
+    assert player.tile_position() == (1, 1)
+    player.position = (1.6, 1.0)
+    assert player.tile_position() == (2, 1)
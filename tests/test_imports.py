@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# own modules only: the stdlib (dataclasses, typing) is shared by everything and not ours to trim.
+# Each module pays a fixed filesystem cost on slow disks, so the budget can be raised per machine.
+IMPORT_BUDGET_MS = float(os.environ.get("BOMBERMAN_IMPORT_BUDGET_MS", 10))
+CORE = ("game_state", "controllers", "replay", "archive", "snapshot", "tournament")
+
+
+def run(*args: str, env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def test_core_does_not_import_presentation_or_heavy_modules() -> None:
+    code = "; ".join(f"import src.bomberman.{name}" for name in CORE)
+    code += "; import src.bomberman as b; b.GameState; import sys; print(' '.join(sorted(sys.modules)))"
+    loaded = set(run("-c", code).stdout.split())
+    assert not loaded & {"pygame", "numpy", "asyncio", "multiprocessing"}
+    assert "src.bomberman.renderer" not in loaded
+
+
+def test_core_import_time_budget() -> None:
+    # time loading, not compiling: the first run writes the bytecode the second one reads
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    run("-c", "import src.bomberman.game_state", env=env)
+    stderr = run("-X", "importtime", "-c", "import src.bomberman.game_state", env=env).stderr
+    # "import time: self [us] | cumulative | imported package"
+    own = sum(int(match.group(1)) for match in re.finditer(r"import time:\s+(\d+) \|\s+\d+ \|\s+src\b", stderr))
+    assert 0 < own / 1000 < IMPORT_BUDGET_MS
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from src.bomberman.entities import InputBuffer, action_from_input
+from src.bomberman.input import KeyboardController
+
+
+def key(kind: int, code: int) -> pygame.event.Event:
+    return pygame.event.Event(kind, key=code)
+
+
+def polled(controller: KeyboardController) -> dict:
+    buffer = InputBuffer()
+    controller.poll(buffer)
+    return {player_id: action_from_input(buffer.get_state(player_id)) for player_id in (1, 2)}
+
+
+def test_taps_between_ticks_are_latched_until_the_next_poll() -> None:
+    controller = KeyboardController()
+    controller.handle_event(key(pygame.KEYDOWN, pygame.K_SPACE))
+    controller.handle_event(key(pygame.KEYUP, pygame.K_SPACE))
+    controller.handle_event(key(pygame.KEYDOWN, pygame.K_RIGHT))
+    controller.handle_event(key(pygame.KEYUP, pygame.K_RIGHT))
+    first = polled(controller)
+    assert first[1] and first[2]
+    assert polled(controller) == {1: 0, 2: 0}
+
+    controller.handle_event(key(pygame.KEYDOWN, pygame.K_a))
+    held = polled(controller)[1]
+    assert held and polled(controller)[1] == held
+    assert not controller.handle_event(key(pygame.KEYDOWN, pygame.K_q))
+
+
+def test_gamepads_go_through_the_same_bindings() -> None:
+    controller = KeyboardController()
+    keyboard = KeyboardController()
+    keyboard.handle_event(key(pygame.KEYDOWN, pygame.K_UP))
+    keyboard.handle_event(key(pygame.KEYDOWN, pygame.K_RETURN))
+    expected = polled(keyboard)[2]
+
+    # the first pad seen drives player 1, the second player 2
+    controller.handle_event(pygame.event.Event(pygame.JOYBUTTONDOWN, joy=7, instance_id=7, button=3))
+    controller.handle_event(pygame.event.Event(pygame.JOYHATMOTION, joy=9, instance_id=9, hat=0, value=(0, 1)))
+    controller.handle_event(pygame.event.Event(pygame.JOYBUTTONDOWN, joy=9, instance_id=9, button=0))
+    assert polled(controller) == {1: 0, 2: expected}
+
+    controller.handle_event(pygame.event.Event(pygame.JOYHATMOTION, joy=9, instance_id=9, hat=0, value=(0, 0)))
+    controller.handle_event(pygame.event.Event(pygame.JOYBUTTONUP, joy=9, instance_id=9, button=0))
+    controller.handle_event(pygame.event.Event(pygame.JOYAXISMOTION, joy=7, instance_id=7, axis=0, value=-0.3))
+    assert polled(controller) == {1: 0, 2: 0}
+    controller.handle_event(pygame.event.Event(pygame.JOYAXISMOTION, joy=7, instance_id=7, axis=0, value=-0.9))
+    keyboard.handle_event(key(pygame.KEYDOWN, pygame.K_a))
+    assert polled(controller)[1] == polled(keyboard)[1]
+
+    controller.bindings[1]["bomb"].append(("button", 0, 3))
+    controller.rebind()
+    controller.handle_event(pygame.event.Event(pygame.JOYBUTTONDOWN, joy=7, instance_id=7, button=3))
+    assert polled(controller)[1]
+
+
+def test_latency_runs_from_the_event_to_the_next_shown_frame() -> None:
+    controller = KeyboardController()
+    controller.handle_event(key(pygame.KEYDOWN, pygame.K_w), stamp=1_000_000)
+    controller.handle_event(key(pygame.KEYDOWN, pygame.K_d), stamp=3_000_000)
+    controller.frame_shown(now=5_000_000)
+    assert not controller.latency[1].samples
+
+    polled(controller)
+    controller.frame_shown(now=17_000_000)
+    controller.frame_shown(now=34_000_000)
+    # the earliest change the tick consumed counts, once; releasing a latch is not an input
+    assert list(controller.latency[1].samples) == [16_000_000]
+    polled(controller)
+    controller.frame_shown(now=50_000_000)
+    assert len(controller.latency[1].samples) == 1
+    assert controller.latency_summary() == {1: {"p50_ms": 16.0, "p99_ms": 16.0, "max_ms": 16.0}}
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import random
+from collections import deque
+
+from src.bomberman.arena import blast_covers
+from src.bomberman.config import TileType
+from src.bomberman.entities import Bomb
+from src.bomberman.game_state import GameState
+from src.bomberman.navigation import INF, UNREACHABLE
+from src.bomberman.tournament import MatchRunner, TournamentConfig
+
+
+def open_tiles(state: GameState) -> list:
+    return [(x, y) for x, y, tile in state.arena.iter_tiles()
+            if tile.tile_type is TileType.FLOOR and not state.occupancy.has_bomb((x, y))]
+
+
+def brute_force_danger(state: GameState) -> dict:
+    """Relax bomb times until nothing changes; slow but obviously right."""
+    times = {bomb.tile_position(): bomb.deadline for bomb in state.bombs}
+    changed = True
+    while changed:
+        changed = False
+        for bomb in state.bombs:
+            cx, cy = bomb.tile_position()
+            reach = state.arena.blast_reach(cx, cy, bomb.flame_length)
+            for other in state.bombs:
+                if blast_covers(cx, cy, reach, *other.tile_position()) and times[cx, cy] < times[other.tile_position()]:
+                    times[other.tile_position()] = times[cx, cy]
+                    changed = True
+    danger = {}
+    for bomb in state.bombs:
+        cx, cy = bomb.tile_position()
+        reach = state.arena.blast_reach(cx, cy, bomb.flame_length)
+        for x, y, _ in state.arena.iter_tiles():
+            if blast_covers(cx, cy, reach, x, y):
+                danger[x, y] = min(danger.get((x, y), INF), times[cx, cy])
+    return danger
+
+
+def test_incremental_danger_matches_a_rebuild() -> None:
+    rng = random.Random(3)
+    state = GameState(width=21, height=15)
+    for tx, ty, tile in list(state.arena.iter_tiles()):
+        if tile.tile_type is TileType.DESTRUCTIBLE and rng.random() < 0.6:
+            state.arena.destroy_tile(tx, ty)
+    state.danger.threatened()  # build once, so the placements below are folded in incrementally
+    for _ in range(25):
+        tx, ty = rng.choice(open_tiles(state))
+        state.add_bomb(Bomb(1, (tx, ty), rng.uniform(0.5, 3.0), rng.randint(1, 4)))
+        expected = brute_force_danger(state)
+        incremental = {tile: state.danger.time_at(*tile) for tile in state.danger.threatened()}
+        assert incremental == expected
+        state.danger.invalidate()
+        assert {tile: state.danger.time_at(*tile) for tile in state.danger.threatened()} == expected
+
+
+def test_flow_fields_match_a_breadth_first_search_and_are_shared() -> None:
+    state = GameState()
+    state.arena.destroy_tile(3, 1)
+    flow = state.flow
+    field = flow.toward([(3, 1)])
+    walkable = set(open_tiles(state))
+    distance = {(3, 1): 0}
+    queue = deque([(3, 1)])
+    while queue:
+        x, y = queue.popleft()
+        for step in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            tile = (x + step[0], y + step[1])
+            if tile in walkable and tile not in distance:
+                distance[tile] = distance[x, y] + 1
+                queue.append(tile)
+    for x, y, _ in state.arena.iter_tiles():
+        assert field.distance(x, y) == distance.get((x, y), UNREACHABLE)
+    path = field.path(1, 1)
+    assert path[0] == (1, 1) and path[-1] == (3, 1) and len(path) == distance[1, 1] + 1
+
+    searches = flow.searches
+    assert flow.toward([(3, 1)]) is field
+    assert flow.searches == searches
+    state.add_bomb(Bomb(1, (2, 1), 3.0, 1))
+    moved = flow.toward([(3, 1)])
+    assert moved is not field and flow.searches == searches + 1
+    assert moved.distance(1, 1) == UNREACHABLE
+    # standing on a bomb still leads off it
+    assert state.flow.safe().direction(2, 1) is not None
+
+
+def test_crate_fronts_and_escapes_match_a_full_scan() -> None:
+    rng = random.Random(5)
+    state = GameState(width=17, height=13)
+    arena = state.arena
+    flow = state.flow
+
+    def check() -> None:
+        fronts = [(x, y) for x, y, tile in arena.iter_tiles() if tile.tile_type is TileType.FLOOR and any(
+            arena.in_bounds(x + dx, y + dy) and arena.get_tile(x + dx, y + dy).tile_type is TileType.DESTRUCTIBLE
+            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)))]
+        expected = flow.toward(fronts)
+        field = flow.crate_fronts()
+        for x, y in open_tiles(state):
+            assert field.distance(x, y) == expected.distance(x, y)
+            for flame in (1, 2, 5):
+                reach = arena.blast_reach(x, y, flame)
+                shelters = [tile for tile in open_tiles(state) if not blast_covers(x, y, reach, *tile)]
+                distance, step = flow.escape(x, y, flame)
+                assert distance == flow.toward(shelters).distance(x, y)
+                assert (step is None) == (distance == UNREACHABLE)
+
+    crates = [(x, y) for x, y, tile in arena.iter_tiles() if tile.tile_type is TileType.DESTRUCTIBLE]
+    check()
+    for tile in rng.sample(crates, 30):
+        arena.destroy_tile(*tile)
+    check()
+    cells = arena.changed_cells()
+    state.reset_round()
+    check()
+    arena.restore_cells(cells)
+    check()
+
+    # shelters must also be out of reach of the bombs already ticking
+    state.reset_round()
+    arena.destroy_tile(1, 3)
+    assert flow.escape(1, 1, 1) == (2, (0, 1))
+    arena.destroy_tile(2, 3)
+    state.add_bomb(Bomb(2, (3, 3), 2.0, 2))
+    assert flow.escape(1, 1, 1) == (UNREACHABLE, None)
+
+
+def test_survivor_outlasts_the_wanderer() -> None:
+    config = TournamentConfig(("survivor", "wanderer"), wins=2, max_rounds=3, round_ticks=1_200, seed=1)
+    runner = MatchRunner(config)
+    assert [runner.play(match_id)[1] for match_id in range(4)] == [1, 1, 1, 1]
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import random
+
+from src.bomberman.config import FIXED_TIMESTEP
+from src.bomberman.entities import ACTION_BOMB, ACTION_INPUTS, ACTION_RIGHT, InputBuffer
+from src.bomberman.game_state import GameState
+from src.bomberman.net import (
+    FRAME,
+    INPUT,
+    JOIN,
+    MSG_INPUT,
+    MSG_JOIN,
+    POSITION_SCALE,
+    WELCOME,
+    DeltaEncoder,
+    StateMirror,
+    frame,
+    read_message,
+)
+from src.bomberman.server import MatchServer
+
+
+def view(state: GameState) -> tuple:
+    players = tuple(
+        (player_id, round(player.position[0] * POSITION_SCALE), round(player.position[1] * POSITION_SCALE),
+         player.alive, player.score)
+        for player_id, player in sorted(state.players.items())
+    )
+    cells = tuple(state.arena.cell_code(x, y) for x, y, _ in state.arena.iter_tiles())
+    bombs = sorted(bomb.tile_position() for bomb in state.bombs)
+    flames = sorted({tile for explosion in state.explosions for tile in explosion.tiles})
+    return players, cells, bombs, flames, state.round_over, state.winner
+
+
+def test_deltas_rebuild_the_server_state() -> None:
+    state = GameState(21, 15, 4, seed=2)
+    encoder = DeltaEncoder(state)
+    mirror = StateMirror(21, 15, 4)
+    late = None
+    rng = random.Random(7)
+    buffer = InputBuffer()
+    actions = [0] * 4
+    resets = 0
+    for tick in range(1500):
+        if state.round_over:
+            state.reset_round()
+            resets += 1
+        if tick % 8 == 0:
+            actions = [rng.randrange(32) for _ in actions]
+        for player_id, action in enumerate(actions, start=1):
+            buffer.set_state(player_id, ACTION_INPUTS[action])
+        state.update(FIXED_TIMESTEP, buffer)
+        message = encoder.delta(tick)
+        mirror.apply(message)
+        assert view(mirror.state) == view(state)
+        if late is not None:
+            late.apply(message)
+            assert view(late.state) == view(state)
+        elif tick == 700:
+            # a client joining mid-round starts from a keyframe, then follows the shared deltas
+            late = StateMirror(21, 15, 4)
+            late.apply(encoder.keyframe(tick))
+            assert view(late.state) == view(state)
+    assert resets
+
+
+async def join(host: str, port: int) -> tuple:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(frame(JOIN.pack(MSG_JOIN, 13, 11, 2)))
+    _, match_id, player_id, width, height, players = WELCOME.unpack(await read_message(reader))
+    return reader, writer, match_id, player_id, StateMirror(width, height, players)
+
+
+def test_server_hosts_matches_over_loopback() -> None:
+    async def scenario() -> None:
+        server = MatchServer(tick_rate=120, seed=1)
+        await server.start()
+        host, port = server.address
+        clients = [await join(host, port) for _ in range(3)]
+        assert [(match_id, player_id) for _, _, match_id, player_id, _ in clients] == [(1, 1), (1, 2), (2, 1)]
+
+        reader, writer, _, _, mirror = clients[0]
+        writer.write(frame(INPUT.pack(MSG_INPUT, ACTION_RIGHT | ACTION_BOMB)))
+        for _ in range(30):
+            mirror.apply(await read_message(reader))
+        match = server.matches[1]
+        assert match.state.bombs and match.state.players[1].position[0] > 1.0
+        # catch up with the ticker, then compare with the authoritative state
+        while mirror.tick != match.tick:
+            mirror.apply(await read_message(reader))
+        assert view(mirror.state) == view(match.state)
+
+        stats = server.stats()
+        assert stats["matches"] == 2 and stats["clients"] == 3 and stats["bytes_sent"] > 0
+        for _, client_writer, _, _, _ in clients:
+            client_writer.close()
+        await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_malformed_messages_close_the_connection() -> None:
+    async def scenario() -> None:
+        errors: list = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        server = MatchServer(tick_rate=120, seed=1)
+        await server.start()
+        host, port = server.address
+        # an oversized length prefix is refused before the server waits for, or buffers, its body
+        huge = FRAME.pack(1 << 30)
+        for data in (frame(b""), frame(JOIN.pack(MSG_JOIN, 13, 11, 2)[:3]),
+                     frame(INPUT.pack(MSG_INPUT, ACTION_RIGHT)), huge):
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(data)
+            assert await asyncio.wait_for(reader.read(), 5) == b""
+            writer.close()
+
+        for data in (frame(INPUT.pack(MSG_INPUT, ACTION_RIGHT)[:1]), huge):
+            reader, writer, _, _, _ = await join(host, port)
+            writer.write(data)
+            while await asyncio.wait_for(reader.read(1 << 16), 5):
+                pass
+            writer.close()
+            # the seat is given back before the socket is closed
+            assert not server.matches
+        await server.stop()
+        gc.collect()
+        assert not errors
+
+    asyncio.run(scenario())
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import tracemalloc
+import weakref
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.bomberman.config import BOMB_TIMER, FIXED_TIMESTEP, PowerUpType, TileType
+from src.bomberman.entities import Bomb, InputBuffer, InputState
+from src.bomberman.game_state import GameState
+from src.bomberman.observation import CHANNELS, FIRST_PLAYER, ObservationEncoder
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def played(seed: int, ticks: int) -> GameState:
+    state = GameState(seed=seed)
+    buffer = InputBuffer()
+    for tick in range(ticks):
+        buffer.set_state(1, InputState(move=(1.0, 0.0) if tick < 30 else (0.0, 1.0), place_bomb=tick % 40 == 0))
+        buffer.set_state(2, InputState(move=(-1.0, 0.0), place_bomb=tick % 50 == 0))
+        state.update(FIXED_TIMESTEP, buffer)
+    return state
+
+
+def test_planes_match_the_state() -> None:
+    state = GameState()
+    for tile in ((3, 1), (4, 1), (1, 3)):
+        state.arena.destroy_tile(*tile)
+    state.add_bomb(Bomb(1, (3, 1), 0.0, 1))
+    state.update(FIXED_TIMESTEP, InputBuffer())
+    state.add_bomb(Bomb(2, (1, 3), 2.0, 3))
+    state.spawn_powerup(5, 1, PowerUpType.FLAME)
+    state.spawn_powerup(1, 4, PowerUpType.BOMB)
+    state.players[2].alive = False
+    assert state.explosions and len(state.bombs) == 1
+    planes = ObservationEncoder().encode(state)
+    channel = {name: i for i, name in enumerate(CHANNELS)}
+    kinds = {TileType.SOLID: "solid", TileType.DESTRUCTIBLE: "destructible", TileType.FLOOR: "floor"}
+    bombs = {bomb.tile_position(): bomb for bomb in state.bombs}
+    for x, y, tile in state.arena.iter_tiles():
+        assert planes[:3, y, x].tolist() == [float(kinds[tile.tile_type] == name) for name in CHANNELS[:3]]
+        assert planes[channel["powerup_bomb"], y, x] == (tile.powerup is PowerUpType.BOMB)
+        assert planes[channel["powerup_flame"], y, x] == (tile.powerup is PowerUpType.FLAME)
+        bomb = bombs.get((x, y))
+        assert planes[channel["bomb_timer"], y, x] == pytest.approx(bomb.timer / BOMB_TIMER if bomb else 0.0)
+        assert planes[channel["bomb_flame"], y, x] == (bomb.flame_length if bomb else 0)
+        assert planes[channel["explosion"], y, x] == any(flame.covers(x, y) for flame in state.explosions)
+    for player_id, player in state.players.items():
+        plane = planes[FIRST_PLAYER + player_id - 1]
+        assert plane.sum() == player.alive
+        if player.alive:
+            assert plane[player.tile_position()[::-1]] == 1.0
+
+
+def test_batches_reuse_one_buffer() -> None:
+    states = [played(seed, 40 + 20 * seed) for seed in range(6)]
+    encoder = ObservationEncoder(batch_size=8)
+    single = [ObservationEncoder().encode(state).copy() for state in states]
+    batch = encoder.encode_batch(states)
+    assert batch.shape == (6, len(CHANNELS) + 2, 11, 13) and batch.dtype == np.float32
+    assert np.shares_memory(batch, encoder.buffer)
+    for row, expected in zip(batch, single):
+        assert np.array_equal(row, expected)
+
+    tracemalloc.start()
+    try:
+        encoder.encode_batch(states)
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for _ in range(20):
+            encoder.encode_batch(states)
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    # scalar writes only: nothing near the size of one observation is allocated per call
+    assert peak < encoder.buffer[0].nbytes // 2
+    with pytest.raises(ValueError):
+        encoder.encode_batch(states * 2)
+
+
+def test_fresh_states_do_not_pile_up_in_the_encoder() -> None:
+    encoder = ObservationEncoder(batch_size=2)
+    first = GameState()
+    arena = weakref.ref(first.arena)
+    encoder.encode(first)
+    del first
+    for seed in range(200):
+        state = GameState(seed=seed)
+        state.arena.destroy_tile(3, 1)
+        assert encoder.encode(state)[CHANNELS.index("floor"), 1, 3] == 1.0
+        encoder.encode_batch([state, GameState()])
+    assert len(encoder._layers) == 2
+    assert arena() is None
+
+
+def test_encoding_does_not_load_pygame() -> None:
+    code = "import src.bomberman.observation, sys; print('pygame' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+
+from src.bomberman.entities import InputBuffer, InputState
+from src.bomberman.game_state import GameState
+from src.bomberman.profiling import GAME_STATE_PHASES, Profiler
+
+
+def play_with_bombs(state: GameState, ticks: int, profiler: Profiler) -> None:
+    buffer = InputBuffer()
+    for tick in range(ticks):
+        buffer.set_state(1, InputState(move=(0.0, 1.0), place_bomb=tick == 0))
+        state.update(1 / 60, buffer)
+        profiler.frame_done()
+
+
+def test_instrumented_phases_nest_inside_update_and_can_be_removed() -> None:
+    state = GameState()
+    profiler = Profiler()
+    profiler.instrument(state)
+    play_with_bombs(state, 200, profiler)
+
+    events = profiler.trace_events()
+    names = {event["name"] for event in events}
+    assert {"update", "update_bombs", "explode_bomb", "apply_explosion_effects", "frame"} <= names
+    updates = [event for event in events if event["name"] == "update"]
+    explode = next(event for event in events if event["name"] == "explode_bomb")
+    assert any(u["ts"] <= explode["ts"] and explode["ts"] + explode["dur"] <= u["ts"] + u["dur"] for u in updates)
+    assert len(profiler.frame_times) == 199
+    assert profiler.percentile(50) <= profiler.percentile(99)
+    assert profiler.summary()[0].startswith("frame p50")
+
+    Profiler.uninstrument(state)
+    assert not any(phase in vars(state) for phase in GAME_STATE_PHASES)
+    before = len(profiler.events)
+    state.update(1 / 60, InputBuffer())
+    assert len(profiler.events) == before
+
+
+def test_frames_over_budget_dump_a_chrome_trace(tmp_path) -> None:
+    state = GameState()
+    profiler = Profiler(budget_ms=0.0, trace_dir=tmp_path)
+    profiler.instrument(state)
+    with profiler.span("render"):
+        pass
+    play_with_bombs(state, 5, profiler)
+    # repeated slow frames inside one window produce a single dump
+    assert len(profiler.dumps) == 1
+    trace = json.loads(profiler.dumps[0].read_text())
+    assert all(event["ph"] == "X" for event in trace["traceEvents"])
+    assert "render" in {event["name"] for event in trace["traceEvents"]}
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from src.bomberman.assets import AssetManager
+from src.bomberman.config import ARENA_HEIGHT, ARENA_WIDTH, SCALE_FACTOR, TILE_SIZE, PowerUpType
+from src.bomberman.entities import InputBuffer, InputState
+from src.bomberman.game_state import GameState
+from src.bomberman.renderer import Renderer, draw_arena
+
+
+@pytest.fixture
+def screen():
+    pygame.init()
+    size = (ARENA_WIDTH * TILE_SIZE * SCALE_FACTOR, ARENA_HEIGHT * TILE_SIZE * SCALE_FACTOR)
+    yield pygame.display.set_mode(size)
+    pygame.quit()
+
+
+def reference_frame(screen, assets, renderer, state) -> bytes:
+    surface = pygame.Surface(screen.get_size()).convert()
+    draw_arena(surface, assets, state)
+    surface.blit(renderer._text_cache["score"][1], (10, 10))
+    if state.round_over:
+        surface.blit(renderer._text_cache["message"][1], (10, 30))
+    return pygame.image.tobytes(surface, "RGB")
+
+
+def test_incremental_frames_match_full_redraw(screen) -> None:
+    assets = AssetManager()
+    assets.load()
+    renderer = Renderer(screen, assets, pygame.font.Font(None, 18))
+    state = GameState()
+    state.spawn_powerup(2, 1, PowerUpType.FLAME)
+    buffer = InputBuffer()
+
+    dirty_areas = []
+    for tick in range(240):
+        buffer.set_state(1, InputState(move=(1.0, 0.0) if tick < 20 else (0.0, 1.0), place_bomb=tick == 5))
+        buffer.set_state(2, InputState(move=(-1.0, 0.0), place_bomb=tick == 30))
+        result = state.update(1 / 60, buffer)
+        rects = renderer.draw(state, result)
+        dirty_areas.append(sum(rect.width * rect.height for rect in rects))
+        assert pygame.image.tobytes(screen, "RGB") == reference_frame(screen, assets, renderer, state)
+
+    # after the first frame only a small part of the window is pushed
+    assert max(dirty_areas[1:]) < screen.get_width() * screen.get_height() // 2
+
+
+def test_reset_triggers_full_redraw(screen) -> None:
+    assets = AssetManager()
+    assets.load()
+    renderer = Renderer(screen, assets, pygame.font.Font(None, 18))
+    state = GameState()
+    result = state.update(0.0, InputBuffer())
+    renderer.draw(state, result)
+    assert renderer.draw(state, result) != [screen.get_rect()]
+    state.reset_round()
+    assert renderer.draw(state, result)[0] == screen.get_rect()
+
+
+def test_camera_zooms_and_scrolls_on_large_arenas() -> None:
+    from src.bomberman.renderer import Camera
+
+    state = GameState(width=101, height=81, player_count=2)
+    camera = Camera((416, 352), 32)
+    camera.follow(state)
+    assert camera.tile_size < 32
+    xs, ys = camera.visible_tiles(101, 81)
+    assert len(xs) * len(ys) < 101 * 81
+
+    state.players[2].alive = False
+    camera.follow(state)
+    assert camera.tile_size == 32
+    assert camera.origin == (0, 0)
+
+    default = GameState()
+    camera = Camera((416, 352), 32)
+    assert camera.follow(default) is False
+    assert (camera.tile_size, camera.origin) == (32, (0, 0))
+
+
+def test_camera_waits_for_a_tile_of_drift_before_scrolling() -> None:
+    from src.bomberman.renderer import Camera
+
+    state = GameState(width=41, height=31, player_count=2)
+    state.players[2].alive = False
+    player = state.players[1]
+    player.position = (20.0, 15.0)
+    camera = Camera((416, 352), 32)
+    camera.follow(state)
+    start = camera.origin
+    moves = 0
+    for step in range(1, 97):
+        player.position = (20.0 + step / 32, 15.0)
+        moves += camera.follow(state)
+    # three tiles walked, three scrolls; the player stays in view
+    assert moves == 3 and camera.origin[1] == start[1]
+    assert 0 < camera.origin[0] - start[0] <= 3 * 32
+    assert camera.origin[0] < 23 * 32 < camera.origin[0] + camera.view_width
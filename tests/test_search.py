@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import time
+
+from src.bomberman.controllers import make_controller
+from src.bomberman.entities import InputBuffer
+from src.bomberman.game_state import GameState
+from src.bomberman.search import SearchController
+from src.bomberman.tournament import MatchRunner, TournamentConfig
+
+
+def play(controller: SearchController, ticks: int, seed: int = 0) -> list:
+    state = GameState(seed=seed)
+    controller.reset(state, 1, seed)
+    buffer = InputBuffer()
+    actions = []
+    for _ in range(ticks):
+        controller.act(state, 1, buffer)
+        actions.append(buffer.get_state(1))
+        state.update(1 / 60, buffer)
+    return actions
+
+
+def test_fixed_iterations_are_reproducible_and_reuse_the_tree() -> None:
+    controller = SearchController(budget_ms=None, iterations=20)
+    actions = play(controller, 24)
+    assert actions == play(SearchController(budget_ms=None, iterations=20), 24)
+    # the root is the chosen child of last decision's tree, with its visits carried over
+    assert controller.root.visits > 20 * (controller.decision_ticks - controller.remaining - 1)
+
+
+def test_search_stops_at_the_time_budget() -> None:
+    controller = SearchController(budget_ms=5)
+    state = GameState(seed=1)
+    controller.reset(state, 1, 0)
+    start = time.perf_counter()
+    done = controller.search(state.snapshot(), 1, 0)
+    assert time.perf_counter() - start < 0.1
+    assert done == controller.rollouts and controller.metrics()["rollouts"] == done
+
+
+def test_background_search_runs_off_the_calling_thread() -> None:
+    controller = make_controller("search")
+    controller.background = True
+    state = GameState(seed=2)
+    controller.reset(state, 1, 0)
+    buffer = InputBuffer()
+    try:
+        controller.act(state, 1, buffer)
+        deadline = time.perf_counter() + 5
+        while controller.rollouts == 0 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+    finally:
+        controller.close()
+    assert controller.rollouts > 0
+    assert controller._worker is None
+
+
+def test_search_beats_the_wanderer() -> None:
+    runner = MatchRunner(TournamentConfig(("idle", "wanderer"), wins=2, max_rounds=3, round_ticks=900, seed=3))
+    runner.controllers[0] = SearchController(budget_ms=None, iterations=12)
+    runner.active_players = [1, 2]
+    assert runner.play(0)[1] == 1
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+
+from src.bomberman.config import FIXED_TIMESTEP
+from src.bomberman.entities import ACTION_BOMB, ACTION_DOWN, ACTION_INPUTS, ACTION_RIGHT, InputBuffer
+from src.bomberman.game_state import GameState
+from src.bomberman.simthread import FrameView, SimulationThread
+
+TICK_NS = int(FIXED_TIMESTEP * 1e9)
+
+
+def test_ticks_apply_inputs_stamped_up_to_them_and_hold_them() -> None:
+    sim = SimulationThread(GameState(seed=4))
+    sim.inputs.push(1, ACTION_DOWN, stamp=0)
+    sim.inputs.push(1, ACTION_DOWN | ACTION_BOMB, stamp=10 * TICK_NS)
+    sim.inputs.push(1, ACTION_DOWN, stamp=10 * TICK_NS + 1)
+    for tick in range(1, 31):
+        frame = sim.step(tick * TICK_NS)
+    assert sim.frames[1] is frame and sim.frames[0].tick == 29
+
+    reference = GameState(seed=4)
+    buffer = InputBuffer()
+    for tick in range(1, 31):
+        action = ACTION_DOWN | ACTION_BOMB if tick == 10 else ACTION_DOWN
+        buffer.set_state(1, ACTION_INPUTS[action])
+        reference.update(FIXED_TIMESTEP, buffer)
+    assert frame.snapshot == reference.snapshot()
+    # the last input was stamped a nanosecond after tick 10 was due, so it waited for tick 11
+    assert sorted(sim.input_latency.samples) == [0, TICK_NS - 1, TICK_NS]
+
+
+def test_a_bomb_tap_released_within_one_tick_is_not_lost() -> None:
+    sim = SimulationThread(GameState(seed=4))
+    sim.inputs.push(1, ACTION_BOMB, stamp=TICK_NS // 3)
+    sim.inputs.push(1, 0, stamp=2 * TICK_NS // 3)
+    sim.step(TICK_NS)
+    assert [bomb.owner_id for bomb in sim.state.bombs] == [1]
+
+
+def test_view_interpolates_players_and_patches_only_changed_tiles() -> None:
+    state = GameState()
+    state.arena.destroy_tile(3, 1)
+    sim = SimulationThread(state)
+    sim.inputs.push(1, ACTION_RIGHT, stamp=0)
+    for tick in range(1, 4):
+        sim.step(tick * TICK_NS)
+    view = FrameView(state.arena.width, state.arena.height, state.arena.player_count)
+    previous, latest = sim.frames
+    view.show(sim.frames, now=latest.time)
+    x0 = previous.snapshot.players[0][1]
+    x1 = latest.snapshot.players[0][1]
+    assert view.state.players[1].position[0] == x0
+    view.show(sim.frames, now=latest.time + TICK_NS // 2)
+    assert abs(view.state.players[1].position[0] - (x0 + x1) / 2) < 1e-9
+    assert view.state.arena.changes == [(3, 1)]
+
+    generation = view.state.arena.generation
+    state.arena.destroy_tile(3, 3)
+    sim.step(4 * TICK_NS)
+    view.show(sim.frames)
+    assert view.state.arena.generation == generation and view.state.arena.changes == [(3, 1), (3, 3)]
+    assert view.state.snapshot() == state.snapshot()
+
+    sim.call(state.reset_round)
+    sim.step(5 * TICK_NS)
+    view.show(sim.frames)
+    assert view.state.arena.generation == generation + 1
+    assert view.state.players[1].position == state.players[1].position
+
+
+def test_thread_keeps_ticking_while_the_caller_is_busy() -> None:
+    sim = SimulationThread(GameState())
+    sim.start()
+    try:
+        end = time.perf_counter() + 0.3
+        while time.perf_counter() < end:
+            pass  # a long "frame" on the render thread
+    finally:
+        sim.stop()
+    assert sim.ticks >= 6
+    assert sim.frames[1].tick == sim.ticks
+    metrics = sim.metrics()
+    assert metrics["late_p50_ms"] <= metrics["late_max_ms"]
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from src.bomberman.config import FIXED_TIMESTEP, PowerUpType, TileType
+from src.bomberman.entities import Explosion, InputBuffer, InputState
+from src.bomberman.game_state import GameState
+from src.bomberman.replay import state_digest
+from src.bomberman.snapshot import Snapshot
+
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+def play(state: GameState, ticks: int, seed: int) -> None:
+    """Wanders in straight lines and drops bombs on the way out of a tile so crates get destroyed."""
+    rng = random.Random(seed)
+    buffer = InputBuffer()
+    held = {}
+    for _ in range(ticks):
+        if state.round_over:
+            state.reset_round()
+        for player_id, player in state.players.items():
+            tx, ty = player.tile_position()
+            dx, dy = held.get(player_id, (0, 0))
+            if (dx, dy) == (0, 0) or not state._tile_is_open(tx + dx, ty + dy) or rng.random() < 0.02:
+                dx, dy = held[player_id] = rng.choice(DIRECTIONS)
+            offset = (player.position[0] - tx) * dx + (player.position[1] - ty) * dy
+            bomb = offset > 0.4 and state._tile_is_open(tx + dx, ty + dy) and rng.random() < 0.05
+            buffer.set_state(player_id, InputState(move=(float(dx), float(dy)), place_bomb=bomb))
+        state.update(FIXED_TIMESTEP, buffer)
+
+
+def blast_crates(state: GameState) -> None:
+    """Opens a few crates and drops a power-up so the arena differs from its template."""
+    crates = [(x, y) for x, y, tile in state.arena.iter_tiles() if tile.tile_type == TileType.DESTRUCTIBLE]
+    middle = crates[len(crates) // 2:len(crates) // 2 + 3]
+    for x, y in middle:
+        state.arena.destroy_tile(x, y)
+    state.spawn_powerup(*middle[0], PowerUpType.FLAME)
+
+
+def test_restore_rewinds_every_field() -> None:
+    state = GameState(seed=3)
+    blast_crates(state)
+    play(state, 100, seed=1)
+    snap = state.snapshot()
+    assert snap.arena and snap.powerups
+    digest = state_digest(state)
+
+    play(state, 600, seed=2)
+    assert state_digest(state) != digest
+    state.restore(snap)
+    assert state_digest(state) == digest
+    assert state.snapshot() == snap
+
+
+def test_restored_state_continues_identically() -> None:
+    state = GameState(seed=8)
+    blast_crates(state)
+    play(state, 100, seed=4)
+    snap = state.snapshot()
+    play(state, 900, seed=5)
+    expected = state_digest(state)
+
+    fresh = GameState(seed=0)
+    fresh.restore(snap)
+    play(fresh, 900, seed=5)
+    assert state_digest(fresh) == expected
+
+
+def test_snapshot_equality_hash_and_bytes() -> None:
+    a = GameState(seed=6)
+    b = GameState(seed=6)
+    for state in (a, b):
+        blast_crates(state)
+        play(state, 120, seed=9)
+    snap = a.snapshot()
+    assert snap == b.snapshot()
+    assert hash(snap) == hash(b.snapshot())
+
+    decoded = Snapshot.from_bytes(snap.to_bytes())
+    assert decoded == snap
+    b.restore(decoded)
+    assert state_digest(b) == state_digest(a)
+
+    play(b, 60, seed=10)
+    assert b.snapshot() != snap
+
+
+def test_restore_rejects_other_layouts() -> None:
+    snap = GameState(width=21, height=15, player_count=4).snapshot()
+    with pytest.raises(ValueError):
+        GameState().restore(snap)
+
+
+def test_explosions_listed_by_tile_survive_a_round_trip() -> None:
+    state = GameState(seed=3)
+    state.explosions.append(Explosion([(1, 1), (2, 1)], 0.5))
+    snap = state.snapshot()
+    assert Snapshot.from_bytes(snap.to_bytes()) == snap
+    other = GameState(seed=3)
+    other.restore(snap)
+    assert sorted(tile for explosion in other.explosions for tile in explosion.tiles) == [(1, 1), (2, 1)]
+    assert other.snapshot() == snap
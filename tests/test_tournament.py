@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import pytest
+
+from src.bomberman.tournament import MatchRunner, ResultsFile, TournamentConfig, load_results, run_tournament
+
+CONFIG = TournamentConfig(("wanderer", "random"), wins=2, max_rounds=3, round_ticks=600, seed=4)
+
+
+def rows(directory) -> list:
+    return sorted(zip(*load_results(directory).values()))
+
+
+def test_reused_runner_matches_a_fresh_one() -> None:
+    reused = MatchRunner(CONFIG)
+    played = [reused.play(match_id) for match_id in range(6)]
+    assert played == [MatchRunner(CONFIG).play(match_id) for match_id in range(6)]
+    assert any(row[4] for row in played)  # bombs were placed
+
+
+def test_passive_players_skip_to_the_next_timer() -> None:
+    config = TournamentConfig(("idle",), wins=1, max_rounds=2, round_ticks=100_000)
+    assert MatchRunner(config).play(0) == (0, 0, 2, 200_000, 0)
+
+
+def test_pool_results_match_a_single_process(tmp_path) -> None:
+    assert run_tournament(CONFIG, 12, tmp_path / "solo", workers=1) == 12
+    assert run_tournament(CONFIG, 12, tmp_path / "pool", workers=2) == 12
+    assert rows(tmp_path / "solo") == rows(tmp_path / "pool")
+
+
+def test_resume_skips_finished_matches_and_drops_torn_rows(tmp_path) -> None:
+    out = tmp_path / "run"
+    run_tournament(CONFIG, 5, out, workers=1)
+    with pytest.raises(FileExistsError):
+        ResultsFile(out, CONFIG)
+    with pytest.raises(ValueError):
+        ResultsFile(out, TournamentConfig(("idle",)), resume=True)
+
+    # a run killed mid-append leaves one column a row ahead of the rest
+    with open(out / "match.col", "ab") as handle:
+        handle.write(b"\x07\x00\x00\x00")
+    assert run_tournament(CONFIG, 8, out, workers=1, resume=True) == 3
+    assert [row[0] for row in rows(out)] == list(range(8))
+    run_tournament(CONFIG, 8, tmp_path / "fresh", workers=1)
+    assert rows(out) == rows(tmp_path / "fresh")
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import random
+
+from src.bomberman.config import FIXED_TIMESTEP, PowerUpType
+from src.bomberman.entities import InputBuffer, InputState
+from src.bomberman.game_state import GameState
+from src.bomberman.zobrist import TranspositionTable, state_hash, zobrist_key
+
+MOVES = [(1.0, 0.0), (-1.0, 0.0), (0.0, 1.0), (0.0, -1.0), (0.0, 0.0)]
+
+
+def play(state: GameState, ticks: int, rng: random.Random, hashes: list) -> None:
+    buffer = InputBuffer()
+    for _ in range(ticks):
+        if state.round_over:
+            state.reset_round()
+        for player_id in state.players:
+            buffer.set_state(player_id, InputState(move=rng.choice(MOVES), place_bomb=rng.random() < 0.05))
+        # debug mode recomputes the hash from scratch after every update
+        state.update(FIXED_TIMESTEP, buffer)
+        hashes.append(state.zobrist)
+
+
+def test_incremental_hash_tracks_the_match() -> None:
+    state = GameState(player_count=4, debug=True, seed=5)
+    twin = GameState(player_count=4, seed=5)
+    assert state.zobrist == twin.zobrist == state_hash(state)
+    hashes, twin_hashes = [], []
+    play(state, 1500, random.Random(2), hashes)
+    play(twin, 1500, random.Random(2), twin_hashes)
+    assert hashes == twin_hashes
+    assert len(set(hashes)) > 1000
+
+    snap = state.snapshot()
+    play(state, 300, random.Random(3), hashes)
+    other = GameState(player_count=4, seed=9)
+    other.restore(snap)
+    state.restore(snap)
+    assert state.zobrist == other.zobrist == state_hash(state) == hashes[1499]
+
+    state.reset_match(seed=5)
+    assert state.zobrist == GameState(player_count=4, seed=5).zobrist
+
+
+def test_any_difference_changes_the_hash() -> None:
+    state = GameState(seed=1)
+    start = state.zobrist
+    player = state.players[1]
+    player.position = (1.0 + 1 / 64, 1.0)
+    state.rehash()
+    assert state.zobrist != start
+    player.position = (1.0, 1.0)
+    state.rehash()
+    assert state.zobrist == start
+
+    state.arena.place_powerup(1, 2, PowerUpType.BOMB)
+    placed = state.zobrist
+    assert placed != start and state.arena.collect_powerup(1, 2) is PowerUpType.BOMB
+    assert state.zobrist == start
+    state.arena.place_powerup(1, 2, PowerUpType.FLAME)
+    assert state.zobrist not in (start, placed) and state.zobrist == state_hash(state)
+    state.arena.reset()
+    assert state.zobrist == start
+
+    # same pieces, different owners
+    swapped = GameState(seed=1)
+    state.players[2].score = 1
+    swapped.players[1].score = 1
+    state.rehash()
+    swapped.rehash()
+    assert state.zobrist != swapped.zobrist
+    # keys are fixed, so hashes can be compared across processes and machines
+    assert zobrist_key(1, 2, 3) == 0xD0734750FDE362B3
+
+
+def test_transposition_table_evicts_least_recently_used() -> None:
+    table = TranspositionTable(capacity=2)
+    table.put(1, "a")
+    table.put(2, "b")
+    assert table.get(1) == "a"
+    table.put(3, "c")
+    assert 2 not in table and 1 in table and len(table) == 2
+    assert table.get(2, "missing") == "missing"
+    table.put(1, "z")
+    table.put(4, "d")
+    assert table.get(1) == "z" and 3 not in table
+    assert table.stats() == {"entries": 2, "hits": 2, "misses": 1, "hit_rate": 2 / 3}